@@ -0,0 +1,146 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Maya plugin providing the pointBakeDeformer node. Rather than keying every vertex the deformer reads
+the positions for the current time straight from a PointBake cache (.pbk files are memory mapped, xml
+files use the frame index) so the import is instant and playback streams from disk. The node uses the
+python api 2.0 so the points move between maya and numpy as whole arrays rather than a vertex at a time.
+
+	cmds.loadPlugin("NCCAPointBakeDeformer.py")
+	node=cmds.deformer("pSphere1",type="pointBakeDeformer")[0]
+	cmds.setAttr(node+".cacheFile","/path/to/cache.pbk",type="string")
+	cmds.connectAttr("time1.outTime",node+".time")
+"""
+
+import sys
+
+import maya.api.OpenMaya as OM
+import maya.api.OpenMayaAnim as OMA
+import numpy as np
+
+import pointbake
+
+kPluginNodeName = "pointBakeDeformer"
+## id from the block reserved for local plugins
+kPluginNodeId = OM.MTypeId(0x00070A01)
+
+## the caches are shared by all deformers in the scene
+_caches = pointbake.CacheRegistry()
+
+
+def maya_useNewAPI() :
+	"""tells maya the plugin uses the python api 2.0"""
+	pass
+
+
+def _to_numpy(matrix : OM.MMatrix) -> np.ndarray :
+	return np.array([[matrix.getElement(row,column) for column in range(4)] for row in range(4)],dtype=np.float64)
+
+
+class PointBakeDeformer(OMA.MPxDeformerNode) :
+	"""deformer setting the points of a mesh from a PointBake cache"""
+
+	cacheFile=OM.MObject()
+	time=OM.MObject()
+	frameOffset=OM.MObject()
+	outOfRange=OM.MObject()
+	interpolation=OM.MObject()
+
+	def __init__(self) -> None :
+		OMA.MPxDeformerNode.__init__(self)
+
+	def deform(self,data_block,geom_iter,matrix,multi_index) :
+		envelope=data_block.inputValue(OMA.MPxDeformerNode.envelope).asFloat()
+		file_name=data_block.inputValue(PointBakeDeformer.cacheFile).asString()
+		if envelope == 0.0 or not file_name :
+			return
+		time=data_block.inputValue(PointBakeDeformer.time).asTime().value
+		offset=data_block.inputValue(PointBakeDeformer.frameOffset).asFloat()
+		mode=pointbake.OUT_OF_RANGE_MODES[data_block.inputValue(PointBakeDeformer.outOfRange).asShort()]
+		interpolation=pointbake.INTERPOLATIONS[data_block.inputValue(PointBakeDeformer.interpolation).asShort()]
+		try :
+			# the resampler is kept between evaluations so frames are not read again for the next time
+			resampler=_caches.resampler(file_name,interpolation,mode,offset)
+		except (OSError,ValueError) as error :
+			OM.MGlobal.displayWarning(f"pointBakeDeformer can't open {file_name} : {error}")
+			return
+		cache=resampler.source
+		# sub frame times, such as motion blur samples, are interpolated between the stored frames
+		points=resampler.at(time)
+		if points is None :
+			return
+		if geom_iter.count() != cache.header.num_verts :
+			OM.MGlobal.displayWarning(f"pointBakeDeformer {file_name} has {cache.header.num_verts} verts the mesh has {geom_iter.count()}")
+			return
+		# the cache is in world space so move it back into the object space of the geometry
+		points=np.asarray(points,dtype=np.float64)
+		world_to_object=_to_numpy(matrix.inverse())
+		current=np.array(geom_iter.allPositions(),dtype=np.float64).reshape(-1,4)[:,:3]
+		if pointbake.is_relative(cache.header) :
+			# relative caches are offsets from the rest mesh, which is the geometry coming into the deformer
+			points=current+points@world_to_object[:3,:3]
+		else :
+			points=points@world_to_object[:3,:3]+world_to_object[3,:3]
+		if envelope != 1.0 :
+			points=current+(points-current)*envelope
+		geom_iter.setAllPositions(OM.MPointArray(points.tolist()))
+
+
+def nodeCreator() :
+	return PointBakeDeformer()
+
+
+def nodeInitializer() :
+	typed=OM.MFnTypedAttribute()
+	unit=OM.MFnUnitAttribute()
+	numeric=OM.MFnNumericAttribute()
+	enum=OM.MFnEnumAttribute()
+	PointBakeDeformer.cacheFile=typed.create("cacheFile","cf",OM.MFnData.kString)
+	typed.usedAsFilename=True
+	PointBakeDeformer.time=unit.create("time","tm",OM.MFnUnitAttribute.kTime,0.0)
+	PointBakeDeformer.frameOffset=numeric.create("frameOffset","fo",OM.MFnNumericData.kFloat,0.0)
+	PointBakeDeformer.outOfRange=enum.create("outOfRange","oor",0)
+	for i,mode in enumerate(pointbake.OUT_OF_RANGE_MODES) :
+		enum.addField(mode,i)
+	PointBakeDeformer.interpolation=enum.create("interpolation","itp",0)
+	for i,interpolation in enumerate(pointbake.INTERPOLATIONS) :
+		enum.addField(interpolation,i)
+	output=OMA.MPxDeformerNode.outputGeom
+	for attribute in (PointBakeDeformer.cacheFile,PointBakeDeformer.time,PointBakeDeformer.frameOffset,
+										PointBakeDeformer.outOfRange,PointBakeDeformer.interpolation) :
+		PointBakeDeformer.addAttribute(attribute)
+		PointBakeDeformer.attributeAffects(attribute,output)
+
+
+def initializePlugin(mobject) :
+	plugin=OM.MFnPlugin(mobject,"NCCA","1.0","Any")
+	try :
+		plugin.registerNode(kPluginNodeName,kPluginNodeId,nodeCreator,nodeInitializer,OM.MPxNode.kDeformerNode)
+	except :
+		sys.stderr.write(f"Failed to register node: {kPluginNodeName}\n")
+		raise
+
+
+def uninitializePlugin(mobject) :
+	plugin=OM.MFnPlugin(mobject)
+	try :
+		plugin.deregisterNode(kPluginNodeId)
+		_caches.clear()
+	except :
+		sys.stderr.write(f"Failed to deregister node: {kPluginNodeName}\n")
+		raise
@@ -15,11 +15,14 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 import hou
-import xml.sax
+import numpy
 import os
 import shutil
 import sys
 
+import pointbake
+import pointbake.houdini
+
 """@package docstring
 This module will allow the selection of an obj file and a xml based NCCA Point bake file and
 load in point baked animation to a houdini scene. The user is prompted for a base node name
@@ -71,121 +74,91 @@ def GetAbsoluteFileName(title,wildCard,fileType) :
 	#now construct our new file name from the elements we've found
 	return "%s/%s" %(prefix,file[2])
 
-## \class ParseHandler
-## @brief a class to wrap the processing of the xml.sax parser, all of the methods are called
-## from this class however the class data is specific to the parsing process. In this case it is a
-## parser for the NCCA PointBake file format
-
-
-class ParseHandler(xml.sax.ContentHandler):
-
-	## @brief ctor for the class passing in the houdini channel we wish to load the
-	## PB data into
-	## @param[in] chan the channel that the parsed xml data should be loaded too
-	def init(self,chan):
-		## @brief the Character Data stored as part of parsing
-		self.mcharData=""
-		## @brief the mmeshName extracted from the PointBake file
-		self.mmeshName=""
-		## @brief number of vertices in the mesh, we will check this against the number of points in
-		## the mesh / obj loaded as a basic compatibility check
-		self.mnumVerts=0
-		## @brief the Start frame for the data loaded
-		self.mstartFrame=0
-		## @brief mendFrame of the data loaded
-		self.mendFrame=0
-		## @brief number of frames stored in file not used in this example
-		self.mnumFrames=0
-		## @brief the Channel used for assigning the data from the xml file passed to the parser
-		## when constructed
-		self.mchannel=chan
-		## @brief the Offset into the vertex list for the current data to be set too
-		self.moffset=None
-		## @brief the Current frame to be stored / keyed
-		self.mcurrentFrame=0
-
-
-	def del(self) :
-		hou.ui.setStatusMessage("Finished Import",hou.severityType.Message)
-
-	## @brief here we trigger events for the start elements In this case we grab the Offset and Frame
-	## @param[in] name the name of the tag to process
-	## @param[in] attrs the attribute associated with the current tag
-	def startElement(self, name, attrs):
-		# this is important the characters method may be called many times so we
-		# clear the char data each start element then append each time we read it
-		self.mcharData=""
-		# if we have a vertex start tag process and extract the offset
-		if name == "Vertex" :
-			self.moffset=int(attrs.get("number"))
-		# if we have the Frame we grab the number attribute
-		elif name == "Frame" :
-			hou.setFrame(int(attrs.get("number")))
-			self.mcurrentFrame=int(attrs.get("number"))
-
-	## @brief trigger method if we have data between the <> </> tags, copy it to the class mcharData so
-	## we can re-use it later
-	## \param[in] content the character string passed from the parser.
-	def characters(self,content):
-		# here we append the content data passed into the method, we need to append
-		# as this function may be called more than once if we have a long string
-		self.mcharData += content
-
-	## @brief most of the hard processing is done here. Once an end tag is encountered we
-	## process the current char data and add it to the channel created. This does
-	## rely on the order of the data but this is always machine generated so we should
-	## be safe if it does go wrong it will be this data ordering
-	## @brief[in] name the name of the end element tag
-	def endElement(self, name):
-		# extract the mmeshName and save it
-		if name == "MeshName":
-			self.mmeshName=self.mcharData
-		# get the number of vertices and set this to the channel
-		elif name == "NumVerts" :
-			# store value
-			self.mnumVerts=int(self.mcharData)
-
-			# now set the Channel to have this number of channels (may be large)
-			self.mchannel.parm("numchannels").set(self.mnumVerts)
-			# now we traverse all the elements and re-size to 3 and rename the data to a translate
-			# we need to change this later for other attribute types (rot etc etc)
-			for i in range(0,self.mnumVerts) :
-				channel.parm("size%d" %(i)).set(3)
-				channel.parm("name%d" %(i)).set("t")
-		# parse and sel the mstartFrame
-		elif name == "StartFrame" :
-			self.mstartFrame=int(self.mcharData)
-			self.mchannel.parm("start").set(self.mstartFrame)
-		## found an end frame value
-		elif name == "EndFrame" :
-			self.mendFrame=int(self.mcharData)
-			self.mchannel.parm("end").set(self.mendFrame)
-		## found the number of frames
-		elif name == "NumFrames" :
-			self.mnumFrames=int(self.mcharData)
-		## found the vertex
-		elif name =="Vertex" :
-			hou.ui.setStatusMessage("Processing Frame %d channel %d" %(self.mcurrentFrame,self.moffset),hou.severityType.Message)
-			self.mcharData=self.mcharData.strip()
-			data=self.mcharData.split(" ")
-			## now we check to see if there are enough values to parse
-			if len(data) == 3 :
-				houparmtuple = self.mchannel.parmTuple("value%d" %(self.moffset))
-				houkeyframe = hou.Keyframe()
-				houkeyframe.setExpression(str(data[0]), hou.exprLanguage.Hscript)
-				houparmtuple[0].setKeyframe(houkeyframe)
-				houkeyframe.setExpression(str(data[1]), hou.exprLanguage.Hscript)
-				houparmtuple[1].setKeyframe(houkeyframe)
-				houkeyframe.setExpression(str(data[2]), hou.exprLanguage.Hscript)
-				houparmtuple[2].setKeyframe(houkeyframe)
+########################################################################################################################
+##  @brief load the NCCA PointBake data into a channel, the file is read a frame at a time by the host independent
+##  pointbake reader. This does rely on the order of the data but this is always machine generated so we should
+##  be safe
+##  @param[in] chan the channel that the point bake data should be loaded too
+##  @param[in] fileName the xml file to load
+##  @param[in] rest the rest positions for relative files, normally the points of the obj loaded
+##  @param[in] profiler a pointbake.Profiler timing the read, parse and apply stages
+########################################################################################################################
+
+def LoadPointBake(chan,fileName,rest=None,profiler=None) :
+	profiler=profiler or pointbake.NULL_PROFILER
+	# the status message is only updated a few times a second as setting it costs more than keying a small mesh
+	def status(done,total) :
+		hou.ui.setStatusMessage("Processing Frame %d of %d" %(done,total),hou.severityType.Message)
+	with pointbake.PointBakeReader(fileName,rest=rest,profiler=profiler) as reader :
+		header=reader.header
+		# now set the Channel to have this number of channels (may be large)
+		chan.parm("numchannels").set(header.num_verts)
+		# now we traverse all the elements and re-size to 3 and rename the data to a translate
+		# we need to change this later for other attribute types (rot etc etc)
+		for i in range(0,header.num_verts) :
+			chan.parm("size%d" %(i)).set(3)
+			chan.parm("name%d" %(i)).set("t")
+		chan.parm("start").set(header.start_frame)
+		chan.parm("end").set(header.end_frame)
+		houkeyframe = hou.Keyframe()
+		progress=pointbake.Progress(status,header.num_frames)
+		# frames held from the one before only need keying at the end of the hold
+		for frame,points in pointbake.key_frames(reader) :
+			with profiler.stage("apply",frame) :
+				hou.setFrame(frame)
+				for offset,data in enumerate(points.tolist()) :
+					houparmtuple = chan.parmTuple("value%d" %(offset))
+					houkeyframe.setExpression(repr(data[0]), hou.exprLanguage.Hscript)
+					houparmtuple[0].setKeyframe(houkeyframe)
+					houkeyframe.setExpression(repr(data[1]), hou.exprLanguage.Hscript)
+					houparmtuple[1].setKeyframe(houkeyframe)
+					houkeyframe.setExpression(repr(data[2]), hou.exprLanguage.Hscript)
+					houparmtuple[2].setKeyframe(houkeyframe)
+			progress.update(frame-header.start_frame+1)
+	profiler.stop()
+	hou.ui.setStatusMessage("Finished Import",hou.severityType.Message)
+
+########################################################################################################################
+##  @brief create a Python SOP which reads the point positions for the current frame from the cache and sets them
+##  all in one go, nothing is keyed. The cache can be a .pbk file (memory mapped) or xml (read using the frame index)
+##  @param[in] geo the geo node to create the SOP in
+##  @param[in] fileNode the file SOP loading the obj, this is the input to the cache SOP
+##  @param[in] fileName the point bake file to play back
+##  @param[in] baseName the prefix for the node name
+##  @returns the Python SOP
+########################################################################################################################
+
+def CreateCacheSOP(geo,fileNode,fileName,baseName) :
+	# open the cache once here so the xml frame index is built before the first cook
+	with pointbake.open_cache(fileName) as cache :
+		header=cache.header
+	sop=geo.createNode("python")
+	sop.setName("%sPointBakeCache" %(baseName))
+	sop.setFirstInput(fileNode)
+	parms=sop.parmTemplateGroup()
+	parms.append(hou.StringParmTemplate(pointbake.houdini.CACHE_FILE_PARM,"Cache File",1,string_type=hou.stringParmType.FileReference))
+	parms.append(hou.FloatParmTemplate(pointbake.houdini.FRAME_OFFSET_PARM,"Frame Offset",1))
+	parms.append(hou.MenuParmTemplate(pointbake.houdini.OUT_OF_RANGE_PARM,"Out Of Range",pointbake.OUT_OF_RANGE_MODES))
+	parms.append(hou.MenuParmTemplate(pointbake.houdini.INTERPOLATION_PARM,"Interpolation",pointbake.INTERPOLATIONS))
+	sop.setParmTemplateGroup(parms)
+	sop.parm(pointbake.houdini.CACHE_FILE_PARM).set(fileName)
+	sop.parm("python").set(pointbake.houdini.SOP_CODE)
+	hou.playbar.setFrameRange(header.start_frame,header.start_frame+header.num_frames-1)
+	return sop
 
 
 objectFile=GetAbsoluteFileName("Select Object File","*.obj",hou.fileType.Geometry)
 if(objectFile==None) :
     sys.exit()
-bakeFile=GetAbsoluteFileName("Select Bake File","*.xml",hou.fileType.Any)
+bakeFile=GetAbsoluteFileName("Select Bake File","*.xml *.pbk",hou.fileType.Any)
 if(bakeFile==None) :
     sys.exit()
+## @brief check the files go together before creating any nodes, only the obj vertices and the first frame are read
+try :
+	pointbake.check_obj(objectFile,bakeFile)
+except ValueError as error :
+	if hou.ui.displayMessage("Files do not match\n%s" %(error),buttons=("Cancel","Import Anyway"),default_choice=0) == 0 :
+		sys.exit()
 
 ## @brief baseName is used to store the prefix name used for all created nodes
 baseName=hou.ui.readInput("Enter Base Node Name")
@@ -200,27 +173,32 @@ geo.setName("%sObjectImport" %(baseName))
 ## @brief grab our file node so we can set the correct file name
 file=hou.node('/obj/%sObjectImport/file1' %(baseName))
 file.parm("file").set(objectFile)
-## @brief  now create a chopnet for this geo and attach the channel
-chopnet=geo.createNode("chopnet")
-chopnet.setName("%sBakeChannel" %(baseName))
-## @brief now we create our channel in the chop net this will be modified by the parser
-channel=chopnet.createNode("channel")
-## @brief due to the way the data is created we need to have a re-name node to change the format
-rename=chopnet.createNode("rename")
-rename.parm("renamefrom").set("?[xyz]")
-rename.parm("renameto").set("t[xyz]0")
-rename.setName("%sRename" %(baseName))
-rename.setFirstInput(channel)
-channel.setName("%sImportData" %(baseName))
-## @brief the geoChan node is used to link the channel in the chopnet to the geo
-geoChan=geo.createNode("channel");
-geoChan.parm("choppath").set("/obj/%sObjectImport/%sBakeChannel/%sRename" %(baseName,baseName,baseName))
-geoChan.parm("chanscope").set("t[xyz]")
-geoChan.parm("method").set(1)
-# now connect the channel to the file node
-geoChan.setFirstInput(file)
-geoChan.setDisplayFlag(True)
-
-parser = xml.sax.makeparser()
-parser.setContentHandler(ParseHandler(channel))
-parser.parse(open(bakeFile,"r"))
\ No newline at end of file
+## @brief the cache SOP streams the data from disk, the chop import keys every vertex into a channel
+importMode=hou.ui.displayMessage("Select the import mode",buttons=("Cache SOP","CHOP Keyframes"),default_choice=0)
+if importMode == 0 :
+	cacheSop=CreateCacheSOP(geo,file,bakeFile,baseName)
+	cacheSop.setDisplayFlag(True)
+else :
+	## @brief  now create a chopnet for this geo and attach the channel
+	chopnet=geo.createNode("chopnet")
+	chopnet.setName("%sBakeChannel" %(baseName))
+	## @brief now we create our channel in the chop net this will be modified by the parser
+	channel=chopnet.createNode("channel")
+	## @brief due to the way the data is created we need to have a re-name node to change the format
+	rename=chopnet.createNode("rename")
+	rename.parm("renamefrom").set("?[xyz]")
+	rename.parm("renameto").set("t[xyz]0")
+	rename.setName("%sRename" %(baseName))
+	rename.setFirstInput(channel)
+	channel.setName("%sImportData" %(baseName))
+	## @brief the geoChan node is used to link the channel in the chopnet to the geo
+	geoChan=geo.createNode("channel");
+	geoChan.parm("choppath").set("/obj/%sObjectImport/%sBakeChannel/%sRename" %(baseName,baseName,baseName))
+	geoChan.parm("chanscope").set("t[xyz]")
+	geoChan.parm("method").set(1)
+	# now connect the channel to the file node
+	geoChan.setFirstInput(file)
+	geoChan.setDisplayFlag(True)
+	# relative files are offsets from the obj points
+	rest=numpy.array(file.geometry().pointFloatAttribValues("P")).reshape(-1,3)
+	LoadPointBake(channel,bakeFile,rest)
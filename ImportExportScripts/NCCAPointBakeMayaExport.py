@@ -15,105 +15,155 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import argparse
 import math
+import os
+import re
 import sys
-from typing import TextIO
 
 import maya.cmds as cmds
 import maya.OpenMaya as OM
 import maya.OpenMayaAnim as OMA
 import maya.OpenMayaMPx as OMX
+import maya.api.OpenMaya as OM2
+import numpy as np
 
+import pointbake
 
-def write_data(file : TextIO ,n_tabs : int ,data : str) -> None :
-	""" write out to xml file with correct tabs
+
+def get_world_points(mesh : OM2.MFnMesh) -> np.ndarray :
+	"""get all of the world space vertex positions of a mesh in one call
 	Parameters :
-		file (TextIO) the file pointer to write data too
-		n_tabs (int) number of tabs to write before the data
-		data (str) the actual data to write out to the file
+		mesh (MFnMesh) the api 2.0 mesh function set, this must be attached to a dag path for world space
+	Returns :
+		ndarray [num_verts,3] array of positions
 	"""
-	file.write("\t"*n_tabs)
-	file.write(data)
-	file.write("\n")
+	# getPoints fetches the whole mesh in one api call, the MPointArray has no buffer interface so numpy still
+	# converts it one MPoint at a time in python
+	return np.array(mesh.getPoints(OM2.MSpace.kWorld),dtype=np.float64).reshape(-1,4)[:,:3]
 
-def NCCAPointBake(file_name : str,name : str ,start_frame : float ,end_frame : float) -> None :
+def get_mesh(name : str) -> OM2.MFnMesh :
+	"""get the mesh function set for a transform, attached to the dag path so points can be queried in world space
+	Parameters :
+		name (str) name of the transform
+	Returns :
+		MFnMesh the api 2.0 mesh or None if the transform doesn't have a mesh
+	"""
+	selected = OM2.MSelectionList()
+	selected.add(name)
+	path=selected.getDagPath(0)
+	# get the parent transform
+	fn = OM2.MFnTransform(path)
+	oChild = fn.child(0)
+	# check to see if what we have is a mesh
+	if(oChild.apiTypeStr=="kMesh") :
+		path.extendToShape()
+		return OM2.MFnMesh(path)
+	print (f"{name} Didn't get mesh  {oChild.apiTypeStr}")
+	return None
+
+def NCCAPointBake(file_name : str,name : str ,start_frame : float ,end_frame : float,float_format : str=None,
+									relative : bool=False,tolerance : float=0.0) -> None :
 	"""function to extract and write out the xml data to a file, we don't use any XML lib so there is no real check for correct formatting of the data, be carful!
 	Parameters :
 		file_name (str) the file name to open
 		name (srt) name of the mesh selected
 		start_frame (float)  the start frame for the export
 		end_frame (float)  the end frame for the export
+		float_format (str) printf style format for the vertex values e.g. "%.6g" for smaller files, None is full precision
+		relative (bool) write offsets from the rest mesh (the mesh at the start frame, so export the obj at this frame)
+		tolerance (float) when relative vertices which have moved less than this are not written
 	"""
-	# grab the selected object
-	selected = OM.MSelectionList()
-	obj=OM.MObject( )
-	selected.add(name)
-	selected.getDependNode(0,obj)
-	# get the parent transform
-	fn = OM.MFnTransform(obj)
-	Mesh=""
-	oChild = fn.child(0)
-	# check to see if what we have is a mesh
-	if(oChild.apiTypeStr()=="kMesh") :
-		print ("got Mesh")
-		# get our mesh
-		Mesh=OM.MFnMesh(oChild)
-	else :
-		print (f"Didn't get mesh  {oChild.apiType()}")
+	NCCAPointBakeBatch([str(file_name[0])],[name],start_frame,end_frame,float_format,relative,tolerance)
+
+def NCCAPointBakeBatch(file_names : list,names : list,start_frame : float ,end_frame : float,float_format : str=None,
+											 relative : bool=False,tolerance : float=0.0,queue_frames : int=pointbake.threaded.DEFAULT_QUEUE_FRAMES,
+											 hold_tolerance : float=None,precision : str=None,profiler : pointbake.Profiler=None,
+											 progress=None,rest_frame : float=None,resume : bool=False) -> None :
+	"""export several meshes in one pass over the timeline, each frame is evaluated once and every mesh
+	sampled at that frame is streamed to its own file. A .pbk file name writes the binary format
+	Parameters :
+		file_names (list) the file to write for each mesh
+		names (list) the names of the meshes to export
+		start_frame (float)  the start frame for the export
+		end_frame (float)  the end frame for the export
+		float_format (str) printf style format for the xml vertex values, None is full precision
+		relative (bool) write offsets from the rest mesh (the mesh at the start frame, so export the obj at this frame)
+		tolerance (float) when relative vertices which have moved less than this are not written
+		queue_frames (int) frames per mesh which can wait to be written while the next frame is evaluated, 0 writes
+		on this thread
+		hold_tolerance (float) frames within this of the last one written are stored as a reference to it, 0 only
+		holds identical frames and None writes every frame. Held frames, like the sparse frames of relative files, are
+		only read by pointbake and not by ngl::NCCAPointBake, so leave both off for files the C++ viewers will load
+		precision (str) float16, float32 or float64, the .pbk storage type or the precision xml values are rounded to.
+		None stores the full values, float64 for .pbk
+		profiler (Profiler) time the evaluate, fetch, format and write stages, profiler.report() then shows
+		where the time went
+		progress (callable) called with (frames done,total frames) at most every half second, None prints the frame
+		rest_frame (float) the frame relative offsets are taken from, None is the start frame. When a shot is
+		exported in segments (pointbake.split_frames) every segment must use the shot's first frame
+		resume (bool) carry on an export which was stopped or crashed from the last frame each file has, files
+		which don't exist yet are started from the beginning
+	"""
+	meshes=[get_mesh(name) for name in names]
+	if any(mesh is None for mesh in meshes) :
 		return
-
-	with open(str(file_name[0]),'w') as file :
-		current_frame=OM.MTime()
-		anim=OMA.MAnimControl()
-		# as these can take time to process we have an interupter to allow for the process to be
-		# stopped
-		interupter=OM.MComputation()
-		# set the start of the heavy computation
-		interupter.beginComputation()
-		# now we set the tab level to 0 for the initial write to the file
-		tab_indent=0
-
-		# now we get the mesh number of points
-		num_points = cmds.polyEvaluate( name, v=True)
-		# write the xml headers
-		file.write("<?xml version=\"1.0\" encoding=\"UTF-8\" ?>\n")
-		file.write("<NCCAPointBake>\n")
-		# up the tab level
-		tab_indent=tab_indent+1
-		# write the initial header data
-		write_data(file,tab_indent,f"<MeshName> {name} </MeshName>")
-		write_data(file,tab_indent,f"<NumVerts> {num_points} </NumVerts>")
-		write_data(file,tab_indent,f"<StartFrame> {start_frame} </StartFrame>" )
-		write_data(file,tab_indent,f"<EndFrame> {end_frame} </EndFrame>" )
-		write_data(file,tab_indent,f"<NumFrames> {end_frame-start_frame} </NumFrames>" )
-		write_data(file,tab_indent,f"<TranslateMode> absolute </TranslateMode>" )
-
+	print (f"got {len(meshes)} Mesh")
+	profiler=profiler or pointbake.NULL_PROFILER
+	# printing every frame costs more than exporting a small mesh so the progress is throttled
+	progress=pointbake.Progress(progress or (lambda done,total : print (f"Exported {done} of {total} frames")),
+															end_frame-start_frame)
+	current_frame=OM.MTime()
+	anim=OMA.MAnimControl()
+	# as these can take time to process we have an interupter to allow for the process to be
+	# stopped
+	interupter=OM.MComputation()
+	# set the start of the heavy computation
+	interupter.beginComputation()
+	# for relative files the offsets are taken from the meshes at the rest frame
+	rests=[0.0]*len(meshes)
+	if relative :
+		current_frame.setValue(start_frame if rest_frame is None else rest_frame)
+		anim.setCurrentTime(current_frame)
+		rests=[get_world_points(mesh) for mesh in meshes]
+	writers=[]
+	try :
+		for file_name,name,mesh in zip(file_names,names,meshes) :
+			header=pointbake.PointBakeHeader(name,mesh.numVertices,start_frame,end_frame,end_frame-start_frame,
+																			 "relative" if relative else "absolute")
+			# the writer writes the header for us
+			writer=pointbake.open_writer(file_name,header,precision,float_format=float_format,tolerance=tolerance,stats=True,
+																	 hold_tolerance=hold_tolerance,profiler=profiler,resume=resume)
+			# the writing is done on another thread so we can go on and evaluate the next frame
+			writers.append(pointbake.ThreadedWriter(writer,queue_frames) if queue_frames > 0 else writer)
+		# a resumed export only steps the timeline from the earliest frame a file still needs
+		first_frame=min(writer.next_frame for writer in writers)
+		if first_frame > start_frame :
+			print (f"resuming from frame {first_frame}")
 		# now for every frame write out the vertex data
-		for frame in range(start_frame,end_frame) :
-			print (f"Doing frame {frame:04d}") 
-			# move to the correct frame
-			current_frame.setValue (frame)
-			anim.setCurrentTime(current_frame)
-			# write out the frame tag
-			write_data(file,tab_indent,f'<Frame number="{frame}">' )
-			tab_indent+=1
-			for vertex in range(0,num_points) :
-				# now the actual vertex data for the current mesh index value
-				data = cmds.xform( (name+ ".vtx["+str(vertex)+"]"), q=True, ws=True, t=True )
-				write_data(file,tab_indent,f'<Vertex number="{vertex}" attrib="translate"> {data[0]} {data[1]} {data[2]} </Vertex>')
-			# now un-indent as we have ended the frame
-			tab_indent-=1
-			write_data(file,tab_indent,"</Frame>")
-			# if we have interupted exit and finish
+		for frame in range(first_frame,end_frame) :
+			# move to the correct frame, this is the expensive scene evaluation so we only do it once
+			with profiler.stage("evaluate",frame) :
+				current_frame.setValue (frame)
+				anim.setCurrentTime(current_frame)
+			# grab all the points for each mesh at once and write them out
+			for writer,mesh,rest in zip(writers,meshes,rests) :
+				if frame < writer.next_frame :
+					continue
+				with profiler.stage("fetch",frame) :
+					points=get_world_points(mesh)-rest
+				writer.write_frame(frame,points)
+			progress.update(frame-start_frame+1)
+			# if we have interupted exit and finish, the writers are closed below which writes the frames
+			# already captured, the file trailer and the frame counts so the export can be resumed
 			if interupter.isInterruptRequested()  :
-				file.write("</NCCAPointBake>\n")
-				file.close()
-				print ("File export interrupted ")
-				return
-		# now finish
-		file.write("</NCCAPointBake>\n")
-		# and close the file
-		file.close()
+				print (f"File export interrupted after frame {frame}, export again with resume to carry on")
+				break
+	finally :
+		for writer in writers :
+			writer.close()
+		interupter.endComputation()
+		profiler.stop()
 
 
 class PointBakeExport() :
@@ -127,9 +177,8 @@ class PointBakeExport() :
 		selected.getSelectionStrings(self.selectedObjects)
 		if len(self.selectedObjects) == 0 :
 			cmds.confirmDialog( title='No objects Selected', message='Select a Mesh Object', button=['Ok'], defaultButton='Ok', cancelButton='Ok', dismissString='Ok' )
-		elif len(self.selectedObjects) > 1 :
-			cmds.confirmDialog( title='Select One Object', message='Only One Mesh may be exported at a time', button=['Ok'], defaultButton='Ok', cancelButton='Ok', dismissString='Ok' )
-		# now we have the correct criteria we can proceed with the export
+		# now we have the correct criteria we can proceed with the export, several meshes are
+		# exported in one pass to a file each
 		else :
 			# get the start and end values for our UI sliders
 			anim=OMA.MAnimControl()
@@ -145,21 +194,38 @@ class PointBakeExport() :
 			# changes
 			self.startSlider=cmds.intSliderGrp( changeCommand=self.startChanged,field=True, label='Start Frame', minValue=self.start, maxValue=self.end, fieldMinValue=self.start, fieldMaxValue=self.end, value=self.start )
 			self.endSlider=cmds.intSliderGrp( changeCommand=self.endChanged ,field=True, label='End Frame', minValue=self.start, maxValue=self.end, fieldMinValue=self.end, fieldMaxValue=self.end, value=self.end )
+			# the precision the values are stored at, float16 halves the size again for background meshes
+			self.precisionMenu=cmds.optionMenu( label='Precision' )
+			for item in ("Default",)+tuple(pointbake.PRECISIONS) :
+				cmds.menuItem( label=item )
+			# carry on an export which was stopped or crashed rather than starting again
+			self.resumeCheck=cmds.checkBox( label='Resume Interrupted Export', value=False )
 			# create a button and add the method called when pressed
 			cmds.button( label='Export', command=self.export )
 			# finally show the window
 			cmds.showWindow( self.window )
 
 	def export(self,*args) :
-		# get the file name to save too
-		basicFilter = "*.xml"
-		file=cmds.fileDialog2(caption="Please select file to save",fileFilter=basicFilter, dialogStyle=2)
+		# get the file name to save too, for more than one mesh we ask for a directory and
+		# name the files after the meshes
+		if len(self.selectedObjects) == 1 :
+			basicFilter = "PointBake (*.xml *.pbk)"
+			file=cmds.fileDialog2(caption="Please select file to save",fileFilter=basicFilter, dialogStyle=2)
+		else :
+			file=cmds.fileDialog2(caption="Please select directory to save to",fileMode=3, dialogStyle=2)
 		# check we get a filename and then save
-		if file !="" :
+		if file :
 			if self.start >= self.end :
 				cmds.confirmDialog( title='Range Error', message='start >= end', button=['Ok'], defaultButton='Ok', cancelButton='Ok', dismissString='Ok' )
 			else :
-				NCCAPointBake(file,self.selectedObjects[0],self.start,self.end)
+				if len(self.selectedObjects) == 1 :
+					file_names=[str(file[0])]
+				else :
+					file_names=[os.path.join(str(file[0]),re.sub(r"[|:]","_",name.strip("|"))+".xml") for name in self.selectedObjects]
+				precision=cmds.optionMenu(self.precisionMenu,query=True,value=True)
+				NCCAPointBakeBatch(file_names,self.selectedObjects,self.start,self.end,
+													 precision=None if precision == "Default" else precision,
+													 resume=cmds.checkBox(self.resumeCheck,query=True,value=True))
 				# finally remove the export window
 				cmds.deleteUI( self.window, window=True )
 
@@ -171,21 +237,45 @@ class PointBakeExport() :
 		self.end=args[0]
 
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+def main(argv : list=None) -> int :
+	"""bake one frame range segment of a scene without the UI, so a long shot can be split over several
+	machines and the segments joined with python -m pointbake merge. Run with mayapy e.g.
+		mayapy NCCAPointBakeMayaExport.py shot.mb --mesh pSphere1 --start 101 --end 201 -o shot.pbk
+	writes shot.0101-0201.pbk
+	Parameters :
+		argv (list) the arguments, sys.argv is used if None
+	Returns :
+		int the exit status
+	"""
+	import maya.standalone
+	parser=argparse.ArgumentParser(description="bake a frame range of a mesh to a PointBake segment")
+	parser.add_argument("scene",help="the maya scene to open")
+	parser.add_argument("--mesh",required=True,help="the transform of the mesh to export")
+	parser.add_argument("--start",type=int,required=True,help="first frame of the segment")
+	parser.add_argument("--end",type=int,required=True,help="end frame of the segment (exclusive)")
+	parser.add_argument("-o","--output",required=True,help="the whole shot's file name, the frame range is added to it")
+	parser.add_argument("--relative",action="store_true",help="write offsets from the rest frame")
+	parser.add_argument("--rest-frame",type=int,help="the frame offsets are taken from, this must be the shot's first frame")
+	parser.add_argument("--precision",choices=tuple(pointbake.PRECISIONS))
+	parser.add_argument("--hold-tolerance",type=float,help="store frames within this of the one before as a reference, only pointbake reads these "
+											"(not ngl::NCCAPointBake)")
+	parser.add_argument("--resume",action="store_true",help="carry on from the last frame of a segment which was stopped")
+	args=parser.parse_args(argv)
+	if args.relative and args.rest_frame is None :
+		print ("--rest-frame is needed for relative segments so they all share the shot's rest pose")
+		return 1
+	maya.standalone.initialize(name="python")
+	try :
+		cmds.file(args.scene,open=True,force=True)
+		file_name=pointbake.segment_file_name(args.output,args.start,args.end)
+		NCCAPointBakeBatch([file_name],[args.mesh],args.start,args.end,relative=args.relative,
+											 hold_tolerance=args.hold_tolerance,precision=args.precision,rest_frame=args.rest_frame,
+											 resume=args.resume)
+		print (f"wrote {file_name}")
+	finally :
+		maya.standalone.uninitialize()
+	return 0
+
+
+if __name__ == "__main__" :
+	sys.exit(main())
@@ -16,13 +16,20 @@
 """
 
 import math
+import os
 import sys
-import xml.sax
 
 import maya.cmds as cmds
 import maya.OpenMaya as OM
 import maya.OpenMayaAnim as OMA
 import maya.OpenMayaMPx as OMX
+import maya.api.OpenMaya as OM2
+import numpy as np
+
+import pointbake
+
+## the plugin providing the pointBakeDeformer node, this lives next to this script
+PLUGIN_FILE = "NCCAPointBakeDeformer.py"
 
 """@package docstring
 This module will allow the selection of an obj file and a xml based NCCA Point bake file and
@@ -39,132 +46,92 @@ which is pre-pended to all elements create in the loading process,
 
 
 
-class ParseHandler(xml.sax.ContentHandler):
-	"""wrap the processing of the xml.sax parser, all of the methods are called
-	from this class however the class data is specific to the parsing process. In this case it is a
-	parser for the NCCA PointBake file format
+class PointBakeLoader() :
+	"""load the frames from a NCCA PointBake file onto a mesh, the file is read with the host independent
+	pointbake reader which yields a whole frame of vertex data at a time
 	"""
 	def __init__(self,selected_text : str )-> None :
-		"""constructor for parser passes in the correct text to be processed
+		"""constructor for the loader passes in the mesh to be processed
 		Parameters :
 			 selected_text (str) the mesh the data is to be loaded too
 		"""
 		##  the object selected to load the data too.
 		self.selected_object=selected_text
-		##  the Character Data stored as part of parsing
-		self.char_data=""
-		##  the meshname extracted from the PointBake file
-		self.meshname=""
-		##  number of vertices in the mesh, we will check this against the number of points in
-		## the mesh / obj loaded as a basic compatibility check
-		self.num_verts=0
-		##  the Start frame for the data loaded
-		self.start_frame=0
-		##  end_frame of the data loaded
-		self.end_frame=0
-		##  number of frames stored in file not used in this example
-		self.num_frames=0
-		##  the Offset into the vertex list for the current data to be set too
-		self.offset=None
-		##  the Current frame to be stored / keyed
-		self.current_frame=0
 		# the maya time control
 		self.m_anim=OMA.MAnimControl()
-		# a point array structure, we will load each frame's worth of data into this then
-		# load it to the mesh point data each frame, once this is done we need to clear this data for
-		# the next frame
-		self.vert_data=OM.MFloatPointArray()
-		# grab the object ready to set the point data
-		selected = OM.MSelectionList()
-		obj=OM.MObject()
-		print(f"Debug {self.selected_object=}")
-		print(f"Debug {type(self.selected_object)}")
+		# grab the object ready to set the point data, the api 2.0 mesh takes and gives whole point arrays
+		# so no python loop over the vertices is needed
+		selected = OM2.MSelectionList()
 		selected.add(self.selected_object)
-		selected.getDependNode(0,obj)
+		obj=selected.getDependNode(0)
 
-		fn = OM.MFnTransform(obj)
+		fn = OM2.MFnTransform(obj)
 		self.mesh=""
 		oChild = fn.child(0)
 
-		if(oChild.apiTypeStr()=="kMesh") :
+		if(oChild.apiTypeStr=="kMesh") :
 			print ("got Mesh")
 			# get our mesh
-			self.mesh=OM.MFnMesh(oChild)
-		# set the frame to start
+			self.mesh=OM2.MFnMesh(oChild)
+
+	def rest_points(self) -> np.ndarray :
+		"""
+		Returns :
+			ndarray [num_verts,3] the points of the mesh before any data is loaded
+		"""
+		return np.array(self.mesh.getPoints(),dtype=np.float64).reshape(-1,4)[:,:3]
 
+	def load(self,file_name : str,profiler : pointbake.Profiler=None) -> None :
+		"""read the PointBake file and key each frame onto the mesh
+		Parameters :
+			file_name (str) the xml or pbk file to load
+			profiler (Profiler) time the read, parse and apply stages
+		"""
+		profiler=profiler or pointbake.NULL_PROFILER
+		# relative files are offsets from the mesh we imported
+		rest=self.rest_points()
+		if file_name.lower().endswith(".pbk") :
+			reader=pointbake.BinaryPointBake(file_name,rest,profiler=profiler)
+		else :
+			reader=pointbake.PointBakeReader(file_name,rest=rest,profiler=profiler)
+		with reader :
+			header=reader.header
+			progress=pointbake.Progress(lambda done,total : print (f"Imported frame {done} of {total}"),header.num_frames)
+			# set the time control to the start of the data
+			self.m_anim.setMinTime(OM.MTime(header.start_frame))
+			# frames held from the one before only need keying at the end of the hold
+			for frame,points in pointbake.key_frames(reader) :
+				with profiler.stage("apply",frame) :
+					self.m_anim.setCurrentTime(OM.MTime(frame))
+					# set the whole frame as the point positions of our mesh in one call
+					self.mesh.setPoints(OM2.MPointArray(points.tolist()))
+					# once we have done this we can set this as a keyframe
+					cmds.setKeyframe(breakdown=0, hierarchy="none",controlPoints=0 ,shape=0,attribute="vtx[*]")
+				progress.update(frame-header.start_frame+1)
+		profiler.stop()
+		print ("done")
 
-	def __del__(self) :
+	def attach_deformer(self,file_name : str) -> str :
+		"""rather than keying the data attach a pointBakeDeformer which reads the cache at the current
+		time, nothing is keyed so the import is instant
+		Parameters :
+			file_name (str) the xml or pbk file to play back
+		Returns :
+			str the name of the deformer node created
+		"""
+		# open the cache once here, for xml this builds the frame index so the first evaluation is fast
+		with pointbake.open_cache(file_name) as cache :
+			header=cache.header
+		if not cmds.pluginInfo(PLUGIN_FILE,query=True,loaded=True) :
+			cmds.loadPlugin(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(pointbake.__file__))),PLUGIN_FILE))
+		node=cmds.deformer(self.selected_object,type="pointBakeDeformer")[0]
+		cmds.setAttr(f"{node}.cacheFile",file_name,type="string")
+		cmds.connectAttr("time1.outTime",f"{node}.time")
+		# set the time control to the range of the data
+		self.m_anim.setMinTime(OM.MTime(header.start_frame))
+		self.m_anim.setMaxTime(OM.MTime(header.start_frame+header.num_frames-1))
 		print ("done")
-	##  here we trigger events for the start elements In this case we grab the Offset and Frame
-	## @param[in] name the name of the tag to process
-	## @param[in] attrs the attribute associated with the current tag
-	def startElement(self, name, attrs):
-		# this is important the characters method may be called many times so we
-		# clear the char data each start element then append each time we read it
-		self.char_data=""
-		# if we have a vertex start tag process and extract the offset
-		if name == "Vertex" :
-			self.offset=int(attrs.get("number"))
-		# if we have the Frame we grab the number attribute
-		elif name == "Frame" :
-			# set the frame here
-			self.current_frame=int(attrs.get("number"))
-			self.m_anim.setCurrentTime(OM.MTime(self.current_frame))
-			# we have a new frame so re-set the vertexPoint data ready to be filled
-			# with the new dara
-			self.vert_data.clear()
-
-	##  trigger method if we have data between the <> </> tags, copy it to the class char_data so
-	## we can re-use it later
-	## @param[in] _content the character string passed from the parser.
-	def characters(self,content):
-		# here we append the content data passed into the method, we need to append
-		# as this function may be called more than once if we have a long string
-		self.char_data += content
-
-	##  most of the hard processing is done here. Once an end tag is encountered we
-	## process the current char data and add it to the channel created. This does
-	## rely on the order of the data but this is always machine generated so we should
-	## be safe if it does go wrong it will be this data ordering
-	## [in] name the name of the end element tag
-	def endElement(self, name):
-		# extract the meshname and save it
-		if name == "MeshName":
-			self.meshname=self.char_data
-		# get the number of vertices and set this to the channel
-		elif name == "NumVerts" :
-			# store value
-			self.num_verts=int(self.char_data)
-
-		# parse and sel the start_frame
-		elif name == "StartFrame" :
-			self.start_frame=int(self.char_data)
-			# set the time control to this value
-			self.m_anim.setMinTime(OM.MTime(self.start_frame))
-		## found an end frame value
-		elif name == "EndFrame" :
-			self.end_frame=int(self.char_data)
-			# set the end animation time
-
-		## found the number of frames
-		elif name == "NumFrames" :
-			self.num_frames=int(self.char_data)
-		## found the vertex
-		elif name =="Vertex" :
-			self.char_data=self.char_data.strip()
-			data=self.char_data.split(" ")
-			## now we check to see if there are enough values to parse
-			if len(data) == 3 :
-				# append the vertex data to the array for later loading into the mesh
-				self.vert_data.append(float(data[0]),float(data[1]),float(data[2]))
-		elif name=="Frame" :
-			# now we have the end of the frame we should have all the vertex data in the array
-			# so we can set this point position for our mesh
-			self.mesh.setPoints(self.vert_data)
-			# once we have done this we can set this as a keyframe
-			cmds.setKeyframe(breakdown=0, hierarchy="none",controlPoints=0 ,shape=0,attribute="vtx[*]")
-			# now we clear the point data ready for the next frame to load hte data in
-			self.vert_data.clear()
+		return node
 
 
 
@@ -181,12 +148,24 @@ def PointBakeImport() :
 		text = cmds.promptDialog(query=True, text=True)
 		# now get the obj file to import
 		obj_filename=cmds.fileDialog2(caption="Please select obj file to import",fileFilter="*.obj", fm=1)
+		# now the point bake file
+		basicFilter = "PointBake (*.xml *.pbk)"
+		pointbake_file=cmds.fileDialog2(caption="Please select point bake file to import",fileFilter=basicFilter, fm=1)
+		# check the files go together before doing any work, this only reads the obj vertices and the
+		# first frame of the cache
+		try :
+			pointbake.check_obj(str(obj_filename[0]),str(pointbake_file[0]))
+		except ValueError as error :
+			answer=cmds.confirmDialog(title='Files do not match',message=f'{error}',button=['Import Anyway','Cancel'],
+			defaultButton='Cancel',cancelButton='Cancel',dismissString='Cancel')
+			if answer != 'Import Anyway' :
+				return
 
 		cmds.file(obj_filename,i=True,type="OBJ",ns=text,mergeNamespacesOnClash=True)
 		cmds.refresh()
-		# now the xml file
-		basicFilter = "*.xml"
-		pointbake_file=cmds.fileDialog2(caption="Please select xml file to import",fileFilter=basicFilter, fm=1)
+		# a deformer streams the data from the cache, keyframe bakes every vertex into the scene
+		mode=cmds.confirmDialog(title='Import Mode',message='Play back from the cache or key every frame?',
+		button=['Deformer','Keyframe'],defaultButton='Deformer',cancelButton='Keyframe',dismissString='Keyframe')
 		# select the object imported
 		print(f"Selecting {text}:*")
 		cmds.select(f"{text}:*")
@@ -197,10 +176,11 @@ def PointBakeImport() :
 		
 	
 		print(f"Debug {name=}")
-		# and pass control back to the parser
-		parser = xml.sax.make_parser()
-		print(f"Debug -> calling with {name=}")
-		parser.setContentHandler(ParseHandler(f"{name[0]}"))
-		parser.parse(open(str(pointbake_file[0]),"r"))
+		# and pass control to the loader
+		loader=PointBakeLoader(f"{name[0]}")
+		if mode == 'Deformer' :
+			loader.attach_deformer(str(pointbake_file[0]))
+		else :
+			loader.load(str(pointbake_file[0]))
 
 PointBakeImport()
\ No newline at end of file
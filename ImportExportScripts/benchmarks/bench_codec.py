@@ -0,0 +1,92 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Measure the compression ratio and the encode / decode throughput of the .pbk codec settings on a
+synthetic cache, a mesh with a wave running over part of it.
+
+	python benchmarks/bench_codec.py --verts 50000 --frames 96
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pointbake
+
+## the settings compared, (delta,quantize,compressor)
+SETTINGS = (
+	("none",False,"none"),
+	("none",False,"zlib"),
+	("previous",False,"zlib"),
+	("rest",False,"zlib"),
+	("previous",True,"zlib"),
+	("rest",True,"zlib"),
+	("previous",True,"lzma"),
+)
+
+
+def synthetic_frames(num_verts : int,num_frames : int,seed : int=0) -> np.ndarray :
+	"""a grid of points where a wave moves over the first third of the mesh"""
+	rng=np.random.default_rng(seed)
+	rest=rng.uniform(-10.0,10.0,(num_verts,3)).astype(np.float32)
+	frames=np.repeat(rest[np.newaxis],num_frames,axis=0)
+	moving=num_verts//3
+	for frame in range(num_frames) :
+		frames[frame,:moving,1]+=np.sin(rest[:moving,0]*0.5+frame*0.2).astype(np.float32)
+	return frames
+
+
+def main() -> None :
+	parser=argparse.ArgumentParser(description="benchmark the pbk compression codecs")
+	parser.add_argument("--verts",type=int,default=50000,help="number of vertices in the mesh")
+	parser.add_argument("--frames",type=int,default=96,help="number of frames in the cache")
+	parser.add_argument("--chunk-frames",type=int,default=16,help="frames in each compressed chunk")
+	args=parser.parse_args()
+
+	frames=synthetic_frames(args.verts,args.frames)
+	raw_size=frames.nbytes
+	header=pointbake.PointBakeHeader("bench",args.verts,0,args.frames,args.frames)
+	print(f"{args.verts} verts {args.frames} frames {raw_size/1e6:.1f}MB raw")
+	print(f"{'delta':>9} {'quant':>5} {'comp':>5} {'ratio':>7} {'encode MB/s':>12} {'decode MB/s':>12} {'max error':>10}")
+	with tempfile.TemporaryDirectory() as tmp :
+		file_name=os.path.join(tmp,"bench.pbk")
+		for delta,quantize,compressor in SETTINGS :
+			codec=pointbake.Codec(delta,quantize,None,compressor,None,args.chunk_frames)
+			start=time.perf_counter()
+			with pointbake.BinaryPointBakeWriter(file_name,header,np.float32,codec) as writer :
+				for frame in range(args.frames) :
+					writer.write_frame(frame,frames[frame])
+			encode=time.perf_counter()-start
+			size=os.path.getsize(file_name)
+			with pointbake.BinaryPointBake(file_name) as cache :
+				start=time.perf_counter()
+				decoded=[points for _,points in cache]
+				decode=time.perf_counter()-start
+			error=float(np.abs(np.stack(decoded)-frames).max())
+			print(f"{delta:>9} {str(quantize):>5} {compressor:>5} {raw_size/size:7.2f} {raw_size/encode/1e6:12.1f} "
+						f"{raw_size/decode/1e6:12.1f} {error:10.2e}")
+
+
+if __name__ == "__main__" :
+	main()
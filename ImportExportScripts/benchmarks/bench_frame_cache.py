@@ -0,0 +1,85 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Play a compressed cache back and forth with a fixed time per tick, as the viewers' timerEvent does,
+reading straight from the cache and through a FrameCache. The time the caller waits for each frame is
+reported.
+
+	python benchmarks/bench_frame_cache.py --verts 50000 --frames 96 --tick-ms 16
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+
+import pointbake
+from bench_codec import synthetic_frames
+
+
+def play(cache,frames : list,tick : float) -> np.ndarray :
+	"""ask for each frame in turn sleeping for the rest of the tick, returns the wait for each frame"""
+	waits=np.empty(len(frames))
+	for i,frame in enumerate(frames) :
+		start=time.perf_counter()
+		cache.frame(frame)
+		waits[i]=time.perf_counter()-start
+		time.sleep(max(0.0,tick-waits[i]))
+	return waits
+
+
+def main() -> None :
+	parser=argparse.ArgumentParser(description="benchmark playback through the frame cache")
+	parser.add_argument("--verts",type=int,default=50000,help="number of vertices in the mesh")
+	parser.add_argument("--frames",type=int,default=96,help="number of frames in the cache")
+	parser.add_argument("--tick-ms",type=float,default=16.0,help="time between frames")
+	parser.add_argument("--chunk-frames",type=int,default=1,help="frames in each compressed chunk")
+	parser.add_argument("--budget-mb",type=float,default=64.0,help="memory for the frame cache")
+	args=parser.parse_args()
+
+	data=synthetic_frames(args.verts,args.frames)
+	header=pointbake.PointBakeHeader("bench",args.verts,0,args.frames,args.frames)
+	# forwards, backwards then scrub over the middle
+	middle=list(range(args.frames//3,2*args.frames//3))
+	order=list(range(args.frames))+list(reversed(range(args.frames)))+middle+list(reversed(middle))
+	with tempfile.TemporaryDirectory() as tmp :
+		file_name=os.path.join(tmp,"bench.pbk")
+		codec=pointbake.Codec("previous",False,None,"lzma",None,args.chunk_frames)
+		with pointbake.BinaryPointBakeWriter(file_name,header,np.float32,codec) as writer :
+			for frame in range(args.frames) :
+				writer.write_frame(frame,data[frame])
+		with pointbake.BinaryPointBake(file_name) as cache :
+			direct=play(cache,order,args.tick_ms*1e-3)
+		with pointbake.FrameCache(pointbake.BinaryPointBake(file_name),int(args.budget_mb*1e6)) as cache :
+			cached=play(cache,order,args.tick_ms*1e-3)
+			counters=cache.counters()
+	print(f"{args.verts} verts {len(order)} frames played at {args.tick_ms}ms per tick")
+	for name,waits in (("direct",direct),("frame cache",cached)) :
+		print(f"{name:<12} mean wait {waits.mean()*1e3:7.2f}ms max {waits.max()*1e3:7.2f}ms "
+					f"late frames {(waits > args.tick_ms*1e-3).sum()}")
+	print(" ".join(f"{key} {value:.3g}" if isinstance(value,float) else f"{key} {value}" for key,value in counters.items()))
+
+
+if __name__ == "__main__" :
+	main()
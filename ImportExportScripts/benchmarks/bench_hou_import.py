@@ -0,0 +1,140 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Compare the original Houdini import (xml.sax parse with a hou.Keyframe per vertex component and a
+status message per vertex) with the cache SOP, which only builds the frame index on import and sets all
+the points in one call when each frame cooks. Each fake hou call costs --call-overhead microseconds.
+
+	python benchmarks/bench_hou_import.py --verts 5000 --frames 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import xml.sax
+
+import numpy as np
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+
+import fake_hou
+
+hou=fake_hou.install()
+
+import pointbake
+import pointbake.houdini
+
+
+class LegacyParseHandler(xml.sax.ContentHandler) :
+	""" the original sax based houdini importer """
+
+	def __init__(self,chan) :
+		self.mcharData=""
+		self.mnumVerts=0
+		self.mchannel=chan
+		self.moffset=None
+		self.mcurrentFrame=0
+
+	def startElement(self,name,attrs) :
+		self.mcharData=""
+		if name == "Vertex" :
+			self.moffset=int(attrs.get("number"))
+		elif name == "Frame" :
+			hou.setFrame(int(attrs.get("number")))
+			self.mcurrentFrame=int(attrs.get("number"))
+
+	def characters(self,content) :
+		self.mcharData += content
+
+	def endElement(self,name) :
+		if name == "NumVerts" :
+			self.mnumVerts=int(self.mcharData)
+			self.mchannel.parm("numchannels").set(self.mnumVerts)
+			for i in range(0,self.mnumVerts) :
+				self.mchannel.parm("size%d" %(i)).set(3)
+				self.mchannel.parm("name%d" %(i)).set("t")
+		elif name == "StartFrame" :
+			self.mchannel.parm("start").set(int(self.mcharData))
+		elif name == "EndFrame" :
+			self.mchannel.parm("end").set(int(self.mcharData))
+		elif name =="Vertex" :
+			hou.ui.setStatusMessage("Processing Frame %d channel %d" %(self.mcurrentFrame,self.moffset),hou.severityType.Message)
+			self.mcharData=self.mcharData.strip()
+			data=self.mcharData.split(" ")
+			if len(data) == 3 :
+				houparmtuple = self.mchannel.parmTuple("value%d" %(self.moffset))
+				houkeyframe = hou.Keyframe()
+				houkeyframe.setExpression(str(data[0]), hou.exprLanguage.Hscript)
+				houparmtuple[0].setKeyframe(houkeyframe)
+				houkeyframe.setExpression(str(data[1]), hou.exprLanguage.Hscript)
+				houparmtuple[1].setKeyframe(houkeyframe)
+				houkeyframe.setExpression(str(data[2]), hou.exprLanguage.Hscript)
+				houparmtuple[2].setKeyframe(houkeyframe)
+
+
+def main() -> None :
+	parser=argparse.ArgumentParser(description="benchmark the houdini point bake import")
+	parser.add_argument("--verts",type=int,default=5000,help="number of vertices in the mesh")
+	parser.add_argument("--frames",type=int,default=20,help="number of frames in the cache")
+	parser.add_argument("--call-overhead",type=float,default=5.0,
+											help="simulated cost in microseconds of each hou call")
+	args=parser.parse_args()
+	fake_hou.call_overhead=args.call_overhead*1e-6
+
+	rng=np.random.default_rng(0)
+	rest=rng.standard_normal((args.verts,3))
+	header=pointbake.PointBakeHeader("pSphere1",args.verts,0,args.frames,args.frames)
+	with tempfile.TemporaryDirectory() as tmp :
+		file_name=os.path.join(tmp,"bench.xml")
+		with pointbake.PointBakeXMLWriter(file_name,header) as writer :
+			for frame in range(args.frames) :
+				writer.write_frame(frame,rest+np.sin(frame*0.1))
+
+		start=time.perf_counter()
+		sax=xml.sax.make_parser()
+		sax.setContentHandler(LegacyParseHandler(fake_hou.Node()))
+		with open(file_name,"r") as file :
+			sax.parse(file)
+		legacy=time.perf_counter()-start
+
+		node=fake_hou.Node(args.verts)
+		node.parm(pointbake.houdini.CACHE_FILE_PARM).set(file_name)
+		node.parm(pointbake.houdini.FRAME_OFFSET_PARM).set(0.0)
+		node.parm(pointbake.houdini.OUT_OF_RANGE_PARM).set(0)
+		node.parm(pointbake.houdini.INTERPOLATION_PARM).set(0)
+		start=time.perf_counter()
+		with pointbake.open_cache(file_name) :
+			pass
+		bulk_import=time.perf_counter()-start
+		start=time.perf_counter()
+		for frame in range(args.frames) :
+			pointbake.houdini.cook(node,frame)
+		bulk_play=time.perf_counter()-start
+
+	print(f"{args.verts} verts {args.frames} frames")
+	print(f"legacy sax + keyframes import   {legacy:8.3f}s")
+	print(f"cache SOP import (index build)  {bulk_import:8.3f}s")
+	print(f"cache SOP cook every frame      {bulk_play:8.3f}s")
+	print(f"speedup (import + full play)    {legacy/(bulk_import+bulk_play):8.2f}x")
+
+
+if __name__ == "__main__" :
+	main()
@@ -0,0 +1,149 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Compare the original per vertex cmds.xform export with the bulk MFnMesh.getPoints export using the
+fake maya modules. Each fake command call costs --call-overhead microseconds to stand in for the
+round trip through the maya command engine, set this to the cost measured on your own scenes, and
+each element read from a point array costs --element-overhead microseconds for the python wrappers.
+The fetch of the points is also timed on its own for the api 1.0 per vertex loop and the api 2.0 array.
+The stages of the threaded export are printed at the end, --trace writes their timeline.
+
+	python benchmarks/bench_maya_export.py --verts 20000 --frames 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+
+import fake_maya
+
+
+def legacy_export(cmds,file_name : str,name : str,start_frame : int,end_frame : int,anim,OM) -> None :
+	""" the original export loop, one xform query and three writes per vertex """
+	def write_data(file,n_tabs,data) :
+		file.write("\t"*n_tabs)
+		file.write(data)
+		file.write("\n")
+
+	with open(file_name,"w") as file :
+		current_frame=OM.MTime()
+		tab_indent=0
+		num_points = cmds.polyEvaluate( name, v=True)
+		file.write("<?xml version=\"1.0\" encoding=\"UTF-8\" ?>\n")
+		file.write("<NCCAPointBake>\n")
+		tab_indent=tab_indent+1
+		write_data(file,tab_indent,f"<MeshName> {name} </MeshName>")
+		write_data(file,tab_indent,f"<NumVerts> {num_points} </NumVerts>")
+		write_data(file,tab_indent,f"<StartFrame> {start_frame} </StartFrame>" )
+		write_data(file,tab_indent,f"<EndFrame> {end_frame} </EndFrame>" )
+		write_data(file,tab_indent,f"<NumFrames> {end_frame-start_frame} </NumFrames>" )
+		write_data(file,tab_indent,f"<TranslateMode> absolute </TranslateMode>" )
+		for frame in range(start_frame,end_frame) :
+			current_frame.setValue (frame)
+			anim.setCurrentTime(current_frame)
+			write_data(file,tab_indent,f'<Frame number="{frame}">' )
+			tab_indent+=1
+			for vertex in range(0,num_points) :
+				data = cmds.xform( (name+ ".vtx["+str(vertex)+"]"), q=True, ws=True, t=True )
+				write_data(file,tab_indent,f'<Vertex number="{vertex}" attrib="translate"> {data[0]} {data[1]} {data[2]} </Vertex>')
+			tab_indent-=1
+			write_data(file,tab_indent,"</Frame>")
+		file.write("</NCCAPointBake>\n")
+
+
+def api1_world_points(OM,name : str) :
+	""" the api 1.0 fetch, one getPoints call and then a python loop reading every point """
+	selected=OM.MSelectionList()
+	selected.add(name)
+	path=OM.MDagPath()
+	selected.getDagPath(0,path)
+	points=OM.MPointArray()
+	OM.MFnMesh(path).getPoints(points,OM.MSpace.kWorld)
+	return np.array([(p.x,p.y,p.z) for p in (points[i] for i in range(points.length()))],dtype=np.float64)
+
+
+def main() -> None :
+	parser=argparse.ArgumentParser(description="benchmark the maya point bake export")
+	parser.add_argument("--verts",type=int,default=20000,help="number of vertices in the mesh")
+	parser.add_argument("--frames",type=int,default=10,help="number of frames to export")
+	parser.add_argument("--call-overhead",type=float,default=20.0,
+											help="simulated cost in microseconds of each maya command call")
+	parser.add_argument("--element-overhead",type=float,default=0.2,
+											help="simulated cost in microseconds of reading an element of a point array")
+	parser.add_argument("--eval-ms",type=float,default=0.0,
+											help="simulated cost in milliseconds of evaluating the scene each frame")
+	parser.add_argument("--trace",help="write the stage timeline of the threaded export to this json file")
+	args=parser.parse_args()
+
+	scene=fake_maya.install(args.verts)
+	scene.call_overhead=args.call_overhead*1e-6
+	scene.eval_time=args.eval_ms*1e-3
+	scene.element_overhead=args.element_overhead*1e-6
+	import maya.cmds as cmds
+	import maya.OpenMaya as OM
+	import maya.OpenMayaAnim as OMA
+	import NCCAPointBakeMayaExport as exporter
+	import pointbake
+
+	with tempfile.TemporaryDirectory() as tmp :
+		legacy_file=os.path.join(tmp,"legacy.xml")
+		bulk_file=os.path.join(tmp,"bulk.xml")
+		start=time.perf_counter()
+		legacy_export(cmds,legacy_file,scene.name,0,args.frames,OMA.MAnimControl(),OM)
+		legacy=time.perf_counter()-start
+		start=time.perf_counter()
+		exporter.NCCAPointBakeBatch([bulk_file],[scene.name],0,args.frames,queue_frames=0)
+		bulk=time.perf_counter()-start
+		start=time.perf_counter()
+		profiler=pointbake.Profiler(trace=args.trace is not None)
+		exporter.NCCAPointBakeBatch([bulk_file],[scene.name],0,args.frames,profiler=profiler)
+		threaded=time.perf_counter()-start
+		legacy_size=os.path.getsize(legacy_file)
+		bulk_size=os.path.getsize(bulk_file)
+	start=time.perf_counter()
+	for _ in range(args.frames) :
+		api1_world_points(OM,scene.name)
+	api1_fetch=time.perf_counter()-start
+	mesh=exporter.get_mesh(scene.name)
+	start=time.perf_counter()
+	for _ in range(args.frames) :
+		exporter.get_world_points(mesh)
+	api2_fetch=time.perf_counter()-start
+
+	print(f"{args.verts} verts {args.frames} frames")
+	print(f"legacy xform export {legacy:8.3f}s {legacy_size/1e6:8.2f}MB")
+	print(f"bulk getPoints      {bulk:8.3f}s {bulk_size/1e6:8.2f}MB")
+	print(f"threaded writer     {threaded:8.3f}s")
+	print(f"speedup             {legacy/bulk:8.2f}x {legacy/threaded:8.2f}x threaded")
+	print(f"fetch api 1.0 loop  {api1_fetch:8.3f}s")
+	print(f"fetch api 2.0 array {api2_fetch:8.3f}s {api1_fetch/api2_fetch:8.2f}x")
+	print("threaded export stages")
+	print("\n".join(profiler.report()))
+	if args.trace is not None :
+		profiler.dump(args.trace)
+
+
+if __name__ == "__main__" :
+	main()
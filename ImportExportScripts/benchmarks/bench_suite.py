@@ -0,0 +1,163 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Time the main paths of the core module over a corpus of synthetic caches made from the Shark and Cloth
+models at several sizes
+	parse    stream every frame of the xml cache
+	convert  xml to .pbk
+	compare  diff the .pbk cache with a noisy re-bake of it
+	apply    cook the Houdini cache SOP on every frame of the .pbk cache
+Throughput is reported as frames and MB of float32 vertex data per second. --json saves the results and
+--baseline compares with saved results, exiting with 1 if any stage is more than --max-slowdown times
+slower so a change which slows things down is caught.
+
+	python benchmarks/bench_suite.py --sizes 1000 10000 100000 --frames 48 --json results.json
+	python benchmarks/bench_suite.py --sizes 1000 10000 100000 --frames 48 --baseline results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+
+import fake_hou
+
+hou=fake_hou.install()
+
+import pointbake
+import pointbake.houdini
+from synthetic import MODELS, size_copies, write_cache
+
+## the stages timed, in the order they run
+STAGES = ("parse","convert","compare","apply")
+
+
+def _time(function : Callable[[],None],repeat : int) -> float :
+	"""the best time of repeat runs, the best is the least disturbed by anything else on the machine"""
+	best=float("inf")
+	for _ in range(repeat) :
+		start=time.perf_counter()
+		function()
+		best=min(best,time.perf_counter()-start)
+	return best
+
+
+def _parse(file_name : str) -> None :
+	with pointbake.open_frames(file_name) as source :
+		for _ in source :
+			pass
+
+
+def _apply(file_name : str,num_verts : int,num_frames : int) -> None :
+	node=fake_hou.Node(num_verts)
+	node.parm(pointbake.houdini.CACHE_FILE_PARM).set(file_name)
+	node.parm(pointbake.houdini.FRAME_OFFSET_PARM).set(0.0)
+	node.parm(pointbake.houdini.OUT_OF_RANGE_PARM).set(0)
+	node.parm(pointbake.houdini.INTERPOLATION_PARM).set(0)
+	for frame in range(num_frames) :
+		pointbake.houdini.cook(node,frame)
+
+
+def run_case(directory : str,model : str,num_verts : int,num_frames : int,repeat : int) -> Dict[str,float] :
+	"""
+	Parameters :
+		directory (str) where the caches are written
+		model (str) one of MODELS
+		num_verts (int) about the number of vertices wanted
+		num_frames (int) the number of frames
+		repeat (int) the times each stage is run, the best is kept
+	Returns :
+		dict the seconds taken by each of STAGES
+	"""
+	copies,_=size_copies(model,num_verts)
+	xml_name=os.path.join(directory,f"{model}_{num_verts}.xml")
+	pbk_name=os.path.join(directory,f"{model}_{num_verts}.pbk")
+	noisy_name=os.path.join(directory,f"{model}_{num_verts}_noisy.pbk")
+	write_cache(xml_name,model,num_frames,copies)
+	write_cache(noisy_name,model,num_frames,copies,noise=1e-4,dtype="float32")
+	header=pointbake.read_header(xml_name)
+	times={"parse" : _time(lambda : _parse(xml_name),repeat),
+				 "convert" : _time(lambda : pointbake.xml_to_binary(xml_name,pbk_name),repeat),
+				 "compare" : _time(lambda : pointbake.compare_caches(pbk_name,noisy_name),repeat)}
+	times["apply"]=_time(lambda : _apply(pbk_name,header.num_verts,num_frames),repeat)
+	return {"verts" : header.num_verts,**times}
+
+
+def check_baseline(results : Dict[str,Dict[str,float]],baseline : Dict[str,Dict[str,float]],
+									 max_slowdown : float) -> List[str] :
+	"""
+	Parameters :
+		results (dict) the times of this run by case
+		baseline (dict) the times saved from an earlier run
+		max_slowdown (float) a stage this many times slower than the baseline is a regression
+	Returns :
+		list a line for each stage which has regressed
+	"""
+	regressions=[]
+	for case,times in results.items() :
+		for stage in STAGES :
+			before=baseline.get(case,{}).get(stage)
+			if before and times[stage] > before*max_slowdown :
+				regressions.append(f"{case} {stage} {times[stage]/before:.2f}x slower ({before:.3f}s to {times[stage]:.3f}s)")
+	return regressions
+
+
+def main() -> int :
+	parser=argparse.ArgumentParser(description="benchmark parse, convert, compare and apply over synthetic caches")
+	parser.add_argument("--models",nargs="+",choices=tuple(MODELS),default=list(MODELS),help="the models to use")
+	parser.add_argument("--sizes",type=int,nargs="+",default=[1000,10000,100000],help="about the vertex counts of the caches")
+	parser.add_argument("--frames",type=int,default=48,help="number of frames in each cache")
+	parser.add_argument("--repeat",type=int,default=3,help="runs of each stage, the best is reported")
+	parser.add_argument("--json",help="save the results to this file")
+	parser.add_argument("--baseline",help="results saved by --json to compare with")
+	parser.add_argument("--max-slowdown",type=float,default=1.25,help="a stage this many times slower than the baseline fails")
+	args=parser.parse_args()
+
+	results={}
+	print(f"{'model':>6} {'verts':>8} "+" ".join(f"{stage+' fps':>12} {'MB/s':>8}" for stage in STAGES))
+	with tempfile.TemporaryDirectory() as tmp :
+		for model in args.models :
+			for size in args.sizes :
+				times=run_case(tmp,model,size,args.frames,args.repeat)
+				results[f"{model}/{size}"]=times
+				raw=times["verts"]*12*args.frames
+				print(f"{model:>6} {times['verts']:8d} "+" ".join(f"{args.frames/times[stage]:12.1f} {raw/times[stage]/1e6:8.1f}"
+																											 for stage in STAGES))
+	if args.json is not None :
+		with open(args.json,"w") as file :
+			json.dump({"frames" : args.frames,"results" : results},file,indent=1)
+	if args.baseline is not None :
+		with open(args.baseline) as file :
+			baseline=json.load(file)
+		if baseline["frames"] != args.frames :
+			print(f"the baseline has {baseline['frames']} frames per cache, this run {args.frames}")
+			return 1
+		regressions=check_baseline(results,baseline["results"],args.max_slowdown)
+		print("\n".join(regressions) if regressions else f"no stage more than {args.max_slowdown}x slower than {args.baseline}")
+		return 1 if regressions else 0
+	return 0
+
+
+if __name__ == "__main__" :
+	sys.exit(main())
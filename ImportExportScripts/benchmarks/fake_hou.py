@@ -0,0 +1,140 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+A minimal stand in for the houdini hou module so the import code can be run and timed outside of
+Houdini. Only the calls used by the importers are provided.
+"""
+
+import sys
+import time
+import types
+from typing import Dict, List
+
+## simulated cost in seconds of each call into hou
+call_overhead = 0.0
+## the current frame
+_frame = 0.0
+
+
+def _overhead() -> None :
+	# busy wait rather than sleep as the overhead is too small for the sleep resolution
+	end=time.perf_counter()+call_overhead
+	while time.perf_counter() < end :
+		pass
+
+
+class Keyframe() :
+	def __init__(self) -> None :
+		self.expression=""
+		self.frame=None
+
+	def setExpression(self,expression : str,language=None) -> None :
+		_overhead()
+		self.expression=expression
+
+	def setFrame(self,frame : float) -> None :
+		self.frame=frame
+
+
+class Parm() :
+	def __init__(self,name : str) -> None :
+		self.name=name
+		self.value=None
+		self.keyframes : List[tuple]=[]
+
+	def set(self,value) -> None :
+		_overhead()
+		self.value=value
+
+	def eval(self) :
+		return self.value
+
+	def setKeyframe(self,keyframe : Keyframe) -> None :
+		_overhead()
+		frame=_frame if keyframe.frame is None else keyframe.frame
+		self.keyframes.append((frame,keyframe.expression))
+
+
+class Geometry() :
+	def __init__(self,num_points : int) -> None :
+		self.num_points=num_points
+		self.positions=b""
+
+	def intrinsicValue(self,name : str) :
+		_overhead()
+		return self.num_points
+
+	def pointFloatAttribValuesAsString(self,name : str,float_type=None) -> bytes :
+		_overhead()
+		return self.positions
+
+	def setPointFloatAttribValuesFromString(self,name : str,values : bytes,float_type=None) -> None :
+		_overhead()
+		self.positions=bytes(values)
+
+
+class Node() :
+	def __init__(self,num_points : int=0) -> None :
+		self._parms : Dict[str,Parm]={}
+		self._geometry=Geometry(num_points)
+
+	def parm(self,name : str) -> Parm :
+		_overhead()
+		if name not in self._parms :
+			self._parms[name]=Parm(name)
+		return self._parms[name]
+
+	def parmTuple(self,name : str) -> List[Parm] :
+		_overhead()
+		return [self.parm(f"{name}{component}") for component in "xyz"]
+
+	def evalParm(self,name : str) :
+		return self.parm(name).value
+
+	def geometry(self) -> Geometry :
+		return self._geometry
+
+
+def setFrame(frame : float) -> None :
+	global _frame
+	_overhead()
+	_frame=frame
+
+
+def frame() -> float :
+	return _frame
+
+
+def _set_status_message(message : str,severity=None) -> None :
+	_overhead()
+
+
+def install() -> types.ModuleType :
+	"""create the fake hou module and add it to sys.modules
+	Returns :
+		the module
+	"""
+	hou=types.ModuleType("hou")
+	hou.Keyframe=Keyframe
+	hou.setFrame=setFrame
+	hou.frame=frame
+	hou.ui=types.SimpleNamespace(setStatusMessage=_set_status_message)
+	hou.severityType=types.SimpleNamespace(Message=0)
+	hou.exprLanguage=types.SimpleNamespace(Hscript=0,Python=1)
+	sys.modules["hou"]=hou
+	return hou
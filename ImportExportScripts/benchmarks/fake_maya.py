@@ -0,0 +1,341 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+A minimal stand in for the maya python modules so the export scripts can be run and timed outside
+of Maya. Only the calls used by the scripts are provided, the scene is a single mesh whose vertices
+move with time. Both the api 1.0 (maya.OpenMaya) and api 2.0 (maya.api.OpenMaya) point arrays charge
+element_overhead for every element read, as each is a call through the python wrappers in Maya.
+"""
+
+import math
+import re
+import sys
+import time
+import types
+from typing import List
+
+import numpy as np
+
+
+class FakeScene() :
+	"""the state of the fake maya scene, a single mesh and the current time"""
+
+	def __init__(self,num_verts : int,name : str="pSphere1",seed : int=0) -> None :
+		rng=np.random.default_rng(seed)
+		self.name=name
+		self.rest=rng.standard_normal((num_verts,3))
+		self.time=0.0
+		self.min_time=0.0
+		self.max_time=100.0
+		self.interrupt_at=None
+		## simulated cost in seconds of a round trip through the maya command engine
+		self.call_overhead=0.0
+		## simulated cost in seconds of evaluating the scene when the time changes
+		self.eval_time=0.0
+		## simulated cost in seconds of reading an element of a point array, or a component of an api 1.0 point
+		self.element_overhead=0.0
+		self._cache_time=None
+		self._cache=None
+
+	def points(self) -> np.ndarray :
+		""" the world space points at the current time, evaluated once per time like the maya DG """
+		if self._cache_time != self.time :
+			self._cache=self.rest+math.sin(self.time*0.1)
+			self._cache_list=self._cache.tolist()
+			self._cache_time=self.time
+		return self._cache
+
+
+_scene : FakeScene=None
+_VTX_RE=re.compile(r"\.vtx\[(\d+)\]$")
+
+
+class MPoint() :
+	def __init__(self,x : float=0.0,y : float=0.0,z : float=0.0) -> None :
+		self._xyz=(x,y,z)
+
+	@property
+	def x(self) -> float :
+		_element_overhead()
+		return self._xyz[0]
+
+	@property
+	def y(self) -> float :
+		_element_overhead()
+		return self._xyz[1]
+
+	@property
+	def z(self) -> float :
+		_element_overhead()
+		return self._xyz[2]
+
+
+class MPointArray() :
+	def __init__(self) -> None :
+		self._points : List[MPoint]=[]
+
+	def length(self) -> int :
+		return len(self._points)
+
+	def __getitem__(self,index : int) -> MPoint :
+		_element_overhead()
+		return self._points[index]
+
+
+class MFloatPointArray(MPointArray) :
+	def clear(self) -> None :
+		self._points=[]
+
+	def setLength(self,length : int) -> None :
+		self._points=[MPoint() for _ in range(length)]
+
+	def set(self,index : int,x : float,y : float,z : float) -> None :
+		self._points[index]=MPoint(x,y,z)
+
+	def append(self,x : float,y : float,z : float) -> None :
+		self._points.append(MPoint(x,y,z))
+
+
+class MSpace() :
+	kObject=1
+	kWorld=4
+
+
+class MObject() :
+	def apiTypeStr(self) -> str :
+		return "kMesh"
+
+	def apiType(self) -> int :
+		return 296
+
+
+class MDagPath() :
+	def extendToShape(self) -> None :
+		pass
+
+
+class MSelectionList() :
+	def add(self,name : str) -> None :
+		pass
+
+	def getDependNode(self,index : int,obj : MObject) -> None :
+		pass
+
+	def getDagPath(self,index : int,path : MDagPath) -> None :
+		pass
+
+	def getSelectionStrings(self,strings : List[str]) -> None :
+		strings.append(_scene.name)
+
+
+class MFnTransform() :
+	def __init__(self,obj : MObject) -> None :
+		pass
+
+	def child(self,index : int) -> MObject :
+		return MObject()
+
+
+class MFnMesh() :
+	def __init__(self,obj) -> None :
+		pass
+
+	def numVertices(self) -> int :
+		return len(_scene.rest)
+
+	def getPoints(self,points : MPointArray,space : int=MSpace.kObject) -> None :
+		_command_overhead()
+		_scene.points()
+		points._points=[MPoint(x,y,z) for x,y,z in _scene._cache_list]
+
+	def setPoints(self,points : MPointArray,space : int=MSpace.kObject) -> None :
+		pass
+
+
+class MTime() :
+	def __init__(self,value : float=0.0) -> None :
+		self._value=value
+
+	def setValue(self,value : float) -> None :
+		self._value=value
+
+	def value(self) -> float :
+		return self._value
+
+
+class MComputation() :
+	def beginComputation(self) -> None :
+		pass
+
+	def endComputation(self) -> None :
+		pass
+
+	def isInterruptRequested(self) -> bool :
+		return _scene.interrupt_at is not None and _scene.time >= _scene.interrupt_at
+
+
+class MAnimControl() :
+	def setCurrentTime(self,current : MTime) -> None :
+		_scene.time=current.value()
+		if _scene.eval_time > 0.0 :
+			# sleep so the writer thread can run, maya's evaluation happens outside python
+			time.sleep(_scene.eval_time)
+
+	def setMinTime(self,time : MTime) -> None :
+		_scene.min_time=time.value()
+
+	def minTime(self) -> MTime :
+		return MTime(_scene.min_time)
+
+	def maxTime(self) -> MTime :
+		return MTime(_scene.max_time)
+
+
+def _busy_wait(seconds : float) -> None :
+	# busy wait rather than sleep as the overhead is too small for the sleep resolution
+	if seconds > 0.0 :
+		end=time.perf_counter()+seconds
+		while time.perf_counter() < end :
+			pass
+
+
+def _command_overhead() -> None :
+	_busy_wait(_scene.call_overhead)
+
+
+def _element_overhead() -> None :
+	_busy_wait(_scene.element_overhead)
+
+
+class _Api2Point(tuple) :
+	"""an api 2.0 MPoint, a sequence of x y z w"""
+
+
+class _Api2PointArray() :
+	"""an api 2.0 MPointArray, numpy converts it through the sequence protocol an element at a time"""
+
+	def __init__(self,points=()) -> None :
+		xyz=np.array(points,dtype=np.float64).reshape(-1,3)
+		self._points=np.concatenate([xyz,np.ones((len(xyz),1))],axis=1)
+
+	def __len__(self) -> int :
+		return len(self._points)
+
+	def __getitem__(self,index : int) -> _Api2Point :
+		if not -len(self._points) <= index < len(self._points) :
+			raise IndexError(index)
+		_element_overhead()
+		return _Api2Point(self._points[index].tolist())
+
+
+class _Api2Object() :
+	apiTypeStr="kMesh"
+
+	def apiType(self) -> int :
+		return 296
+
+
+class _Api2DagPath() :
+	def extendToShape(self) -> "_Api2DagPath" :
+		return self
+
+
+class _Api2SelectionList() :
+	def add(self,name : str) -> "_Api2SelectionList" :
+		return self
+
+	def getDependNode(self,index : int) -> _Api2Object :
+		return _Api2Object()
+
+	def getDagPath(self,index : int) -> _Api2DagPath :
+		return _Api2DagPath()
+
+
+class _Api2FnTransform() :
+	def __init__(self,obj) -> None :
+		pass
+
+	def child(self,index : int) -> _Api2Object :
+		return _Api2Object()
+
+
+class _Api2FnMesh() :
+	def __init__(self,obj) -> None :
+		pass
+
+	@property
+	def numVertices(self) -> int :
+		return len(_scene.rest)
+
+	def getPoints(self,space : int=MSpace.kObject) -> _Api2PointArray :
+		_command_overhead()
+		return _Api2PointArray(_scene.points())
+
+	def setPoints(self,points : _Api2PointArray,space : int=MSpace.kObject) -> None :
+		_command_overhead()
+
+
+def xform(name : str,q : bool=False,ws : bool=False,t : bool=False) -> List[float] :
+	_command_overhead()
+	index=int(_VTX_RE.search(name).group(1))
+	_scene.points()
+	return _scene._cache_list[index]
+
+
+def polyEvaluate(name : str,v : bool=False) -> int :
+	_command_overhead()
+	return len(_scene.rest)
+
+
+def install(num_verts : int,name : str="pSphere1") -> FakeScene :
+	"""create the fake maya modules and add them to sys.modules so "import maya.cmds" etc work
+	Parameters :
+		num_verts (int) the number of vertices in the fake mesh
+		name (str) the name of the mesh
+	Returns :
+		FakeScene the scene the modules operate on
+	"""
+	global _scene
+	_scene=FakeScene(num_verts,name)
+	maya=types.ModuleType("maya")
+	cmds=types.ModuleType("maya.cmds")
+	cmds.xform=xform
+	cmds.polyEvaluate=polyEvaluate
+	om=types.ModuleType("maya.OpenMaya")
+	for cls in (MPoint,MPointArray,MFloatPointArray,MSpace,MObject,MDagPath,MSelectionList,MFnTransform,
+							MFnMesh,MTime,MComputation) :
+		setattr(om,cls.__name__,cls)
+	api=types.ModuleType("maya.api")
+	om2=types.ModuleType("maya.api.OpenMaya")
+	om2.MPointArray=_Api2PointArray
+	om2.MSelectionList=_Api2SelectionList
+	om2.MFnTransform=_Api2FnTransform
+	om2.MFnMesh=_Api2FnMesh
+	om2.MSpace=MSpace
+	api.OpenMaya=om2
+	oma=types.ModuleType("maya.OpenMayaAnim")
+	oma.MAnimControl=MAnimControl
+	ompx=types.ModuleType("maya.OpenMayaMPx")
+	maya.cmds=cmds
+	maya.OpenMaya=om
+	maya.OpenMayaAnim=oma
+	maya.OpenMayaMPx=ompx
+	maya.api=api
+	sys.modules.update({"maya" : maya,"maya.cmds" : cmds,"maya.OpenMaya" : om,"maya.OpenMayaAnim" : oma,
+											"maya.OpenMayaMPx" : ompx,"maya.api" : api,"maya.api.OpenMaya" : om2})
+	return _scene
@@ -0,0 +1,151 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Make synthetic caches of any size from the Shark and Cloth models used by the demos, for benchmarks and
+for checking tools against caches with known motion. The model is tiled into a grid of copies to reach
+the vertex count wanted and a wave runs along the longest axis of each copy, pushing the vertices along
+the shortest, with each copy at a different phase. The same seed always gives the same cache, noise adds
+seeded jitter to every frame so a second cache can be made which is close to but not the same as the first.
+
+	python benchmarks/synthetic.py --model shark --copies 16 --frames 240 -o shark.pbk
+"""
+
+import argparse
+import os
+import sys
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pointbake
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+## the models a cache can be made from
+MODELS = {
+	"shark" : os.path.join(_ROOT,"PointBake","models","Shark.obj"),
+	"cloth" : os.path.join(_ROOT,"PointBakeCloth","models","Cloth.obj"),
+}
+
+
+def load_rest(model : str,copies : int=1) -> np.ndarray :
+	"""
+	Parameters :
+		model (str) one of MODELS or the path of an obj file
+		copies (int) the number of copies of the model, laid out in a square grid
+	Returns :
+		ndarray [num_verts*copies,3] the rest positions
+	"""
+	points=pointbake.read_obj_vertices(MODELS.get(model,model))
+	extent=np.ptp(points,axis=0) if len(points) else np.ones(3)
+	# the grid is across the two longest axes so the copies don't overlap as they move
+	across=np.argsort(extent)[1:]
+	side=int(np.ceil(np.sqrt(copies)))
+	offsets=np.zeros((copies,3))
+	offsets[:,across[0]]=np.arange(copies)%side*extent[across[0]]*1.5
+	offsets[:,across[1]]=np.arange(copies)//side*extent[across[1]]*1.5
+	return (points[np.newaxis]+offsets[:,np.newaxis]).reshape(-1,3)
+
+
+def synthetic_frames(rest : np.ndarray,num_frames : int,copies : int=1,seed : int=0,amplitude : float=0.1,
+										 noise : float=0.0) -> Iterator[np.ndarray] :
+	"""the frames of the cache one at a time so only a frame is held in memory
+	Parameters :
+		rest (ndarray) [num_verts,3] the rest positions from load_rest
+		num_frames (int) the number of frames
+		copies (int) the number of copies in rest, each moves at its own phase
+		seed (int) the seed for the phases and noise
+		amplitude (float) the height of the wave as a fraction of the size of a copy
+		noise (float) the standard deviation of the jitter added to every value
+	Returns :
+		iterator of ndarray [num_verts,3] float64 frames
+	"""
+	rng=np.random.default_rng(seed)
+	copy=rest.reshape(copies,-1,3)[0]
+	extent=np.ptp(copy,axis=0) if len(copy) else np.ones(3)
+	along=int(np.argmax(extent))
+	push=int(np.argmin(extent))
+	# position of every vertex along its copy from 0 to 1, the wave is stronger towards the far end
+	position=((copy[:,along]-copy[:,along].min())/max(extent[along],1e-9))
+	phase=np.repeat(rng.uniform(0.0,2.0*np.pi,copies),len(copy))
+	position=np.tile(position,copies)
+	height=amplitude*extent.max()
+	for frame in range(num_frames) :
+		points=rest.copy()
+		points[:,push]+=height*position*np.sin(2.0*np.pi*position-frame*0.2+phase)
+		if noise > 0.0 :
+			points+=rng.normal(0.0,noise,points.shape)
+		yield points
+
+
+def write_cache(out_name : str,model : str="shark",num_frames : int=100,copies : int=1,seed : int=0,
+								noise : float=0.0,dtype=None,codec : Optional[pointbake.Codec]=None,
+								start_frame : int=0) -> pointbake.PointBakeHeader :
+	"""
+	Parameters :
+		out_name (str) the cache to write, the format comes from the extension
+		model (str) one of MODELS or the path of an obj file
+		num_frames (int) the number of frames
+		copies (int) the number of copies of the model
+		seed (int) the seed for the phases and noise
+		noise (float) the standard deviation of the jitter added to every value
+		dtype (numpy dtype) the precision written, as open_writer
+		codec (Codec) binary compression
+		start_frame (int) the first frame
+	Returns :
+		PointBakeHeader the header of the cache
+	"""
+	rest=load_rest(model,copies)
+	name=os.path.splitext(os.path.basename(MODELS.get(model,model)))[0]
+	header=pointbake.PointBakeHeader(name,len(rest),start_frame,start_frame+num_frames,num_frames)
+	with pointbake.open_writer(out_name,header,dtype,codec) as writer :
+		for frame,points in enumerate(synthetic_frames(rest,num_frames,copies,seed,noise=noise),start_frame) :
+			writer.write_frame(frame,points)
+	return header
+
+
+def size_copies(model : str,num_verts : int) -> Tuple[int,int] :
+	"""
+	Parameters :
+		model (str) one of MODELS or the path of an obj file
+		num_verts (int) about the number of vertices wanted
+	Returns :
+		(int,int) the copies of the model needed and the vertex count they give
+	"""
+	count=len(pointbake.read_obj_vertices(MODELS.get(model,model)))
+	copies=max(1,int(round(num_verts/max(count,1))))
+	return copies,copies*count
+
+
+def main() -> None :
+	parser=argparse.ArgumentParser(description="write a synthetic cache made from one of the demo models")
+	parser.add_argument("-o","--output",required=True,help="the cache to write, .pbk or .xml")
+	parser.add_argument("--model",default="shark",help=f"one of {', '.join(MODELS)} or an obj file")
+	parser.add_argument("--copies",type=int,default=1,help="copies of the model laid out in a grid")
+	parser.add_argument("--frames",type=int,default=100,help="number of frames")
+	parser.add_argument("--seed",type=int,default=0,help="seed for the wave phases and noise")
+	parser.add_argument("--noise",type=float,default=0.0,help="standard deviation of the jitter added to every value")
+	parser.add_argument("--dtype",choices=tuple(pointbake.PRECISIONS),help="pbk storage type or xml precision")
+	args=parser.parse_args()
+	header=write_cache(args.output,args.model,args.frames,args.copies,args.seed,args.noise,args.dtype)
+	print(f"{args.output} {header.num_verts} verts {header.num_frames} frames {os.path.getsize(args.output)/1e6:.2f}MB")
+
+
+if __name__ == "__main__" :
+	main()
@@ -0,0 +1,150 @@
+"""@package docstring
+Host independent core for reading and writing NCCA PointBake data. This only depends on numpy so
+can be used from Maya, Houdini or plain python.
+"""
+
+from .binary import (
+	BinaryHeader,
+	BinaryPointBake,
+	BinaryPointBakeWriter,
+	binary_to_xml,
+	can_concatenate,
+	concatenate_binary,
+	open_frames,
+	open_writer,
+	read_binary_header,
+	xml_to_binary,
+)
+from .codec import Codec
+from .compare import CacheDiff, compare_caches
+from .framecache import FrameCache
+from .index import (
+	FrameIndex,
+	IndexedPointBake,
+	build_index,
+	index_file_name,
+	load_index,
+	read_frame,
+)
+from .instrument import NULL_PROFILER, Profiler, Progress
+from .lod import (
+	LevelOfDetail,
+	LODPointBake,
+	LODSet,
+	build_lods,
+	cluster_vertices,
+	load_lods,
+	lod_file_name,
+)
+from .merge import check_segments, merge_segments, segment_file_name, split_frames
+from .obj import check_obj, compare_rest, read_obj_vertices
+from .parallel import read_frames_parallel
+from .playback import OUT_OF_RANGE_MODES, CacheRegistry, frame_for_time, open_cache
+from .precision import PRECISIONS, error_bound, precision_dtype, round_points, rounding_error, text_format
+from .reader import (
+	PointBakeHeader,
+	PointBakeReader,
+	apply_offsets,
+	is_relative,
+	iter_frames,
+	key_frames,
+	parse_frame,
+	parse_frame_tag,
+	parse_header,
+	read_frames,
+	read_header,
+	scan_frame_offsets,
+)
+from .resume import resume_file_name
+from .retime import (
+	INTERPOLATIONS,
+	SHUTTER_POSITIONS,
+	Resampler,
+	frame_rate_times,
+	motion_blur_times,
+	retime_file,
+	sample_weights,
+)
+from .stats import FrameStats, StatsBuilder, build_stats, load_stats, stats_file_name
+from .threaded import ThreadedWriter
+from .writer import PointBakeXMLWriter, format_frame, format_header
+
+__all__ = [
+	"INTERPOLATIONS",
+	"NULL_PROFILER",
+	"OUT_OF_RANGE_MODES",
+	"PRECISIONS",
+	"SHUTTER_POSITIONS",
+	"BinaryHeader",
+	"BinaryPointBake",
+	"BinaryPointBakeWriter",
+	"CacheDiff",
+	"CacheRegistry",
+	"Codec",
+	"FrameCache",
+	"FrameIndex",
+	"FrameStats",
+	"IndexedPointBake",
+	"LODPointBake",
+	"LODSet",
+	"LevelOfDetail",
+	"PointBakeHeader",
+	"PointBakeReader",
+	"PointBakeXMLWriter",
+	"Profiler",
+	"Progress",
+	"Resampler",
+	"StatsBuilder",
+	"ThreadedWriter",
+	"apply_offsets",
+	"binary_to_xml",
+	"build_index",
+	"build_lods",
+	"build_stats",
+	"can_concatenate",
+	"check_obj",
+	"check_segments",
+	"cluster_vertices",
+	"compare_caches",
+	"compare_rest",
+	"concatenate_binary",
+	"error_bound",
+	"format_frame",
+	"format_header",
+	"frame_for_time",
+	"frame_rate_times",
+	"index_file_name",
+	"is_relative",
+	"iter_frames",
+	"key_frames",
+	"load_index",
+	"load_lods",
+	"load_stats",
+	"lod_file_name",
+	"merge_segments",
+	"motion_blur_times",
+	"open_cache",
+	"open_frames",
+	"open_writer",
+	"parse_frame",
+	"parse_frame_tag",
+	"parse_header",
+	"precision_dtype",
+	"read_binary_header",
+	"read_frame",
+	"read_frames",
+	"read_frames_parallel",
+	"read_header",
+	"read_obj_vertices",
+	"resume_file_name",
+	"retime_file",
+	"round_points",
+	"rounding_error",
+	"sample_weights",
+	"scan_frame_offsets",
+	"segment_file_name",
+	"split_frames",
+	"stats_file_name",
+	"text_format",
+	"xml_to_binary",
+]
@@ -0,0 +1,716 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Binary sibling of the xml PointBake format (.pbk). The file is a fixed header holding the same data as
+the xml header followed by a single contiguous frame major block of [num_frames,num_verts,3] values.
+The reader memory maps the block so accessing any frame is a zero copy slice with no parsing.
+
+Files can also be compressed (FLAG_COMPRESSED), the frame data is then a series of independently
+encoded chunks (see codec.py) followed by a table describing the codec and the chunks, so a frame
+only needs its own chunk decoding.
+
+Layout (little endian)
+	magic          8s  b"NCCAPBK\\0"
+	version        H
+	flags          H
+	dtype          4s  numpy dtype string b"<f2", b"<f4" or b"<f8"
+	num_verts      I
+	start_frame    i
+	end_frame      i
+	num_frames     I
+	translate_mode B   0 absolute 1 relative
+	pad            x
+	name_length    H
+	data_offset    Q   offset to the frame data, aligned to DATA_ALIGNMENT
+	table_offset   Q   offset to the chunk table of a compressed file, 0 otherwise (version 2)
+	mesh_name      name_length bytes of utf-8
+
+Chunk table (compressed files only)
+	delta          B   index into codec.DELTA_MODES
+	quantize       B
+	compressor     B   index into codec.COMPRESSORS
+	pad            x
+	chunk_frames   I
+	num_chunks     I
+	rest           [num_verts,3] of dtype, only for the rest delta mode
+	chunks         num_chunks of CHUNK_ENTRY
+
+Every chunk holds chunk_frames frames except the last, apart from version 3 files where the chunks can
+hold any number (the frames field of each entry), as made by joining segments with concatenate_binary.
+The writers use version 2 so older readers can still open their files.
+
+Hold table (FLAG_HOLDS only)
+	slots          num_frames of <u4, the stored frame each frame uses. Frames which are the same as the
+	               frame before are not stored again. This is at table_offset for uncompressed files and
+	               after the chunk table for compressed ones
+"""
+
+import bisect
+import os
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .codec import COMPRESSORS, DELTA_MODES, Codec, grid_error
+from .instrument import NULL_PROFILER, Profiler
+from .precision import PRECISIONS, precision_dtype, round_points, rounding_error
+from .reader import PointBakeHeader, PointBakeReader, apply_offsets
+from .resume import DEFAULT_CHECKPOINT_FRAMES, check_resume, load_checkpoint, remove_checkpoint, save_checkpoint
+from .stats import FrameStats, StatsBuilder, load_stats
+from .writer import PointBakeXMLWriter
+
+MAGIC = b"NCCAPBK\0"
+## the newest version read
+VERSION = 3
+## the version written when every chunk but the last holds chunk_frames frames
+_REGULAR_VERSION = 2
+## the most bytes copied at once when joining files
+_COPY_SIZE = 1 << 24
+DATA_ALIGNMENT = 64
+FLAG_COMPRESSED = 1
+FLAG_HOLDS = 2
+_HEADER = struct.Struct("<8sHH4sIiiIBxHQ")
+_HEADER_V2 = struct.Struct("<Q")
+_TABLE = struct.Struct("<BBBxII")
+## the location and quantization grid of each compressed chunk
+CHUNK_ENTRY = np.dtype([("offset","<u8"),("size","<u8"),("frames","<u4"),("lo","<f8",3),("step","<f8",3)])
+_TRANSLATE_MODES = ("absolute","relative")
+## the storage types we support for the frame data
+DTYPES = tuple(PRECISIONS.values())
+
+
+def _header_bytes(header : PointBakeHeader,dtype : np.dtype,flags : int=0,table_offset : int=0,
+									version : int=_REGULAR_VERSION) -> bytes :
+	name=header.mesh_name.encode("utf-8")
+	size=_HEADER.size+_HEADER_V2.size+len(name)
+	data_offset=(size+DATA_ALIGNMENT-1)//DATA_ALIGNMENT*DATA_ALIGNMENT
+	packed=_HEADER.pack(MAGIC,version,flags,dtype.str.encode("ascii"),header.num_verts,header.start_frame,
+											header.end_frame,header.num_frames,_TRANSLATE_MODES.index(header.translate_mode),
+											len(name),data_offset)
+	return (packed+_HEADER_V2.pack(table_offset)+name).ljust(data_offset,b"\0")
+
+
+class BinaryHeader() :
+	"""everything stored in the header of a .pbk file"""
+
+	def __init__(self,header : PointBakeHeader,dtype : np.dtype,data_offset : int,flags : int=0,
+							 table_offset : int=0) -> None :
+		"""
+		Parameters :
+			header (PointBakeHeader) the same data as the xml header
+			dtype (numpy dtype) the storage type of the frame data
+			data_offset (int) offset of the frame data in the file
+			flags (int) the FLAG values for the file
+			table_offset (int) offset of the chunk table for compressed files
+		"""
+		self.header=header
+		self.dtype=dtype
+		self.data_offset=data_offset
+		self.flags=flags
+		self.table_offset=table_offset
+
+
+def read_binary_header(file : BinaryIO) -> BinaryHeader :
+	"""read the header from an open .pbk file
+	Parameters :
+		file (BinaryIO) the file positioned at the start
+	Returns :
+		BinaryHeader the header
+	"""
+	data=file.read(_HEADER.size)
+	if len(data) != _HEADER.size or data[:8] != MAGIC :
+		raise ValueError("not a binary PointBake file")
+	(_,version,flags,dtype,num_verts,start_frame,end_frame,num_frames,mode,name_length,
+		data_offset)=_HEADER.unpack(data)
+	if version > VERSION :
+		raise ValueError(f"binary PointBake version {version} is newer than this reader ({VERSION})")
+	table_offset=_HEADER_V2.unpack(file.read(_HEADER_V2.size))[0] if version >= 2 else 0
+	name=file.read(name_length).decode("utf-8")
+	header=PointBakeHeader(name,num_verts,start_frame,end_frame,num_frames,_TRANSLATE_MODES[mode])
+	return BinaryHeader(header,np.dtype(dtype.rstrip(b"\0").decode("ascii")),data_offset,flags,table_offset)
+
+
+class BinaryPointBakeWriter() :
+	"""write a .pbk file a frame at a time, the frame count in the header is patched on close so the
+	number of frames does not need to be known up front. Until then a checkpoint sidecar (see resume.py)
+	records what is needed to finish the file so an export which is stopped can be resumed
+	"""
+
+	def __init__(self,file_name : str,header : PointBakeHeader,dtype=np.float32,codec : Optional[Codec]=None,
+							 rest : Optional[np.ndarray]=None,stats : bool=False,hold_tolerance : Optional[float]=None,
+							 profiler : Optional[Profiler]=None,resume : bool=False,
+							 checkpoint_frames : int=DEFAULT_CHECKPOINT_FRAMES) -> None :
+		"""
+		Parameters :
+			file_name (str) the file to write
+			header (PointBakeHeader) the header data, num_frames and end_frame are updated as frames are written
+			dtype (numpy dtype) the storage type float16, float32 or float64, frames are rounded to this
+			codec (Codec) compress the frame data with this codec, None writes the data uncompressed
+			rest (ndarray) [num_verts,3] rest pose for the rest delta mode, the first frame is used if not given
+			stats (bool) write the per frame statistics sidecar when the file is closed
+			hold_tolerance (float) frames within this of the last frame stored are not stored again, 0 only
+				holds identical frames and None stores every frame
+			profiler (Profiler) time the format (rounding and compression) and write stages and count the frames and bytes
+			resume (bool) carry on from the last checkpoint of an existing file, or append to it if it was closed,
+				see next_frame. It must be of the same mesh, start frame, storage type and codec. A new file is
+				written if there is nothing to resume
+			checkpoint_frames (int) save the checkpoint sidecar every this many frames, 0 for none
+		"""
+		self.file_name=file_name
+		self.profiler=profiler or NULL_PROFILER
+		self.dtype=precision_dtype(dtype)
+		## the largest difference between the frames given and the values stored
+		self.max_error=0.0
+		self.codec=codec
+		self.header=PointBakeHeader(**vars(header))
+		self.header.num_frames=0
+		self.header.end_frame=header.start_frame
+		self.rest=None if rest is None else np.ascontiguousarray(rest,dtype=self.dtype)
+		self._pending=[]
+		self._chunks=[]
+		self._stats=StatsBuilder() if stats else None
+		self.hold_tolerance=hold_tolerance
+		self._slots=[]
+		self._stored : Optional[np.ndarray]=None
+		self.checkpoint_frames=checkpoint_frames
+		self._file : Optional[BinaryIO]=None
+		if not (resume and self._resume()) :
+			# a checkpoint left by an earlier export of this file no longer describes it
+			remove_checkpoint(file_name)
+			self._file=open(file_name,"wb")
+			self._file.write(_header_bytes(self.header,self.dtype))
+
+	@property
+	def next_frame(self) -> int :
+		"""the frame to write next, where a resumed export carries on from"""
+		return self.header.end_frame
+
+	def _codec_fields(self,codec : Optional[Codec]) -> Tuple[int,...] :
+		# the codec settings which must match for a file to be resumed
+		if codec is None :
+			return ()
+		return (DELTA_MODES.index(codec.delta),int(codec.quantize),COMPRESSORS.index(codec.compressor),codec.chunk_frames)
+
+	def _resume(self) -> bool :
+		# pick up an existing file from its checkpoint, or from its tables if it was closed. The data after
+		# the last frame resumed is cut off. False if there is nothing to resume
+		if not os.path.exists(self.file_name) :
+			return False
+		with open(self.file_name,"rb") as file :
+			info=read_binary_header(file)
+		check_resume(info.header,self.header,self.file_name)
+		if info.dtype != self.dtype :
+			raise ValueError(f"can't resume {self.file_name}, it is stored as {info.dtype.name} not {self.dtype.name}")
+		if info.header.num_frames > 0 :
+			state=self._closed_state()
+		else :
+			state=load_checkpoint(self.file_name)
+			if state is None :
+				return False
+		if tuple(state["codec"].tolist()) != self._codec_fields(self.codec) :
+			raise ValueError(f"can't resume {self.file_name}, it was written with other compression settings")
+		self.header.num_frames=int(state["num_frames"])
+		self.header.end_frame=self.header.start_frame+self.header.num_frames
+		self._slots=state["slots"].tolist()
+		self._chunks=[(int(chunk["offset"]),int(chunk["size"]),int(chunk["frames"]),chunk["lo"].copy(),chunk["step"].copy())
+									for chunk in state["chunks"]]
+		if "rest" in state :
+			self.rest=np.array(state["rest"],dtype=self.dtype)
+		stored=None
+		if self._slots :
+			with open(self.file_name,"rb") as file :
+				stored=self._read_stored(file,info.data_offset,self._slots[-1])
+		if self.hold_tolerance is not None :
+			self._stored=stored
+		if self._stats is not None :
+			if state["stats"] is None :
+				# the statistics can't be carried on, load_stats rebuilds them from the file when they are needed
+				self._stats=None
+			else :
+				self._stats.resume(state["stats"],stored)
+		if info.header.num_frames > 0 :
+			# checkpoint before the tables are cut off so a crash from here on resumes from the checkpoint
+			self._save_checkpoint(int(state["data_end"]))
+		self._file=open(self.file_name,"r+b")
+		self._file.write(_header_bytes(PointBakeHeader(self.header.mesh_name,self.header.num_verts,self.header.start_frame,
+																										self.header.start_frame,0,self.header.translate_mode),self.dtype))
+		self._file.truncate(int(state["data_end"]))
+		self._file.seek(0,os.SEEK_END)
+		return True
+
+	def _closed_state(self) -> Dict[str,object] :
+		# the writer state of a closed file, in the form saved by a checkpoint
+		with BinaryPointBake(self.file_name,dtype=self.dtype) as cache :
+			num_frames=cache.header.num_frames
+			slots=np.arange(num_frames) if cache.slots is None else cache.slots
+			stored=int(slots[-1])+1 if num_frames else 0
+			state={"num_frames" : np.array(num_frames),"slots" : np.array(slots,dtype=np.int64),
+						 "codec" : np.array(self._codec_fields(cache.codec),dtype=np.int64)}
+			if cache.codec is None :
+				state["chunks"]=np.zeros(0,CHUNK_ENTRY)
+				state["data_end"]=np.array(cache.data_offset+stored*self.header.num_verts*3*self.dtype.itemsize)
+			else :
+				state["chunks"]=np.array(cache.chunks)
+				state["data_end"]=np.array(int((cache.chunks["offset"]+cache.chunks["size"]).max(initial=cache.data_offset)))
+				if cache.rest is not None :
+					state["rest"]=np.array(cache.rest)
+		state["stats"]=None
+		if self._stats is not None :
+			stats=load_stats(self.file_name)
+			state["stats"]=stats if len(stats) == num_frames else None
+		return state
+
+	def _read_stored(self,file : BinaryIO,data_offset : int,slot : int) -> np.ndarray :
+		# read a frame already written from the data of the file
+		frame_size=self.header.num_verts*3*self.dtype.itemsize
+		if self.codec is None :
+			file.seek(data_offset+slot*frame_size)
+			return np.frombuffer(file.read(frame_size),dtype=self.dtype).reshape(self.header.num_verts,3).copy()
+		start=0
+		for offset,size,frames,lo,step in self._chunks :
+			if slot < start+frames :
+				file.seek(offset)
+				return self.codec.decode(file.read(size),(frames,self.header.num_verts,3),self.dtype,lo,step,self.rest)[slot-start]
+			start+=frames
+		raise ValueError(f"{self.file_name} checkpoint has no chunk for stored frame {slot}")
+
+	def _save_checkpoint(self,data_end : Optional[int]=None) -> None :
+		# save what close needs to finish the file with the frames which are on disk, held frames of a stored
+		# frame still waiting to be compressed are left for the resumed export
+		if self.codec is None :
+			frames=len(self._slots)
+		else :
+			frames=bisect.bisect_left(self._slots,sum(chunk[2] for chunk in self._chunks))
+		if data_end is None :
+			self._file.flush()
+			data_end=self._file.tell()
+		state={"num_frames" : np.array(frames),"data_end" : np.array(data_end),"slots" : np.array(self._slots[:frames],dtype=np.int64),
+					 "chunks" : np.array(self._chunks,dtype=CHUNK_ENTRY),"codec" : np.array(self._codec_fields(self.codec),dtype=np.int64)}
+		if self.rest is not None and self.codec is not None :
+			state["rest"]=self.rest
+		stats=None
+		if self._stats is not None :
+			stats=self._stats.result()
+			stats=FrameStats(stats.frames[:frames],stats.lo[:frames],stats.hi[:frames],stats.max_displacement[:frames],
+											 error=None if stats.error is None else stats.error[:frames])
+		save_checkpoint(self.file_name,state,stats)
+
+	def write_frame(self,frame : int,points : np.ndarray) -> None :
+		"""append a frame, frames must be written in order with no gaps
+		Parameters :
+			frame (int) the frame number
+			points (ndarray) [num_verts,3] array of positions
+		"""
+		if frame != self.header.start_frame+self.header.num_frames :
+			raise ValueError(f"frame {frame} written out of order expected {self.header.start_frame+self.header.num_frames}")
+		source=np.asarray(points)
+		if source.shape != (self.header.num_verts,3) :
+			raise ValueError(f"frame {frame} has shape {source.shape} expected ({self.header.num_verts}, 3)")
+		with self.profiler.stage("format",frame) :
+			points=round_points(source,self.dtype)
+			error=rounding_error(source,points)
+		self.max_error=max(self.max_error,error)
+		if self._stats is not None :
+			self._stats.add(frame,points,error)
+		self.profiler.count("frames written")
+		self.header.num_frames+=1
+		self.header.end_frame=frame+1
+		# compare with the frame stored rather than the one before so small changes can't build up
+		if (self.hold_tolerance is not None and self._stored is not None and
+				np.abs(points-self._stored).max(initial=0.0) <= self.hold_tolerance) :
+			self._slots.append(self._slots[-1])
+		else :
+			if self.hold_tolerance is not None :
+				self._stored=points.copy()
+			self._slots.append(self._slots[-1]+1 if self._slots else 0)
+			if self.codec is None :
+				with self.profiler.stage("write",frame) :
+					self._file.write(points)
+				self.profiler.count("bytes written",points.nbytes)
+			else :
+				if self.rest is None :
+					self.rest=points.copy()
+				self._pending.append(points)
+				if len(self._pending) == self.codec.chunk_frames :
+					self._flush()
+		if self.checkpoint_frames and self.header.num_frames%self.checkpoint_frames == 0 :
+			self._save_checkpoint()
+
+	def _flush(self) -> None :
+		# encode and write the frames waiting to make up a chunk
+		if not self._pending :
+			return
+		with self.profiler.stage("format") :
+			data,lo,step=self.codec.encode(np.stack(self._pending),self.rest)
+		self._chunks.append((self._file.tell(),len(data),len(self._pending),lo,step))
+		with self.profiler.stage("write") :
+			self._file.write(data)
+		self.profiler.count("bytes written",len(data))
+		self._pending=[]
+
+	def close(self) -> None :
+		"""patch the frame count into the header, close the file and remove the checkpoint"""
+		if self._file is None :
+			return
+		flags=0
+		table_offset=0
+		version=_REGULAR_VERSION
+		if self.codec is not None :
+			self._flush()
+			flags=FLAG_COMPRESSED
+			table_offset=self._file.tell()
+			self._file.write(_TABLE.pack(DELTA_MODES.index(self.codec.delta),int(self.codec.quantize),
+																	 COMPRESSORS.index(self.codec.compressor),self.codec.chunk_frames,len(self._chunks)))
+			if self.codec.delta == "rest" :
+				rest=self.rest if self.rest is not None else np.zeros((self.header.num_verts,3),self.dtype)
+				self._file.write(rest.tobytes())
+			self._file.write(np.array(self._chunks,dtype=CHUNK_ENTRY).tobytes())
+			# a file resumed after a part filled chunk has chunks of different lengths
+			if any(chunk[2] != self.codec.chunk_frames for chunk in self._chunks[:-1]) :
+				version=VERSION
+		if self._slots and self._slots[-1]+1 != len(self._slots) :
+			flags|=FLAG_HOLDS
+			if self.codec is None :
+				table_offset=self._file.tell()
+			self._file.write(np.array(self._slots,dtype="<u4").tobytes())
+		self._file.seek(0)
+		self._file.write(_header_bytes(self.header,self.dtype,flags,table_offset,version))
+		self._file.close()
+		self._file=None
+		remove_checkpoint(self.file_name)
+		if self._stats is not None :
+			self._stats.save(self.file_name)
+
+	def __enter__(self) -> "BinaryPointBakeWriter" :
+		return self
+
+	def __exit__(self,*args) -> None :
+		self.close()
+
+
+class BinaryPointBake() :
+	"""memory mapped reader for .pbk files, frames are returned as read only views onto the file so
+	no data is read until it is touched. For compressed files the frames attribute is None and each
+	chunk is decoded when one of its frames is asked for. The frames attribute always holds the data as
+	stored, so offsets for relative files.
+	"""
+
+	def __init__(self,file_name : str,rest : Optional[np.ndarray]=None,dtype=None,profiler : Optional[Profiler]=None) -> None :
+		"""
+		Parameters :
+			file_name (str) the .pbk file to open
+			rest (ndarray) rest positions added to the frames of relative files, if not given relative files
+				return the offsets
+			dtype (numpy dtype) the type of the frames returned, None returns the storage type except for
+				float16 files which are returned as float32. Frames of another type are copies not views
+			profiler (Profiler) time the decoding of compressed chunks (parse) and count the frames iterated
+		"""
+		self.file_name=file_name
+		self.profiler=profiler or NULL_PROFILER
+		self.codec : Optional[Codec]=None
+		self.rest : Optional[np.ndarray]=None
+		self._decoded : Tuple[int,Optional[np.ndarray]]=(-1,None)
+		## the stored frame each frame uses when the file has held frames, None if every frame is stored
+		self.slots : Optional[np.ndarray]=None
+		with open(file_name,"rb") as file :
+			info=read_binary_header(file)
+			self.header=info.header
+			self.dtype=info.dtype
+			self.data_offset=info.data_offset
+			if dtype is None :
+				# half floats are slow to do arithmetic with and the hosts can't take them
+				dtype=np.float32 if self.dtype.itemsize == 2 else self.dtype
+			## the type of the frames returned
+			self.read_dtype=np.dtype(dtype)
+			if info.flags & FLAG_COMPRESSED :
+				self._read_table(file,info.table_offset)
+			elif info.flags & FLAG_HOLDS :
+				file.seek(info.table_offset)
+			if info.flags & FLAG_HOLDS :
+				self.slots=np.frombuffer(file.read(self.header.num_frames*4),dtype="<u4").astype(np.int64)
+		## the rest positions added to relative frames, this is not the codec rest pose
+		self.rest_positions=None if rest is None else np.asarray(rest,dtype=self.read_dtype).reshape(self.header.num_verts,3)
+		stored=self.header.num_frames if self.slots is None or len(self.slots) == 0 else int(self.slots[-1])+1
+		shape=(stored,self.header.num_verts,3)
+		if self.codec is not None :
+			self.frames=None
+			## memory map of the whole file the compressed chunks are sliced from
+			self._data=np.memmap(file_name,dtype=np.uint8,mode="r")
+		elif stored == 0 :
+			self.frames=np.empty(shape,self.dtype)
+		else :
+			## [stored frames,num_verts,3] memory mapped view of all the frame data, held frames are not stored
+			self.frames=np.memmap(file_name,dtype=self.dtype,mode="r",offset=self.data_offset,shape=shape)
+
+	def _read_table(self,file : BinaryIO,table_offset : int) -> None :
+		file.seek(table_offset)
+		delta,quantize,compressor,chunk_frames,num_chunks=_TABLE.unpack(file.read(_TABLE.size))
+		self.codec=Codec(DELTA_MODES[delta],bool(quantize),None,COMPRESSORS[compressor],None,chunk_frames)
+		if self.codec.delta == "rest" :
+			size=self.header.num_verts*3*self.dtype.itemsize
+			self.rest=np.frombuffer(file.read(size),dtype=self.dtype).reshape(self.header.num_verts,3)
+		self.chunks=np.frombuffer(file.read(num_chunks*CHUNK_ENTRY.itemsize),dtype=CHUNK_ENTRY)
+		## the index of the first stored frame of each chunk and the number stored at the end
+		self.chunk_starts=np.concatenate([[0],np.cumsum(self.chunks["frames"],dtype=np.int64)])
+
+	@property
+	def compressed(self) -> bool :
+		return self.codec is not None
+
+	@property
+	def stats(self) -> Optional[FrameStats] :
+		"""the per frame statistics from the sidecar, None if there isn't an up to date one"""
+		return load_stats(self.file_name,False)
+
+	@property
+	def max_error(self) -> float :
+		"""the largest distance quantization can have moved a vertex, 0 for lossless files"""
+		if self.codec is None or not self.codec.quantize or len(self.chunks) == 0 :
+			return 0.0
+		return float(grid_error(self.chunks["step"]).max())
+
+	def __len__(self) -> int :
+		return self.header.num_frames
+
+	def _chunk(self,chunk : int) -> np.ndarray :
+		# decode a chunk keeping the last one so reading frames in order decodes each chunk once
+		if self._decoded[0] != chunk :
+			entry=self.chunks[chunk]
+			data=self._data[int(entry["offset"]):int(entry["offset"]+entry["size"])]
+			shape=(int(entry["frames"]),self.header.num_verts,3)
+			with self.profiler.stage("parse") :
+				self._decoded=(chunk,self.codec.decode(data.tobytes(),shape,self.dtype,entry["lo"],entry["step"],self.rest))
+			self.profiler.count("bytes read",len(data))
+		return self._decoded[1]
+
+	def _frame_at(self,index : int) -> np.ndarray :
+		if self.slots is not None :
+			index=int(self.slots[index])
+		if self.codec is None :
+			points=self.frames[index]
+		else :
+			chunk=int(np.searchsorted(self.chunk_starts,index,"right"))-1
+			points=self._chunk(chunk)[index-int(self.chunk_starts[chunk])]
+		return apply_offsets(self.header,points.astype(self.read_dtype,copy=False),self.rest_positions)
+
+	def frame(self,frame : int) -> np.ndarray :
+		"""get the data for a frame number
+		Parameters :
+			frame (int) the frame number (not index) to get
+		Returns :
+			ndarray [num_verts,3] view of the frame data
+		"""
+		index=frame-self.header.start_frame
+		if not 0 <= index < self.header.num_frames :
+			raise IndexError(f"frame {frame} is not in the range {self.header.start_frame} to {self.header.end_frame}")
+		return self._frame_at(index)
+
+	def __iter__(self) -> Iterator[Tuple[int,np.ndarray]] :
+		points=None
+		for index in range(self.header.num_frames) :
+			# held frames give back the same array so callers can skip them with an is test
+			if points is None or self.slots is None or self.slots[index] != self.slots[index-1] :
+				points=self._frame_at(index)
+				if self.codec is None :
+					self.profiler.count("bytes read",self.header.num_verts*3*self.dtype.itemsize)
+			self.profiler.count("frames read")
+			yield self.header.start_frame+index,points
+
+	def close(self) -> None :
+		# the map isn't closed here, frames handed out are views of it so numpy unmaps the file once the
+		# last of them is released
+		self.frames=None
+		self._data=None
+		self._decoded=(-1,None)
+
+	def __enter__(self) -> "BinaryPointBake" :
+		return self
+
+	def __exit__(self,*args) -> None :
+		self.close()
+
+
+def _copy_range(source : BinaryIO,dest : BinaryIO,offset : int,size : int) -> None :
+	# copy part of one file to another a block at a time
+	source.seek(offset)
+	while size > 0 :
+		data=source.read(min(size,_COPY_SIZE))
+		if not data :
+			raise ValueError(f"{source.name} is shorter than its tables say")
+		dest.write(data)
+		size-=len(data)
+
+
+def can_concatenate(caches : List[BinaryPointBake]) -> bool :
+	"""
+	Parameters :
+		caches (list) the open files
+	Returns :
+		bool True if the stored data of the files can be joined by copying, they need the same storage type and
+		codec settings, and for the rest delta mode the same rest pose
+	"""
+	first=caches[0]
+	for cache in caches[1:] :
+		if cache.dtype != first.dtype or (cache.codec is None) != (first.codec is None) :
+			return False
+		if first.codec is not None :
+			if (cache.codec.delta,cache.codec.quantize,cache.codec.compressor) != (first.codec.delta,first.codec.quantize,first.codec.compressor) :
+				return False
+			if first.codec.delta == "rest" and not np.array_equal(cache.rest,first.rest) :
+				return False
+	return True
+
+
+def concatenate_binary(file_names : List[str],out_name : str,header : PointBakeHeader) -> None :
+	"""join .pbk files which follow on from each other by copying their stored data, compressed chunks are copied
+	as they are so nothing is decoded. The files must pass can_concatenate, see merge.merge_segments for the checks
+	on the frame ranges
+	Parameters :
+		file_names (list) the files in frame order
+		out_name (str) the file to write
+		header (PointBakeHeader) the header of the joined file
+	"""
+	caches=[BinaryPointBake(file_name) for file_name in file_names]
+	try :
+		if not can_concatenate(caches) :
+			raise ValueError("the files have different storage types or codecs so can't be copied")
+		first=caches[0]
+		slots=[]
+		chunks=[]
+		stored=0
+		with open(out_name,"wb") as out :
+			out.write(_header_bytes(header,first.dtype))
+			for cache in caches :
+				with open(cache.file_name,"rb") as source :
+					if cache.codec is None :
+						count=len(cache.frames)
+						_copy_range(source,out,cache.data_offset,count*cache.header.num_verts*3*cache.dtype.itemsize)
+					else :
+						count=int(cache.chunk_starts[-1])
+						if len(cache.chunks) :
+							# the chunks follow the header so move their offsets to where the data is copied to
+							entries=cache.chunks.copy()
+							end=int((entries["offset"]+entries["size"]).max())
+							entries["offset"]=entries["offset"].astype(np.int64)+(out.tell()-cache.data_offset)
+							_copy_range(source,out,cache.data_offset,end-cache.data_offset)
+							chunks.append(entries)
+				slots.append((np.arange(cache.header.num_frames) if cache.slots is None else cache.slots)+stored)
+				stored+=count
+			flags=0
+			table_offset=0
+			version=_REGULAR_VERSION
+			if first.codec is not None :
+				flags=FLAG_COMPRESSED
+				table_offset=out.tell()
+				table=np.concatenate(chunks) if chunks else np.empty(0,CHUNK_ENTRY)
+				chunk_frames=int(table["frames"].max(initial=first.codec.chunk_frames))
+				# older readers find the chunk from chunk_frames so only a file where that still works keeps version 2
+				if (table["frames"][:-1] != chunk_frames).any() :
+					version=VERSION
+				out.write(_TABLE.pack(DELTA_MODES.index(first.codec.delta),int(first.codec.quantize),
+															COMPRESSORS.index(first.codec.compressor),chunk_frames,len(table)))
+				if first.codec.delta == "rest" :
+					out.write(first.rest.tobytes())
+				out.write(table.tobytes())
+			slots=np.concatenate(slots) if slots else np.empty(0,np.int64)
+			if len(slots) and slots[-1]+1 != len(slots) :
+				flags|=FLAG_HOLDS
+				if first.codec is None :
+					table_offset=out.tell()
+				out.write(slots.astype("<u4").tobytes())
+			out.seek(0)
+			out.write(_header_bytes(header,first.dtype,flags,table_offset,version))
+	finally :
+		for cache in caches :
+			cache.close()
+
+
+def open_writer(file_name : str,header : PointBakeHeader,dtype=None,codec : Optional[Codec]=None,
+								float_format : Optional[str]=None,tolerance : float=0.0,stats : bool=False,
+								hold_tolerance : Optional[float]=None,profiler : Optional[Profiler]=None,resume : bool=False,
+								checkpoint_frames : int=DEFAULT_CHECKPOINT_FRAMES) :
+	"""open a writer for the format given by the file extension, .pbk is binary anything else xml
+	Parameters :
+		file_name (str) the file to write
+		header (PointBakeHeader) the header data
+		dtype (numpy dtype) the precision, binary files store this type and xml values are rounded to it and
+			written with the digits needed to read back exactly. None keeps the values as given, float64 for binary
+		codec (Codec) binary compression
+		float_format (str) xml value format
+		tolerance (float) xml relative files skip vertices with offsets within this
+		stats (bool) write the per frame statistics sidecar when the file is closed
+		hold_tolerance (float) store frames within this of the frame before as a reference, None stores every frame
+		profiler (Profiler) time the writing stages
+		resume (bool) carry on from the end of an existing file, writer.next_frame is the frame to carry on from
+		checkpoint_frames (int) frames between the checkpoints a resumed export carries on from
+	Returns :
+		a BinaryPointBakeWriter or PointBakeXMLWriter
+	"""
+	if file_name.lower().endswith(".pbk") :
+		return BinaryPointBakeWriter(file_name,header,dtype or np.float64,codec,stats=stats,hold_tolerance=hold_tolerance,
+																 profiler=profiler,resume=resume,checkpoint_frames=checkpoint_frames)
+	return PointBakeXMLWriter(file_name,header,float_format,tolerance,stats,hold_tolerance,dtype,profiler,resume,
+														checkpoint_frames)
+
+
+def open_frames(file_name : str,dtype=None,profiler : Optional[Profiler]=None) :
+	"""open a file to stream the frames as they are stored, xml values are read as float64 so nothing is lost
+	Parameters :
+		file_name (str) the .pbk or .xml file
+		dtype (numpy dtype) the type of the frames returned, None is the storage type for binary files
+		profiler (Profiler) time the reading stages
+	Returns :
+		a BinaryPointBake or PointBakeReader, both iterate (frame,points) and have a header attribute
+	"""
+	if file_name.lower().endswith(".pbk") :
+		return BinaryPointBake(file_name,dtype=dtype,profiler=profiler)
+	return PointBakeReader(file_name,dtype or np.float64,profiler=profiler)
+
+
+def xml_to_binary(xml_name : str,binary_name : str,dtype=np.float64,codec : Optional[Codec]=None) -> PointBakeHeader :
+	"""convert an xml PointBake file to binary, the xml is streamed so only a frame is in memory at once.
+	The default float64 storage is a bit exact copy of the xml values.
+	Parameters :
+		xml_name (str) the source xml file
+		binary_name (str) the .pbk file to write
+		dtype (numpy dtype) the storage type float16, float32 or float64, the smaller types round the values
+		codec (Codec) compress the frame data with this codec
+	Returns :
+		PointBakeHeader the header written
+	"""
+	with PointBakeReader(xml_name,np.float64) as reader :
+		with BinaryPointBakeWriter(binary_name,reader.header,dtype,codec,stats=True) as writer :
+			for frame,points in reader :
+				writer.write_frame(frame,points)
+			return writer.header
+
+
+def binary_to_xml(binary_name : str,xml_name : str) -> PointBakeHeader :
+	"""convert a .pbk file to xml, values are written with enough digits to round trip exactly
+	Parameters :
+		binary_name (str) the source .pbk file
+		xml_name (str) the xml file to write
+	Returns :
+		PointBakeHeader the header written
+	"""
+	with BinaryPointBake(binary_name) as cache :
+		with PointBakeXMLWriter(xml_name,cache.header,stats=True,precision=cache.dtype) as writer :
+			for frame,points in cache :
+				writer.write_frame(frame,points)
+		return cache.header
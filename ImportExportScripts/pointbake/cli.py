@@ -0,0 +1,558 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Command line tool for working with PointBake files outside of Maya and Houdini, only python and numpy
+are needed. Run with python -m pointbake
+	info      print the header of each file
+	convert   convert between xml and .pbk, or re-write with other compression settings
+	slice     write a frame range to a new file
+	merge     join frame range segments exported separately into one file
+	diff      compare two caches frame by frame, exits with 1 if they differ
+	retime    resample to another frame rate or speed, interpolating between the frames
+	lod       build reduced levels of detail for preview playback
+	stats     write the per frame bounds and motion sidecar
+	validate  check every frame can be read and is consistent with the header
+	bench     time reading the files
+Several files are processed in parallel with -j. --profile prints where the time went for each file and
+--trace writes the timeline of every stage to a json file for chrome://tracing or Perfetto.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .binary import FLAG_COMPRESSED, BinaryHeader, BinaryPointBake, open_frames, open_writer, read_binary_header
+from .codec import COMPRESSORS, DELTA_MODES, Codec
+from .compare import DEFAULT_CHUNK_FRAMES, compare_caches
+from .index import index_file_name, load_index
+from .instrument import Profiler
+from .lod import DEFAULT_RATIOS, build_lods, lod_file_name
+from .merge import merge_segments
+from .obj import DEFAULT_TOLERANCE, compare_rest, read_obj_vertices
+from .parallel import read_frames_parallel
+from .playback import open_cache
+from .precision import PRECISIONS, error_bound
+from .reader import PointBakeHeader, read_header
+from .retime import INTERPOLATIONS, frame_rate_times, retime_file
+from .stats import build_stats, load_stats, stats_file_name
+
+FORMATS = ("xml","pbk")
+
+
+def _is_binary(file_name : str) -> bool :
+	return file_name.lower().endswith(".pbk")
+
+
+def _header(file_name : str) -> Tuple[PointBakeHeader,Optional[BinaryHeader]] :
+	# read just the header, for binary files the BinaryHeader is returned as well
+	if _is_binary(file_name) :
+		with open(file_name,"rb") as file :
+			binary=read_binary_header(file)
+		return binary.header,binary
+	return read_header(file_name),None
+
+
+def _frames(source,start : int,end : int) -> Iterator[Tuple[int,np.ndarray]] :
+	# the frames from start up to end, binary files seek straight to the first one
+	if isinstance(source,BinaryPointBake) :
+		for frame in range(max(start,source.header.start_frame),min(end,source.header.end_frame)) :
+			yield frame,source.frame(frame)
+		return
+	for frame,points in source :
+		if frame >= end :
+			break
+		if frame >= start :
+			yield frame,points
+
+
+def _codec(args : argparse.Namespace) -> Optional[Codec] :
+	if args.compressor is None and args.delta is None and not args.quantize :
+		return None
+	return Codec(args.delta or "previous",args.quantize,args.max_error,args.compressor or "zlib",args.level,
+							 args.chunk_frames)
+
+
+def output_name(file_name : str,args : argparse.Namespace,suffix : str="") -> str :
+	"""the file to write for an input file, -o is used as the file name when there is a single input and it
+	isn't a directory (or end with /), otherwise the output is placed in -o (or next to the input) with the extension of --to
+	Parameters :
+		file_name (str) the input file
+		args (Namespace) the parsed command line
+		suffix (str) added to the end of the base name
+	Returns :
+		str the output file name
+	"""
+	if args.output is not None and len(args.files) == 1 and not os.path.isdir(args.output) and not args.output.endswith(os.sep) :
+		return args.output
+	to=args.to or ("xml" if _is_binary(file_name) else "pbk")
+	base=os.path.splitext(os.path.basename(file_name))[0]+suffix+"."+to
+	directory=args.output if args.output is not None else os.path.dirname(file_name)
+	return os.path.join(directory,base)
+
+
+def _copy(file_name : str,out_name : str,args : argparse.Namespace,start : Optional[int]=None,
+					end : Optional[int]=None) -> PointBakeHeader :
+	# stream the frames from one file to another
+	if os.path.abspath(file_name) == os.path.abspath(out_name) :
+		raise ValueError(f"{file_name} would be overwritten")
+	with open_frames(file_name,profiler=args.profiler) as source :
+		header=PointBakeHeader(**vars(source.header))
+		start=header.start_frame if start is None else max(start,header.start_frame)
+		end=header.end_frame if end is None else min(end,header.end_frame)
+		header.start_frame=start
+		header.end_frame=max(start,end)
+		header.num_frames=header.end_frame-start
+		# xml is read as float64 so nothing is lost, the output then keeps the values as given unless --dtype
+		# asks for a smaller type
+		dtype=args.dtype or (source.dtype if _is_binary(file_name) else None)
+		with open_writer(out_name,header,dtype,_codec(args),args.float_format,stats=True,
+										 hold_tolerance=args.hold_tolerance,profiler=args.profiler) as writer :
+			for frame,points in _frames(source,start,end) :
+				writer.write_frame(frame,points)
+		return header
+
+
+def info(file_name : str,args : argparse.Namespace) -> List[str] :
+	"""the header and size of a file, only the header and statistics sidecar are read
+	Parameters :
+		file_name (str) the file
+		args (Namespace) the parsed command line
+	Returns :
+		list the lines to print
+	"""
+	size=os.path.getsize(file_name)
+	lines=[file_name]
+	header,binary=_header(file_name)
+	if binary is not None :
+		lines.append(f"  format       pbk {binary.dtype.name}")
+	else :
+		indexed="indexed" if os.path.exists(index_file_name(file_name)) else "no index"
+		lines.append(f"  format       xml {indexed}")
+	raw=header.num_frames*header.num_verts*3*4
+	lines+=[f"  mesh         {header.mesh_name}",
+					f"  verts        {header.num_verts}",
+					f"  frames       {header.start_frame} to {header.end_frame} ({header.num_frames})",
+					f"  translate    {header.translate_mode}",
+					f"  size         {size/1e6:.2f}MB {size/max(1,header.num_frames)/1e3:.1f}KB per frame"]
+	if raw :
+		lines.append(f"  ratio        {raw/size:.2f} of float32")
+	stats=load_stats(file_name,False)
+	if stats is not None and len(stats) :
+		lo,hi=stats.bounds()
+		lines.append(f"  bounds       {lo[0]:g} {lo[1]:g} {lo[2]:g} to {hi[0]:g} {hi[1]:g} {hi[2]:g}")
+		moving=stats.max_displacement[1:]
+		if len(moving) :
+			lines.append(f"  motion       max {moving.max():g} per frame {int(stats.static().sum())} static frames")
+		if stats.error is not None :
+			lines.append(f"  rounding     max error {stats.max_error():g} when written")
+	if binary is not None and binary.flags & FLAG_COMPRESSED :
+		with BinaryPointBake(file_name) as cache :
+			codec=cache.codec
+			lines.append(f"  codec        delta {codec.delta} quantize {codec.quantize} {codec.compressor} "
+									 f"{codec.chunk_frames} frame chunks max error {cache.max_error:g}")
+	return lines
+
+
+def convert(file_name : str,args : argparse.Namespace) -> List[str] :
+	"""convert a file to the format given by the output name
+	Parameters :
+		file_name (str) the file
+		args (Namespace) the parsed command line
+	Returns :
+		list the lines to print
+	"""
+	out_name=output_name(file_name,args)
+	start=time.perf_counter()
+	header=_copy(file_name,out_name,args)
+	elapsed=time.perf_counter()-start
+	return [f"{file_name} -> {out_name} {header.num_frames} frames {os.path.getsize(out_name)/1e6:.2f}MB {elapsed:.2f}s"]
+
+
+def slice_frames(file_name : str,args : argparse.Namespace) -> List[str] :
+	"""write the frames from --start up to --end to a new file
+	Parameters :
+		file_name (str) the file
+		args (Namespace) the parsed command line
+	Returns :
+		list the lines to print
+	"""
+	header=_header(file_name)[0]
+	start=header.start_frame if args.start is None else args.start
+	end=header.end_frame if args.end is None else args.end
+	out_name=output_name(file_name,args,f"_{start}_{end}")
+	written=_copy(file_name,out_name,args,start,end)
+	return [f"{file_name} -> {out_name} frames {written.start_frame} to {written.end_frame}"]
+
+
+def retime(file_name : str,args : argparse.Namespace) -> List[str] :
+	"""resample a file to another frame rate (--fps) or speed (--speed)
+	Parameters :
+		file_name (str) the file
+		args (Namespace) the parsed command line
+	Returns :
+		list the lines to print
+	"""
+	header,binary=_header(file_name)
+	if args.fps is not None :
+		times=frame_rate_times(header,*args.fps)
+	elif args.speed is not None and args.speed > 0.0 :
+		times=header.start_frame+np.arange(max(1,int(round(header.num_frames/args.speed))))*args.speed
+	else :
+		raise ValueError("retime needs --fps or a positive --speed")
+	out_name=output_name(file_name,args,"_retimed")
+	if os.path.abspath(file_name) == os.path.abspath(out_name) :
+		raise ValueError(f"{file_name} would be overwritten")
+	start=time.perf_counter()
+	written=retime_file(file_name,out_name,times,args.interpolation,dtype=args.dtype or (binary.dtype if binary else None),
+											codec=_codec(args),float_format=args.float_format,hold_tolerance=args.hold_tolerance,
+											profiler=args.profiler)
+	elapsed=time.perf_counter()-start
+	return [f"{file_name} -> {out_name} {header.num_frames} frames to {written.num_frames} {args.interpolation} {elapsed:.2f}s"]
+
+
+def merge(file_name : str,args : argparse.Namespace) -> List[str] :
+	"""join the segments given as the inputs into one file, unlike the other commands every input is
+	used for a single output
+	Parameters :
+		file_name (str) the file to write
+		args (Namespace) the parsed command line
+	Returns :
+		list the lines to print
+	"""
+	start=time.perf_counter()
+	header=merge_segments(args.files,file_name,args.dtype,profiler=args.profiler)
+	elapsed=time.perf_counter()-start
+	return [f"{len(args.files)} segments -> {file_name} frames {header.start_frame} to {header.end_frame} "
+					f"{os.path.getsize(file_name)/1e6:.2f}MB {elapsed:.2f}s"]
+
+
+def diff(file_name : str,args : argparse.Namespace) -> List[str] :
+	"""compare the second input with the first, like merge this uses both inputs for a single job
+	Parameters :
+		file_name (str) the reference file
+		args (Namespace) the parsed command line
+	Returns :
+		list the lines to print, the first is OK or FAIL
+	"""
+	other=args.files[1]
+	rest=None if args.obj is None else read_obj_vertices(args.obj)
+	start=time.perf_counter()
+	result=compare_caches(file_name,other,args.tolerance,args.stop_error,rest,args.chunk_frames,args.profiler)
+	elapsed=time.perf_counter()-start
+	status="OK" if result.matches() else "FAIL"
+	lines=[f"{status} {file_name} {other} {len(result)} frames max error {result.max():g} {elapsed:.2f}s"]
+	if not result.same_range() :
+		lines.append(f"  frames {result.header_a.start_frame} to {result.header_a.end_frame} and "
+								 f"{result.header_b.start_frame} to {result.header_b.end_frame}")
+	first=result.first_difference()
+	if first is not None :
+		# the frames compared are contiguous so the index of a frame is its offset from the first
+		for name,frame in (("first difference",first),("worst frame",result.worst_frame())) :
+			index=frame-int(result.frames[0])
+			lines.append(f"  {name:<16} {frame} max {result.max_error[index]:g} rms {result.rms_error[index]:g}")
+		lines+=[f"  vertex {vertex:<9} {error:g}" for vertex,error in result.worst_vertices(args.vertices) if error > args.tolerance]
+	if result.stopped :
+		lines.append(f"  stopped after frame {result.frames[-1] if len(result) else result.header_a.start_frame}, "
+								 "not every frame was compared")
+	if args.errors is not None :
+		result.save(args.errors)
+	return lines
+
+
+def lod(file_name : str,args : argparse.Namespace) -> List[str] :
+	"""build the reduced levels of a file
+	Parameters :
+		file_name (str) the file
+		args (Namespace) the parsed command line
+	Returns :
+		list the lines to print
+	"""
+	lods=build_lods(file_name,args.ratios,None,args.dtype or np.float32,_codec(args))
+	return [f"{file_name} {lods.num_verts} verts"]+[f"  {lod_file_name(file_name,i+1)} {len(level)} verts"
+																									for i,level in enumerate(lods.levels)]
+
+
+def stats(file_name : str,args : argparse.Namespace) -> List[str] :
+	"""read the frames of a file and write its statistics sidecar
+	Parameters :
+		file_name (str) the file
+		args (Namespace) the parsed command line
+	Returns :
+		list the lines to print
+	"""
+	frame_stats=build_stats(file_name)
+	return [f"{file_name} -> {stats_file_name(file_name)} {len(frame_stats)} frames "
+					f"{int(frame_stats.static(args.tolerance).sum())} static"]
+
+
+def quantization_error(file_name : str,source,magnitude : float) -> Tuple[Optional[float],str] :
+	"""the largest error the storage of a file could have added to the values it was given
+	Parameters :
+		file_name (str) the file
+		source the open file from open_frames
+		magnitude (float) the largest absolute value in the file
+	Returns :
+		(float,str) the error and how it was found, None if it can't be known
+	"""
+	stats=load_stats(file_name,False)
+	recorded=None if stats is None else stats.max_error()
+	codec=source.max_error if isinstance(source,BinaryPointBake) else 0.0
+	if recorded is not None :
+		return recorded+codec,"measured when written"
+	if isinstance(source,BinaryPointBake) :
+		return error_bound(magnitude,source.dtype)+codec,f"bound for {source.dtype.name} values up to {magnitude:g}"
+	return None,"not recorded"
+
+
+def validate(file_name : str,args : argparse.Namespace) -> List[str] :
+	"""read every frame and check it against the header, the quantization error of the file is reported
+	Parameters :
+		file_name (str) the file
+		args (Namespace) the parsed command line
+	Returns :
+		list the lines to print, the first is OK or FAIL
+	"""
+	problems=[]
+	count=0
+	magnitude=0.0
+	error=None
+	how=""
+	try :
+		with open_frames(file_name,profiler=args.profiler) as source :
+			header=source.header
+			if header.end_frame-header.start_frame != header.num_frames :
+				problems.append(f"EndFrame-StartFrame {header.end_frame-header.start_frame} != NumFrames {header.num_frames}")
+			expected=header.start_frame
+			for frame,points in source :
+				if frame != expected :
+					problems.append(f"frame {frame} found expected {expected}")
+				if not np.isfinite(points).all() :
+					problems.append(f"frame {frame} has values which are not finite")
+				elif len(points) :
+					magnitude=max(magnitude,float(np.abs(points).max()))
+				expected=frame+1
+				count+=1
+			if count != header.num_frames :
+				problems.append(f"{count} frames found header says {header.num_frames}")
+			error,how=quantization_error(file_name,source,magnitude)
+		if args.max_error is not None and error is not None and error > args.max_error :
+			problems.append(f"quantization error {error:g} is larger than {args.max_error:g}")
+		if args.obj is not None :
+			problems+=compare_rest(file_name,read_obj_vertices(args.obj),args.tolerance)
+	except (OSError,ValueError,IndexError) as exc :
+		problems.append(str(exc))
+	status="OK" if not problems else "FAIL"
+	lines=[f"{status} {file_name} {count} frames"]+[f"  {problem}" for problem in problems[:args.max_problems]]
+	if error is not None :
+		lines.append(f"  max quantization error {error:g} ({how})")
+	return lines
+
+
+def bench(file_name : str,args : argparse.Namespace) -> List[str] :
+	"""time reading a file sequentially and by random access
+	Parameters :
+		file_name (str) the file
+		args (Namespace) the parsed command line
+	Returns :
+		list the lines to print
+	"""
+	size=os.path.getsize(file_name)
+	lines=[file_name]
+
+	def report(name : str,frames : int,elapsed : float) -> None :
+		lines.append(f"  {name:<12} {frames/elapsed:10.1f} fps {size/elapsed/1e6:10.1f} MB/s {elapsed:8.3f}s")
+
+	start=time.perf_counter()
+	with open_frames(file_name) as source :
+		frames=sum(1 for _ in source)
+	report("sequential",frames,time.perf_counter()-start)
+	if not _is_binary(file_name) :
+		start=time.perf_counter()
+		frames=len(read_frames_parallel(file_name,args.workers)[1])
+		report("parallel",frames,time.perf_counter()-start)
+		# build the index first so the random reads are not timing the scan
+		load_index(file_name)
+	with open_cache(file_name) as cache :
+		numbers=np.random.default_rng(0).integers(cache.header.start_frame,max(cache.header.start_frame+1,cache.header.end_frame),
+																							args.samples)
+		start=time.perf_counter()
+		if cache.header.num_frames :
+			for frame in numbers.tolist() :
+				np.asarray(cache.frame(frame)).sum()
+		elapsed=time.perf_counter()-start
+		lines.append(f"  {'random':<12} {len(numbers)/elapsed:10.1f} fps")
+	return lines
+
+
+COMMANDS = {"info" : info,"convert" : convert,"slice" : slice_frames,"merge" : merge,"diff" : diff,"retime" : retime,"lod" : lod,"stats" : stats,
+						"validate" : validate,"bench" : bench}
+
+## the commands which use every input for one job
+SINGLE_JOB = ("merge","diff")
+
+
+def trace_name(file_name : str,args : argparse.Namespace) -> str :
+	"""the trace file for an input, --trace is used as given for a single input otherwise the input name is added
+	Parameters :
+		file_name (str) the input file
+		args (Namespace) the parsed command line
+	Returns :
+		str the json file to write
+	"""
+	if len(args.files) == 1 or args.command in SINGLE_JOB :
+		return args.trace
+	root,ext=os.path.splitext(args.trace)
+	return f"{root}.{os.path.basename(file_name)}{ext or '.json'}"
+
+
+def _run(command : str,file_name : str,args : argparse.Namespace) -> Tuple[bool,List[str]] :
+	# run a command catching the errors so one bad file doesn't stop the others, the profiler is made
+	# here as it can't be sent to the -j worker processes
+	profiler=Profiler(trace=args.trace is not None) if args.profile or args.trace is not None else None
+	args=argparse.Namespace(**vars(args),profiler=profiler)
+	try :
+		lines=COMMANDS[command](file_name,args)
+		success=not (command in ("validate","diff") and lines[0].startswith("FAIL"))
+	except (OSError,ValueError,IndexError) as error :
+		success,lines=False,[f"{file_name} : {error}"]
+	if profiler is not None :
+		profiler.stop()
+		if args.profile :
+			lines+=["  "+line for line in profiler.report()]
+		if args.trace is not None :
+			profiler.dump(trace_name(file_name,args))
+	return success,lines
+
+
+def _add_output_options(parser : argparse.ArgumentParser) -> None :
+	parser.add_argument("-o","--output",help="output file for a single input or the output directory")
+	parser.add_argument("--to",choices=FORMATS,help="output format when writing to a directory, the default is the other format")
+	parser.add_argument("--float-format",help="printf style format for xml values e.g. %%.6g, the default is exact")
+	parser.add_argument("--hold-tolerance",type=float,help="store frames within this of the one before as a reference, 0 for identical frames. "
+											"Only pointbake reads held frames, not ngl::NCCAPointBake")
+	_add_codec_options(parser)
+
+
+def _add_codec_options(parser : argparse.ArgumentParser) -> None :
+	parser.add_argument("--dtype",choices=tuple(PRECISIONS),help="pbk storage type or the precision xml values are rounded to, "
+											"the default keeps the values as they are (float64 for pbk from xml)")
+	parser.add_argument("--compressor",choices=COMPRESSORS,help="compress the pbk data")
+	parser.add_argument("--delta",choices=DELTA_MODES,help="pbk delta mode")
+	parser.add_argument("--quantize",action="store_true",help="quantize the pbk data to 16 bits")
+	parser.add_argument("--max-error",type=float,help="fail if quantizing moves a vertex further than this")
+	parser.add_argument("--level",type=int,help="compression level")
+	parser.add_argument("--chunk-frames",type=int,default=16,help="frames in each compressed chunk")
+
+
+def build_parser() -> argparse.ArgumentParser :
+	"""
+	Returns :
+		ArgumentParser the parser for the command line
+	"""
+	parser=argparse.ArgumentParser(prog="pointbake",description="inspect and convert NCCA PointBake files")
+	parser.add_argument("-j","--jobs",type=int,default=1,help="number of files to process at once")
+	parser.add_argument("--profile",action="store_true",help="print the time spent in each stage for each file")
+	parser.add_argument("--trace",help="write the time of every stage to this json file, viewable in chrome://tracing")
+	commands=parser.add_subparsers(dest="command",required=True)
+	command=commands.add_parser("info",help="print the header of each file")
+	command.add_argument("files",nargs="+")
+	command=commands.add_parser("convert",help="convert between xml and pbk")
+	command.add_argument("files",nargs="+")
+	_add_output_options(command)
+	command=commands.add_parser("slice",help="write a frame range to a new file")
+	command.add_argument("files",nargs="+")
+	command.add_argument("--start",type=int,help="first frame")
+	command.add_argument("--end",type=int,help="end frame (exclusive)")
+	_add_output_options(command)
+	command=commands.add_parser("merge",help="join frame range segments into one file")
+	command.add_argument("files",nargs="+",help="the segments in any order")
+	command.add_argument("-o","--output",required=True,help="the file to write, .pbk or .xml")
+	command.add_argument("--dtype",choices=tuple(PRECISIONS),help="storage type, the default keeps that of the segments")
+	command=commands.add_parser("diff",help="compare two caches frame by frame")
+	command.add_argument("files",nargs=2,help="the reference cache then the cache compared with it")
+	command.add_argument("--tolerance",type=float,default=0.0,help="frames with no vertex further than this from the reference are the same")
+	command.add_argument("--stop-error",type=float,help="stop at the first frame with a vertex further apart than this")
+	command.add_argument("--obj",help="rest positions for comparing a relative cache with an absolute one")
+	command.add_argument("--chunk-frames",type=int,default=DEFAULT_CHUNK_FRAMES,help="frames compared at once")
+	command.add_argument("--vertices",type=int,default=5,help="vertices which differ most to list")
+	command.add_argument("--errors",help="write the per frame and per vertex errors to this .npz file")
+	command=commands.add_parser("retime",help="resample to another frame rate or speed")
+	command.add_argument("files",nargs="+")
+	command.add_argument("--fps",type=float,nargs=2,metavar=("SOURCE","TARGET"),help="convert between frame rates e.g. 24 30")
+	command.add_argument("--speed",type=float,help="play back this many times faster, 0.5 is twice as many frames")
+	command.add_argument("--interpolation",choices=INTERPOLATIONS,default="linear",help="how frames are made between the stored ones")
+	_add_output_options(command)
+	command=commands.add_parser("lod",help="build reduced levels of detail for preview playback")
+	command.add_argument("files",nargs="+")
+	command.add_argument("--ratios",type=float,nargs="+",default=list(DEFAULT_RATIOS),
+											 help="fraction of the vertices kept by each level")
+	_add_codec_options(command)
+	command=commands.add_parser("stats",help="write the per frame bounds and motion of each file")
+	command.add_argument("files",nargs="+")
+	command.add_argument("--tolerance",type=float,default=0.0,help="frames moving less than this are reported as static")
+	command=commands.add_parser("validate",help="check every frame of each file")
+	command.add_argument("files",nargs="+")
+	command.add_argument("--max-problems",type=int,default=10,help="problems to list for each file")
+	command.add_argument("--obj",help="check the vertex count and first frame against this obj")
+	command.add_argument("--tolerance",type=float,default=DEFAULT_TOLERANCE,help="largest distance from the obj")
+	command.add_argument("--max-error",type=float,help="fail if rounding or quantizing may have moved a vertex further than this")
+	command=commands.add_parser("bench",help="time reading each file")
+	command.add_argument("files",nargs="+")
+	command.add_argument("--workers",type=int,help="processes for the parallel xml read")
+	command.add_argument("--samples",type=int,default=100,help="random frames to read")
+	return parser
+
+
+def main(argv : Optional[List[str]]=None) -> int :
+	"""
+	Parameters :
+		argv (list) the arguments, sys.argv is used if None
+	Returns :
+		int the exit status, 1 if any file failed
+	"""
+	args=build_parser().parse_args(argv)
+	output=getattr(args,"output",None)
+	if args.command in SINGLE_JOB :
+		success,lines=_run(args.command,output if args.command == "merge" else args.files[0],args)
+		print("\n".join(lines))
+		return 0 if success else 1
+	if output is not None and (len(args.files) > 1 or output.endswith(os.sep)) :
+		if os.path.isfile(output) :
+			print(f"{output} is a file, an output directory is needed for more than one input")
+			return 1
+		os.makedirs(output,exist_ok=True)
+	if args.jobs > 1 and len(args.files) > 1 :
+		with ProcessPoolExecutor(max_workers=args.jobs) as pool :
+			results=pool.map(_run,[args.command]*len(args.files),args.files,[args]*len(args.files))
+			results=list(results)
+	else :
+		results=[_run(args.command,file_name,args) for file_name in args.files]
+	ok=True
+	for success,lines in results :
+		ok=ok and success
+		print("\n".join(lines))
+	return 0 if ok else 1
+
+
+if __name__ == "__main__" :
+	sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Compression of PointBake frame data. Frames are grouped into chunks of chunk_frames which are encoded
+on their own so any frame can be decoded by reading only its chunk. Each chunk goes through
+	quantize  optional, positions are snapped to a 16 bit grid over the bounding box of the chunk, a
+	          vertex moves at most half the diagonal of a grid cell (grid_error)
+	delta     the integer values (the quantized grid or the raw float bits) are stored as a difference
+	          from the previous frame or from the rest pose, the integer arithmetic wraps so this step
+	          is exact
+	shuffle   the bytes of each value are split into planes so the mostly zero high bytes of the deltas
+	          are next to each other
+	compress  zlib or lzma from the standard library
+Without quantization the codec is lossless.
+"""
+
+import lzma
+import zlib
+from typing import Optional, Tuple
+
+import numpy as np
+
+DELTA_MODES = ("none","previous","rest")
+COMPRESSORS = ("none","zlib","lzma")
+## the number of steps in the quantization grid
+QUANTIZE_LEVELS = 65535
+
+
+def grid_error(step : np.ndarray) -> np.ndarray :
+	"""
+	Parameters :
+		step (ndarray) [...,3] step of the quantization grid on each axis
+	Returns :
+		ndarray the furthest a vertex can be from the nearest grid point, half the diagonal of a grid cell
+	"""
+	step=np.asarray(step,dtype=np.float64)
+	return np.sqrt((step*step).sum(axis=-1))*0.5
+
+
+def _int_type(dtype : np.dtype) -> np.dtype :
+	# unsigned integer type the same size as the float type so the bits can be viewed directly
+	return np.dtype(f"<u{np.dtype(dtype).itemsize}")
+
+
+class Codec() :
+	"""the settings used to encode the chunks of a cache"""
+
+	def __init__(self,delta : str="previous",quantize : bool=False,max_error : Optional[float]=None,
+							 compressor : str="zlib",level : Optional[int]=None,chunk_frames : int=16) -> None :
+		"""
+		Parameters :
+			delta (str) none, previous (each frame from the one before) or rest (each frame from the rest pose)
+			quantize (bool) quantize to 16 bits over the bounding box of each chunk
+			max_error (float) with quantize, raise a ValueError if a chunk can't be stored with every vertex
+				within this distance of where it was given
+			compressor (str) none, zlib or lzma
+			level (int) the compression level, None uses the compressor default
+			chunk_frames (int) number of frames in each independently decodable chunk
+		"""
+		if delta not in DELTA_MODES :
+			raise ValueError(f"unknown delta mode {delta} expected one of {DELTA_MODES}")
+		if compressor not in COMPRESSORS :
+			raise ValueError(f"unknown compressor {compressor} expected one of {COMPRESSORS}")
+		if chunk_frames < 1 :
+			raise ValueError("chunk_frames must be at least 1")
+		self.delta=delta
+		self.quantize=quantize
+		self.max_error=max_error
+		self.compressor=compressor
+		self.level=level
+		self.chunk_frames=chunk_frames
+
+	def _compress(self,data : bytes) -> bytes :
+		if self.compressor == "zlib" :
+			return zlib.compress(data,6 if self.level is None else self.level)
+		if self.compressor == "lzma" :
+			return lzma.compress(data,preset=6 if self.level is None else self.level)
+		return data
+
+	def _decompress(self,data : bytes) -> bytes :
+		if self.compressor == "zlib" :
+			return zlib.decompress(data)
+		if self.compressor == "lzma" :
+			return lzma.decompress(data)
+		return data
+
+	def encode(self,frames : np.ndarray,rest : Optional[np.ndarray]=None) -> Tuple[bytes,np.ndarray,np.ndarray] :
+		"""encode a chunk of frames
+		Parameters :
+			frames (ndarray) [frames,num_verts,3] array in the storage type
+			rest (ndarray) [num_verts,3] rest pose, needed for the rest delta mode
+		Returns :
+			(bytes,ndarray,ndarray) the encoded data and the per axis origin and step of the quantization grid
+			(zeros when not quantized)
+		"""
+		lo=np.zeros(3)
+		step=np.zeros(3)
+		if self.delta == "rest" and rest is None :
+			raise ValueError("the rest delta mode needs a rest pose")
+		if self.quantize :
+			values=frames.astype(np.float64)
+			bounds=values.reshape(-1,3)
+			if self.delta == "rest" :
+				bounds=np.concatenate([bounds,rest.reshape(-1,3)])
+			lo=bounds.min(axis=0)
+			step=(bounds.max(axis=0)-lo)/QUANTIZE_LEVELS
+			if self.max_error is not None and grid_error(step) > self.max_error :
+				raise ValueError(f"quantization error {grid_error(step)} is larger than {self.max_error}")
+			scale=np.where(step > 0.0,step,1.0)
+			ints=np.rint((values-lo)/scale).astype(np.uint16)
+			if self.delta == "rest" :
+				base=np.rint((rest-lo)/scale).astype(np.uint16)
+		else :
+			ints=np.ascontiguousarray(frames).view(_int_type(frames.dtype))
+			if self.delta == "rest" :
+				base=np.ascontiguousarray(rest,dtype=frames.dtype).view(ints.dtype)
+		if self.delta == "previous" :
+			deltas=ints.copy()
+			deltas[1:]-=ints[:-1]
+		elif self.delta == "rest" :
+			deltas=ints-base
+		else :
+			deltas=ints
+		# split the bytes into planes, for the deltas most of the high bytes are zero
+		planes=np.ascontiguousarray(deltas).view(np.uint8).reshape(-1,deltas.dtype.itemsize).T
+		return self._compress(planes.tobytes()),lo,step
+
+	def decode(self,data : bytes,shape : Tuple[int,int,int],dtype : np.dtype,lo : np.ndarray,step : np.ndarray,
+						 rest : Optional[np.ndarray]=None) -> np.ndarray :
+		"""decode a chunk of frames
+		Parameters :
+			data (bytes) the encoded chunk
+			shape (tuple) the [frames,num_verts,3] shape of the chunk
+			dtype (numpy dtype) the storage type of the frames
+			lo (ndarray) origin of the quantization grid
+			step (ndarray) step of the quantization grid
+			rest (ndarray) [num_verts,3] rest pose, needed for the rest delta mode
+		Returns :
+			ndarray [frames,num_verts,3] array of the storage type
+		"""
+		dtype=np.dtype(dtype)
+		int_type=np.dtype("<u2") if self.quantize else _int_type(dtype)
+		planes=np.frombuffer(self._decompress(data),dtype=np.uint8).reshape(int_type.itemsize,-1)
+		ints=np.ascontiguousarray(planes.T).view(int_type).reshape(shape)
+		if self.delta == "previous" :
+			ints=np.cumsum(ints,axis=0,dtype=int_type)
+		elif self.delta == "rest" :
+			if self.quantize :
+				scale=np.where(step > 0.0,step,1.0)
+				base=np.rint((rest-lo)/scale).astype(np.uint16)
+			else :
+				base=np.ascontiguousarray(rest,dtype=dtype).view(int_type)
+			ints=ints+base
+		if self.quantize :
+			return (lo+ints*step).astype(dtype)
+		return ints.view(dtype)
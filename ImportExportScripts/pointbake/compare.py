@@ -0,0 +1,211 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Compare two caches of the same mesh, for checking a re-bake, a conversion or a change to the exporter
+against a reference. Both files are streamed side by side and the distance between each pair of vertices
+is worked out for a block of frames at once, so memory use is a block of frames whatever the length of
+the caches. For each frame the largest and RMS distance are kept, and for each vertex the largest distance
+over all the frames so the parts of the mesh which differ can be found. The comparison can stop as soon
+as a frame is further apart than stop_error rather than reading the rest of a long cache.
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .binary import open_frames
+from .instrument import NULL_PROFILER, Profiler
+from .reader import PointBakeHeader, apply_offsets, is_relative
+
+## the frames compared at once
+DEFAULT_CHUNK_FRAMES = 16
+
+
+class CacheDiff() :
+	"""the differences between two caches over the frames both have"""
+
+	def __init__(self,header_a : PointBakeHeader,header_b : PointBakeHeader,frames : np.ndarray,max_error : np.ndarray,
+							 rms_error : np.ndarray,vertex_error : np.ndarray,tolerance : float=0.0,stopped : bool=False) -> None :
+		"""
+		Parameters :
+			header_a (PointBakeHeader) the header of the first cache
+			header_b (PointBakeHeader) the header of the second cache
+			frames (ndarray) the frame numbers compared
+			max_error (ndarray) largest distance between matching vertices on each frame
+			rms_error (ndarray) root mean square distance between matching vertices on each frame
+			vertex_error (ndarray) [num_verts] largest distance of each vertex over the frames compared
+			tolerance (float) frames with no vertex further apart than this are the same
+			stopped (bool) the comparison stopped early so not every frame was compared
+		"""
+		self.header_a=header_a
+		self.header_b=header_b
+		self.frames=frames
+		self.max_error=max_error
+		self.rms_error=rms_error
+		self.vertex_error=vertex_error
+		self.tolerance=tolerance
+		self.stopped=stopped
+
+	def __len__(self) -> int :
+		return len(self.frames)
+
+	def same_range(self) -> bool :
+		"""
+		Returns :
+			bool True if both caches have the same frame range
+		"""
+		return (self.header_a.start_frame,self.header_a.end_frame) == (self.header_b.start_frame,self.header_b.end_frame)
+
+	def different(self) -> np.ndarray :
+		"""
+		Returns :
+			ndarray bool flag for each frame compared, True if a vertex is further apart than the tolerance
+		"""
+		return self.max_error > self.tolerance
+
+	def first_difference(self) -> Optional[int] :
+		"""
+		Returns :
+			int the first frame further apart than the tolerance, None if every frame compared is the same
+		"""
+		different=np.flatnonzero(self.different())
+		return int(self.frames[different[0]]) if len(different) else None
+
+	def worst_frame(self) -> Optional[int] :
+		"""
+		Returns :
+			int the frame with the largest difference, None if no frames were compared
+		"""
+		return int(self.frames[np.argmax(self.max_error)]) if len(self.frames) else None
+
+	def worst_vertices(self,count : int=10) -> List[Tuple[int,float]] :
+		"""
+		Parameters :
+			count (int) the number of vertices wanted
+		Returns :
+			list (vertex,error) of the vertices which differ most, largest first
+		"""
+		count=min(count,len(self.vertex_error))
+		if count <= 0 :
+			return []
+		worst=np.argpartition(self.vertex_error,-count)[-count:]
+		worst=worst[np.argsort(self.vertex_error[worst])[::-1]]
+		return [(int(vertex),float(self.vertex_error[vertex])) for vertex in worst]
+
+	def max(self) -> float :
+		"""
+		Returns :
+			float the largest distance between matching vertices on any frame compared
+		"""
+		return float(self.max_error.max(initial=0.0))
+
+	def matches(self) -> bool :
+		"""
+		Returns :
+			bool True if the caches have the same frames and every frame is within the tolerance, a comparison
+			which stopped early never matches
+		"""
+		return self.same_range() and not self.stopped and self.first_difference() is None
+
+	def save(self,file_name : str) -> None :
+		"""write the per frame and per vertex errors to a numpy .npz file, e.g. to colour the mesh by error
+		Parameters :
+			file_name (str) the file to write
+		"""
+		with open(file_name,"wb") as file :
+			np.savez(file,frames=self.frames,max_error=self.max_error,rms_error=self.rms_error,
+							 vertex_error=self.vertex_error)
+
+
+def _block(source,start : int,end : int,rest : Optional[np.ndarray],chunk_frames : int) -> Iterator[np.ndarray] :
+	# [frames,num_verts,3] float64 blocks of the absolute frames from start up to end
+	frames=[]
+	for frame,points in source :
+		if frame >= end :
+			break
+		if frame < start :
+			continue
+		frames.append(apply_offsets(source.header,np.asarray(points,dtype=np.float64),rest))
+		if len(frames) == chunk_frames :
+			yield np.stack(frames)
+			frames=[]
+	if frames :
+		yield np.stack(frames)
+
+
+def compare_caches(file_a : str,file_b : str,tolerance : float=0.0,stop_error : Optional[float]=None,
+									 rest : Optional[np.ndarray]=None,chunk_frames : int=DEFAULT_CHUNK_FRAMES,
+									 profiler : Optional[Profiler]=None) -> CacheDiff :
+	"""compare the frames two caches both have, the caches can be in either format and stored at any precision
+	Parameters :
+		file_a (str) the first cache, usually the reference
+		file_b (str) the second cache
+		tolerance (float) frames with no vertex further apart than this are the same
+		stop_error (float) stop at the first frame with a vertex further apart than this, None compares every frame
+		rest (ndarray) [num_verts,3] rest positions, needed to compare a relative cache with an absolute one
+		chunk_frames (int) the frames compared at once
+		profiler (Profiler) time the read and compare stages
+	Returns :
+		CacheDiff the differences, a ValueError is raised if the caches are of different vertex counts or
+		one is relative and the other not without rest positions
+	"""
+	profiler=profiler or NULL_PROFILER
+	with open_frames(file_a,profiler=profiler) as source_a, open_frames(file_b,profiler=profiler) as source_b :
+		header_a=source_a.header
+		header_b=source_b.header
+		if header_a.num_verts != header_b.num_verts :
+			raise ValueError(f"{file_a} has {header_a.num_verts} verts and {file_b} has {header_b.num_verts}")
+		if is_relative(header_a) != is_relative(header_b) and rest is None :
+			raise ValueError(f"{file_a} is {header_a.translate_mode} and {file_b} is {header_b.translate_mode}, "
+											 "rest positions are needed to compare them")
+		if is_relative(header_a) == is_relative(header_b) :
+			# two relative caches are compared by their offsets
+			rest=None
+		start=max(header_a.start_frame,header_b.start_frame)
+		end=max(start,min(header_a.end_frame,header_b.end_frame))
+		max_error=[]
+		rms_error=[]
+		vertex_error=np.zeros(header_a.num_verts)
+		stopped=False
+		for block_a,block_b in zip(_block(source_a,start,end,rest,chunk_frames),_block(source_b,start,end,rest,chunk_frames)) :
+			with profiler.stage("compare") :
+				count=min(len(block_a),len(block_b))
+				moved=block_a[:count]-block_b[:count]
+				distance=np.sqrt(np.einsum("fvi,fvi->fv",moved,moved))
+				if header_a.num_verts :
+					frame_max=distance.max(axis=1)
+					frame_rms=np.sqrt((distance*distance).mean(axis=1))
+				else :
+					frame_max=frame_rms=np.zeros(count)
+				if stop_error is not None and (frame_max > stop_error).any() :
+					# keep the frames up to the one which went past stop_error
+					count=int(np.argmax(frame_max > stop_error))+1
+					frame_max,frame_rms,distance=frame_max[:count],frame_rms[:count],distance[:count]
+					stopped=True
+				if len(distance) :
+					np.maximum(vertex_error,distance.max(axis=0),out=vertex_error)
+				max_error.append(frame_max)
+				rms_error.append(frame_rms)
+			profiler.count("frames compared",count)
+			if stopped :
+				break
+	max_error=np.concatenate(max_error) if max_error else np.zeros(0)
+	rms_error=np.concatenate(rms_error) if rms_error else np.zeros(0)
+	frames=np.arange(start,start+len(max_error),dtype=np.int64)
+	stopped=stopped or len(frames) < end-start
+	return CacheDiff(header_a,header_b,frames,max_error,rms_error,vertex_error,tolerance,stopped)
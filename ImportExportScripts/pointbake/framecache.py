@@ -0,0 +1,202 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Keeps recently used frames in memory for interactive playback. Decoded frames are held in a least
+recently used cache limited by a byte budget and a background thread reads the next few frames in the
+direction of play while the caller is drawing the current one, so playing or scrubbing back and forth
+over a range only waits on the disk the first time. Only one frame is read from the source at a time
+as the readers share a file handle.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Set
+
+import numpy as np
+
+## the default memory budget for the decoded frames
+DEFAULT_MAX_BYTES = 256*1024*1024
+## the default number of frames read ahead of the one asked for
+DEFAULT_PREFETCH = 4
+
+
+class FrameCache() :
+	"""wraps a cache opened with open_cache, frame(number) returns the same data but from memory when it can"""
+
+	def __init__(self,source,max_bytes : int=DEFAULT_MAX_BYTES,prefetch : int=DEFAULT_PREFETCH) -> None :
+		"""
+		Parameters :
+			source the cache to read from, anything with a header and a frame(number) method
+			max_bytes (int) the most memory the decoded frames can use, at least one frame is always kept
+			prefetch (int) number of frames to read ahead in the direction of play, 0 turns off the thread
+		"""
+		self.source=source
+		self.header=source.header
+		self.max_bytes=max_bytes
+		self.prefetch=prefetch
+		self._frames : "OrderedDict[int,np.ndarray]"=OrderedDict()
+		self._bytes=0
+		self._prefetched : Set[int]=set()
+		self._pending : Set[int]=set()
+		self._wanted : List[int]=[]
+		self._last=None
+		self._direction=1
+		self._closed=False
+		self._condition=threading.Condition()
+		self._read_lock=threading.Lock()
+		self.hits=0
+		self.misses=0
+		self.prefetch_hits=0
+		self.prefetch_reads=0
+		self.evictions=0
+		self.miss_time=0.0
+		self.max_miss_time=0.0
+		self._thread=None
+		if prefetch > 0 :
+			self._thread=threading.Thread(target=self._run,name="PointBakePrefetch",daemon=True)
+			self._thread.start()
+
+	def _read(self,frame : int) -> np.ndarray :
+		# copy so memory mapped frames are really read and the budget reflects the memory used
+		with self._read_lock :
+			return np.array(self.source.frame(frame))
+
+	def _store(self,frame : int,points : np.ndarray) -> None :
+		# called with the condition held
+		self._frames[frame]=points
+		self._bytes+=points.nbytes
+		while self._bytes > self.max_bytes and len(self._frames) > 1 :
+			old,data=self._frames.popitem(last=False)
+			self._bytes-=data.nbytes
+			self._prefetched.discard(old)
+			self.evictions+=1
+
+	def _run(self) -> None :
+		while True :
+			with self._condition :
+				while not self._wanted and not self._closed :
+					self._condition.wait()
+				if self._closed :
+					return
+				frame=self._wanted.pop(0)
+				if frame in self._frames or frame in self._pending :
+					continue
+				self._pending.add(frame)
+			try :
+				points=self._read(frame)
+			except (OSError,ValueError,IndexError) :
+				points=None
+			with self._condition :
+				self._pending.discard(frame)
+				if points is not None and not self._closed :
+					self._store(frame,points)
+					self._prefetched.add(frame)
+					self.prefetch_reads+=1
+				self._condition.notify_all()
+
+	def _schedule(self,frame : int) -> None :
+		# called with the condition held, ask for the frames after this one in the direction of play
+		if self._last is not None and frame != self._last :
+			self._direction=1 if frame > self._last else -1
+		self._last=frame
+		if self._thread is None :
+			return
+		ahead=[frame+self._direction*i for i in range(1,self.prefetch+1)]
+		self._wanted=[n for n in ahead if self.header.start_frame <= n < self.header.end_frame and n not in self._frames]
+		if self._wanted :
+			self._condition.notify_all()
+
+	def frame(self,frame : int) -> np.ndarray :
+		"""get the data for a frame number
+		Parameters :
+			frame (int) the frame number
+		Returns :
+			ndarray [num_verts,3] the frame data, this is shared with the cache so should not be changed
+		"""
+		with self._condition :
+			# the prefetch thread may be reading it already
+			while frame in self._pending :
+				self._condition.wait()
+			points=self._frames.get(frame)
+			if points is not None :
+				self._frames.move_to_end(frame)
+				self.hits+=1
+				if frame in self._prefetched :
+					self.prefetch_hits+=1
+					self._prefetched.discard(frame)
+				self._schedule(frame)
+				return points
+			self._pending.add(frame)
+			self._schedule(frame)
+		start=time.perf_counter()
+		try :
+			points=self._read(frame)
+		except BaseException :
+			with self._condition :
+				self._pending.discard(frame)
+				self._condition.notify_all()
+			raise
+		elapsed=time.perf_counter()-start
+		with self._condition :
+			self._pending.discard(frame)
+			self.misses+=1
+			self.miss_time+=elapsed
+			self.max_miss_time=max(self.max_miss_time,elapsed)
+			self._store(frame,points)
+			self._condition.notify_all()
+		return points
+
+	def counters(self) -> Dict[str,float] :
+		"""
+		Returns :
+			dict the hit and miss counts, the time spent waiting on misses and the memory in use
+		"""
+		with self._condition :
+			lookups=self.hits+self.misses
+			return {"hits" : self.hits,"misses" : self.misses,"hit_rate" : self.hits/lookups if lookups else 0.0,
+							"prefetch_hits" : self.prefetch_hits,"prefetch_reads" : self.prefetch_reads,"evictions" : self.evictions,
+							"mean_miss_ms" : self.miss_time/self.misses*1e3 if self.misses else 0.0,
+							"max_miss_ms" : self.max_miss_time*1e3,"frames" : len(self._frames),"bytes" : self._bytes}
+
+	def clear(self) -> None :
+		"""drop all of the frames held"""
+		with self._condition :
+			self._frames.clear()
+			self._prefetched.clear()
+			self._bytes=0
+
+	def close(self) -> None :
+		"""stop the prefetch thread and close the source"""
+		with self._condition :
+			self._closed=True
+			self._condition.notify_all()
+		if self._thread is not None :
+			self._thread.join()
+			self._thread=None
+		self.clear()
+		self.source.close()
+
+	def __len__(self) -> int :
+		return len(self.source)
+
+	def __enter__(self) -> "FrameCache" :
+		return self
+
+	def __exit__(self,*args) -> None :
+		self.close()
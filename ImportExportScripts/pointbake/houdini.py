@@ -0,0 +1,76 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Cook function for the Houdini Python SOP created by NCCAPointBakeHouImport.py. The SOP reads the frame
+for the current time from the cache and sets all of the point positions in one call, so there are no
+channels or keyframes in the scene. hou is never imported here, the node and geometry are passed in so
+this can be run against a stand in.
+
+The Python SOP code is just
+	import pointbake.houdini
+	pointbake.houdini.cook(hou.pwd(),hou.frame())
+"""
+
+import numpy as np
+
+from .playback import OUT_OF_RANGE_MODES, CacheRegistry
+from .reader import is_relative
+from .retime import INTERPOLATIONS
+
+## the code placed in the Python SOP
+SOP_CODE = "import pointbake.houdini\npointbake.houdini.cook(hou.pwd(),hou.frame())\n"
+## names of the spare parameters added to the Python SOP
+CACHE_FILE_PARM = "cachefile"
+FRAME_OFFSET_PARM = "frameoffset"
+OUT_OF_RANGE_PARM = "outofrange"
+INTERPOLATION_PARM = "interpolation"
+
+## the caches are shared by all the SOPs in the session
+_caches = CacheRegistry()
+
+
+def cook(node,time : float) -> None :
+	"""set the point positions of the node's geometry from the cache
+	Parameters :
+		node (hou.SopNode) the Python SOP being cooked
+		time (float) the current frame
+	"""
+	file_name=node.evalParm(CACHE_FILE_PARM)
+	if not file_name :
+		return
+	# SOPs made before the interpolation parameter was added show the stored frames
+	interpolation=node.parm(INTERPOLATION_PARM)
+	interpolation=INTERPOLATIONS[interpolation.eval() if interpolation is not None else 0]
+	# the resampler is kept between cooks so frames are not read again for the next time
+	resampler=_caches.resampler(file_name,interpolation,OUT_OF_RANGE_MODES[node.evalParm(OUT_OF_RANGE_PARM)],
+															node.evalParm(FRAME_OFFSET_PARM))
+	cache=resampler.source
+	# sub frame times, such as motion blur samples, are interpolated between the stored frames
+	points=resampler.at(time)
+	if points is None :
+		return
+	geo=node.geometry()
+	num_points=geo.intrinsicValue("pointcount")
+	if num_points != cache.header.num_verts :
+		raise ValueError(f"{file_name} has {cache.header.num_verts} points the geometry has {num_points}")
+	points=np.asarray(points,dtype=np.float32)
+	if is_relative(cache.header) :
+		# relative caches are offsets from the rest mesh, which is the geometry coming into the SOP
+		rest=np.frombuffer(geo.pointFloatAttribValuesAsString("P"),dtype=np.float32).reshape(-1,3)
+		points=rest+points
+	geo.setPointFloatAttribValuesFromString("P",np.ascontiguousarray(points).tobytes())
@@ -0,0 +1,263 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Frame offset index for xml PointBake files. The byte offset and length of every <Frame> element is
+stored in a small sidecar file (foo.xml.pbidx) so any frame can be read with a single seek rather than
+parsing all the frames before it. The sidecar records the size and modification time of the xml file
+and is rebuilt if these no longer match.
+"""
+
+import os
+from typing import BinaryIO, Dict, Optional, Tuple
+
+import numpy as np
+
+from .reader import PointBakeHeader, apply_offsets, is_relative, parse_frame, parse_frame_tag, scan_frame_offsets
+from .stats import FrameStats, load_stats
+
+INDEX_EXTENSION = ".pbidx"
+INDEX_VERSION = 1
+
+
+def index_file_name(file_name : str) -> str :
+	"""
+	Parameters :
+		file_name (str) the xml file
+	Returns :
+		str the name of the sidecar index for the file
+	"""
+	return file_name+INDEX_EXTENSION
+
+
+class FrameIndex() :
+	"""the byte range of each frame in an xml file"""
+
+	def __init__(self,header : PointBakeHeader,frames : np.ndarray,offsets : np.ndarray,lengths : np.ndarray,
+							 source_size : int,source_mtime_ns : int) -> None :
+		"""
+		Parameters :
+			header (PointBakeHeader) the header of the xml file
+			frames (ndarray) the frame number of each frame in file order
+			offsets (ndarray) the byte offset of each <Frame> element
+			lengths (ndarray) the byte length of each <Frame> element
+			source_size (int) size of the xml file the index was built from
+			source_mtime_ns (int) modification time of the xml file the index was built from
+		"""
+		self.header=header
+		self.frames=frames
+		self.offsets=offsets
+		self.lengths=lengths
+		self.source_size=source_size
+		self.source_mtime_ns=source_mtime_ns
+		self._lookup : Dict[int,int]={frame : i for i,frame in enumerate(frames.tolist())}
+
+	def __len__(self) -> int :
+		return len(self.frames)
+
+	def position(self,frame : int) -> int :
+		"""
+		Parameters :
+			frame (int) the frame number
+		Returns :
+			int the position of the frame in the file
+		"""
+		try :
+			return self._lookup[frame]
+		except KeyError :
+			raise IndexError(f"frame {frame} is not in the cache") from None
+
+	def matches(self,file_name : str) -> bool :
+		"""check the index is still valid for a file
+		Parameters :
+			file_name (str) the xml file
+		Returns :
+			bool True if the file has the same size and modification time as when the index was built
+		"""
+		stat=os.stat(file_name)
+		return stat.st_size == self.source_size and stat.st_mtime_ns == self.source_mtime_ns
+
+	def save(self,index_name : str) -> None :
+		"""write the index to a sidecar file
+		Parameters :
+			index_name (str) the file to write
+		"""
+		with open(index_name,"wb") as file :
+			np.savez(file,version=INDEX_VERSION,mesh_name=self.header.mesh_name,
+							 header=np.array([self.header.num_verts,self.header.start_frame,self.header.end_frame,
+																self.header.num_frames],dtype=np.int64),
+							 translate_mode=self.header.translate_mode,frames=self.frames,offsets=self.offsets,
+							 lengths=self.lengths,source=np.array([self.source_size,self.source_mtime_ns],dtype=np.int64))
+
+	@classmethod
+	def load(cls,index_name : str) -> "FrameIndex" :
+		"""read an index from a sidecar file
+		Parameters :
+			index_name (str) the file to read
+		Returns :
+			FrameIndex the index
+		"""
+		with np.load(index_name) as data :
+			if int(data["version"]) > INDEX_VERSION :
+				raise ValueError(f"{index_name} is a newer index version than this reader supports")
+			num_verts,start_frame,end_frame,num_frames=data["header"].tolist()
+			header=PointBakeHeader(str(data["mesh_name"]),num_verts,start_frame,end_frame,num_frames,
+														 str(data["translate_mode"]))
+			source_size,source_mtime_ns=data["source"].tolist()
+			return cls(header,data["frames"],data["offsets"],data["lengths"],source_size,source_mtime_ns)
+
+
+def build_index(file_name : str,write : bool=True) -> FrameIndex :
+	"""scan an xml file and build the frame index
+	Parameters :
+		file_name (str) the xml file
+		write (bool) save the index to the sidecar file, a read only location is silently ignored
+	Returns :
+		FrameIndex the index
+	"""
+	stat=os.stat(file_name)
+	header,offsets,lengths=scan_frame_offsets(file_name)
+	frames=np.empty(len(offsets),dtype=np.int64)
+	positions : Dict[int,int]={}
+	with open(file_name,"rb") as file :
+		for i,offset in enumerate(offsets.tolist()) :
+			# the frame number is in the opening tag so we only need to read the start of each frame
+			file.seek(offset)
+			frames[i],hold=parse_frame_tag(file.read(128))
+			positions[int(frames[i])]=i
+			if hold is not None :
+				# a held frame points at the data of the frame it holds
+				if hold not in positions :
+					raise ValueError(f"{file_name} frame {frames[i]} holds frame {hold} which is not before it")
+				offsets[i]=offsets[positions[hold]]
+				lengths[i]=lengths[positions[hold]]
+	index=FrameIndex(header,frames,offsets,lengths,stat.st_size,stat.st_mtime_ns)
+	if write :
+		try :
+			index.save(index_file_name(file_name))
+		except OSError :
+			pass
+	return index
+
+
+def load_index(file_name : str,write : bool=True) -> FrameIndex :
+	"""get the index for an xml file, using the sidecar if it is valid or building it if not
+	Parameters :
+		file_name (str) the xml file
+		write (bool) save a rebuilt index to the sidecar file
+	Returns :
+		FrameIndex the index
+	"""
+	index_name=index_file_name(file_name)
+	if os.path.exists(index_name) :
+		try :
+			index=FrameIndex.load(index_name)
+			if index.matches(file_name) :
+				return index
+		except (OSError,ValueError,KeyError) :
+			pass
+	return build_index(file_name,write)
+
+
+class IndexedPointBake() :
+	"""random access to the frames of an xml file using the frame index, only the frames asked for
+	are read and parsed
+	"""
+
+	def __init__(self,file_name : str,dtype=np.float32,rest : Optional[np.ndarray]=None) -> None :
+		"""
+		Parameters :
+			file_name (str) the xml file to open
+			dtype (numpy dtype) the type of the arrays returned
+			rest (ndarray) rest positions for relative files, if not given relative files return the offsets
+		"""
+		self.file_name=file_name
+		self.dtype=dtype
+		self.index=load_index(file_name)
+		self.header=self.index.header
+		self.rest=None if rest is None else np.asarray(rest,dtype=dtype).reshape(self.header.num_verts,3)
+		self._file : Optional[BinaryIO]=open(file_name,"rb")
+
+	def __len__(self) -> int :
+		return len(self.index)
+
+	@property
+	def stats(self) -> Optional[FrameStats] :
+		"""the per frame statistics from the sidecar, None if there isn't an up to date one"""
+		return load_stats(self.file_name,False)
+
+	def frame(self,frame : int) -> np.ndarray :
+		"""read a single frame
+		Parameters :
+			frame (int) the frame number
+		Returns :
+			ndarray [num_verts,3] array of positions
+		"""
+		i=self.index.position(frame)
+		self._file.seek(int(self.index.offsets[i]))
+		points=parse_frame(self._file.read(int(self.index.lengths[i])),self.header.num_verts,self.dtype,
+											 is_relative(self.header))[1]
+		return apply_offsets(self.header,points,self.rest)
+
+	def frame_range(self,start : int,end : int) -> Tuple[np.ndarray,np.ndarray] :
+		"""read the frames from start up to but not including end with a single read
+		Parameters :
+			start (int) the first frame number
+			end (int) the end frame number (exclusive)
+		Returns :
+			(ndarray,ndarray) the frame numbers and a [frames,num_verts,3] array
+		"""
+		first=self.index.position(start)
+		last=self.index.position(end-1)
+		if last < first :
+			raise ValueError(f"frames {start} to {end} are not stored in order")
+		# held frames point back at earlier data so the range read may start before the first frame
+		offsets=self.index.offsets[first:last+1]
+		base=int(offsets.min())
+		self._file.seek(base)
+		data=self._file.read(int((offsets+self.index.lengths[first:last+1]).max())-base)
+		out=np.empty((last-first+1,self.header.num_verts,3),dtype=self.dtype)
+		for i in range(first,last+1) :
+			offset=int(self.index.offsets[i])-base
+			out[i-first]=parse_frame(data[offset:offset+int(self.index.lengths[i])],self.header.num_verts,self.dtype,
+															 is_relative(self.header))[1]
+		return self.index.frames[first:last+1],apply_offsets(self.header,out,self.rest)
+
+	def close(self) -> None :
+		if self._file is not None :
+			self._file.close()
+			self._file=None
+
+	def __enter__(self) -> "IndexedPointBake" :
+		return self
+
+	def __exit__(self,*args) -> None :
+		self.close()
+
+
+def read_frame(file_name : str,frame : int,dtype=np.float32,rest : Optional[np.ndarray]=None) -> np.ndarray :
+	"""read a single frame from an xml file by seeking straight to it
+	Parameters :
+		file_name (str) the xml file
+		frame (int) the frame number
+		dtype (numpy dtype) the type of the array returned
+		rest (ndarray) rest positions for relative files
+	Returns :
+		ndarray [num_verts,3] array of positions
+	"""
+	with IndexedPointBake(file_name,dtype,rest) as cache :
+		return cache.frame(frame)
@@ -0,0 +1,238 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Timing of the stages of an import or export so it is clear where the time goes on a real shot. The
+exporter, importers, readers and writers take an optional Profiler and time their stages with
+	with profiler.stage("parse",frame) :
+		...
+The time, count and longest call of each stage are kept along with the frames and bytes read and
+written (COUNTERS), from which the frames and MB per second are worked out. With trace=True every stage call is kept as
+well and dump writes them in the Chrome trace event format, which chrome://tracing or
+https://ui.perfetto.dev show as a timeline with a row per thread. NULL_PROFILER does nothing and is used
+when no profiler is given so the hooks cost next to nothing.
+
+Progress replaces per frame or per vertex UI updates, which can cost more than the work itself, with
+a callback made at most every interval seconds.
+"""
+
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+## the stages used by the exporter, importers and the core readers and writers
+STAGES = ("evaluate","fetch","format","write","queue","read","parse","apply")
+## the counters kept by the core readers and writers, the rates are reported for each direction
+COUNTERS = ("frames read","bytes read","frames written","bytes written")
+## the default time between progress callbacks in seconds
+DEFAULT_PROGRESS_INTERVAL = 0.5
+
+
+class _Stage() :
+	"""the context manager returned by Profiler.stage"""
+
+	__slots__ = ("profiler","name","frame","start")
+
+	def __init__(self,profiler : "Profiler",name : str,frame : Optional[int]) -> None :
+		self.profiler=profiler
+		self.name=name
+		self.frame=frame
+		self.start=0.0
+
+	def __enter__(self) -> "_Stage" :
+		self.start=time.perf_counter()
+		return self
+
+	def __exit__(self,*args) -> None :
+		self.profiler.record(self.name,time.perf_counter()-self.start,self.start,self.frame)
+
+
+class _NullStage() :
+	"""a shared context manager which does nothing, used when profiling is off"""
+
+	__slots__ = ()
+
+	def __enter__(self) -> "_NullStage" :
+		return self
+
+	def __exit__(self,*args) -> None :
+		pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Profiler() :
+	"""collects the stage timings and counters of an import or export, it can be shared by threads"""
+
+	def __init__(self,trace : bool=False,enabled : bool=True) -> None :
+		"""
+		Parameters :
+			trace (bool) keep every stage call so the timeline can be written with dump
+			enabled (bool) False makes every method do nothing
+		"""
+		self.enabled=enabled
+		self.trace=trace
+		## name : [calls,total seconds,longest call]
+		self.stages : Dict[str,List[float]]={}
+		self.counters : Dict[str,float]={}
+		self._events : List[tuple]=[]
+		self._lock=threading.Lock()
+		self.start_time=time.perf_counter()
+		self.end_time : Optional[float]=None
+
+	def stage(self,name : str,frame : Optional[int]=None) :
+		"""
+		Parameters :
+			name (str) the stage, usually one of STAGES
+			frame (int) the frame being worked on, kept in the trace
+		Returns :
+			a context manager timing the code it wraps
+		"""
+		if not self.enabled :
+			return _NULL_STAGE
+		return _Stage(self,name,frame)
+
+	def record(self,name : str,elapsed : float,start : Optional[float]=None,frame : Optional[int]=None) -> None :
+		"""add a timing measured elsewhere
+		Parameters :
+			name (str) the stage
+			elapsed (float) the time taken in seconds
+			start (float) perf_counter at the start, needed for the trace
+			frame (int) the frame being worked on
+		"""
+		if not self.enabled :
+			return
+		with self._lock :
+			entry=self.stages.get(name)
+			if entry is None :
+				self.stages[name]=[1,elapsed,elapsed]
+			else :
+				entry[0]+=1
+				entry[1]+=elapsed
+				entry[2]=max(entry[2],elapsed)
+			if self.trace and start is not None :
+				self._events.append((name,start,elapsed,threading.current_thread().name,frame))
+
+	def count(self,name : str,amount : float=1) -> None :
+		"""
+		Parameters :
+			name (str) the counter, usually one of COUNTERS
+			amount (float) the amount to add
+		"""
+		if not self.enabled :
+			return
+		with self._lock :
+			self.counters[name]=self.counters.get(name,0)+amount
+
+	def stop(self) -> None :
+		"""fix the end of the wall clock time, otherwise the rates are worked out up to now"""
+		self.end_time=time.perf_counter()
+
+	@property
+	def elapsed(self) -> float :
+		"""the wall clock time since the profiler was made"""
+		return (self.end_time or time.perf_counter())-self.start_time
+
+	def rate(self,name : str) -> float :
+		"""
+		Parameters :
+			name (str) the counter
+		Returns :
+			float the counter per second of wall clock time
+		"""
+		elapsed=self.elapsed
+		return self.counters.get(name,0)/elapsed if elapsed > 0.0 else 0.0
+
+	def summary(self) -> Dict[str,object] :
+		"""
+		Returns :
+			dict the wall time, each counter and its rate per second and the calls, total, mean and longest
+			time of each stage in milliseconds
+		"""
+		with self._lock :
+			stages={name : {"calls" : int(calls),"total_ms" : total*1e3,"mean_ms" : total/calls*1e3,"max_ms" : longest*1e3}
+							for name,(calls,total,longest) in self.stages.items()}
+			counters=dict(self.counters)
+		return {"elapsed_s" : self.elapsed,"counters" : counters,"rates" : {name : self.rate(name) for name in counters},
+						"stages" : stages}
+
+	def report(self) -> List[str] :
+		"""
+		Returns :
+			list lines describing where the time went, slowest stage first
+		"""
+		summary=self.summary()
+		rates=summary["rates"]
+		line=f"{summary['elapsed_s']:.3f}s"
+		for direction in ("read","written") :
+			if f"frames {direction}" in rates :
+				line+=f" {direction} {rates[f'frames {direction}']:.1f} fps {rates.get(f'bytes {direction}',0.0)/1e6:.1f} MB/s"
+		lines=[line]
+		elapsed=max(summary["elapsed_s"],1e-9)
+		for name,stage in sorted(summary["stages"].items(),key=lambda item : -item[1]["total_ms"]) :
+			lines.append(f"  {name:<10} {stage['total_ms']:10.1f}ms {stage['total_ms']/1e3/elapsed:6.1%} "
+									 f"{stage['calls']:8d} calls {stage['mean_ms']:8.3f}ms mean {stage['max_ms']:8.3f}ms max")
+		return lines
+
+	def dump(self,file_name : str) -> None :
+		"""write the summary and, with trace on, every stage call in the Chrome trace event format
+		Parameters :
+			file_name (str) the .json file to write
+		"""
+		with self._lock :
+			events=list(self._events)
+		threads={name : i for i,name in enumerate(sorted({event[3] for event in events}))}
+		trace=[{"name" : "thread_name","ph" : "M","pid" : 0,"tid" : tid,"args" : {"name" : name}} for name,tid in threads.items()]
+		for name,start,elapsed,thread,frame in events :
+			event={"name" : name,"ph" : "X","pid" : 0,"tid" : threads[thread],"ts" : (start-self.start_time)*1e6,"dur" : elapsed*1e6}
+			if frame is not None :
+				event["args"]={"frame" : frame}
+			trace.append(event)
+		with open(file_name,"w") as file :
+			json.dump({"summary" : self.summary(),"traceEvents" : trace,"displayTimeUnit" : "ms"},file)
+
+
+## a profiler which does nothing, used when none is given
+NULL_PROFILER = Profiler(enabled=False)
+
+
+class Progress() :
+	"""calls a callback with the work done so far at most every interval seconds, and always for the last item"""
+
+	def __init__(self,callback : Callable[[int,int],None],total : int,interval : float=DEFAULT_PROGRESS_INTERVAL) -> None :
+		"""
+		Parameters :
+			callback (callable) called with (done,total)
+			total (int) the amount of work
+			interval (float) the least time between callbacks in seconds
+		"""
+		self.callback=callback
+		self.total=total
+		self.interval=interval
+		self._next=0.0
+
+	def update(self,done : int) -> None :
+		"""
+		Parameters :
+			done (int) the work done so far
+		"""
+		now=time.perf_counter()
+		if now >= self._next or done >= self.total :
+			self._next=now+self.interval
+			self.callback(done,self.total)
@@ -0,0 +1,274 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Reduced level of detail copies of a cache for preview playback. The rest mesh is clustered on a voxel
+grid and the vertex nearest the centre of each cluster is kept, so a level is a subset of the vertices
+and every full vertex maps to one of them. The frames of each level are written to their own .pbk
+file next to the cache (foo.xml.lod1.pbk) and the vertex maps to foo.xml.pblod, so a preview reads
+only a fraction of the data and can be expanded back to the full vertex count if needed.
+"""
+
+import itertools
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .binary import BinaryPointBake, BinaryPointBakeWriter, open_frames
+from .codec import Codec
+from .reader import PointBakeHeader, is_relative
+
+LOD_EXTENSION = ".pblod"
+LOD_VERSION = 1
+## the default fraction of the vertices kept by each level
+DEFAULT_RATIOS = (0.25,0.0625)
+
+
+def lod_file_name(file_name : str,level : Optional[int]=None) -> str :
+	"""
+	Parameters :
+		file_name (str) the full cache
+		level (int) the level, None for the file holding the vertex maps
+	Returns :
+		str the name of the file for the level
+	"""
+	if level is None :
+		return file_name+LOD_EXTENSION
+	return f"{file_name}.lod{level}.pbk"
+
+
+def cluster_vertices(points : np.ndarray,count : int,iterations : int=8) -> Tuple[np.ndarray,np.ndarray] :
+	"""pick about count representative vertices by clustering the points on a voxel grid
+	Parameters :
+		points (ndarray) [num_verts,3] positions to cluster, usually the rest mesh
+		count (int) the number of vertices wanted, the grid is sized to get close to this
+		iterations (int) number of times the grid size is refined
+	Returns :
+		(ndarray,ndarray) the index of each representative vertex and the representative each vertex maps to
+	"""
+	points=np.asarray(points,dtype=np.float64)
+	num_verts=len(points)
+	count=max(1,min(count,num_verts))
+	lo=points.min(axis=0)
+	extent=points.max(axis=0)-lo
+	# flat meshes such as cloth only have extent on two axes
+	axes=extent > extent.max()*1e-6
+	if count == num_verts or not axes.any() :
+		return np.arange(num_verts,dtype=np.int64),np.arange(num_verts,dtype=np.int64)
+	cell=(np.prod(extent[axes])/count)**(1.0/axes.sum())
+	for _ in range(iterations) :
+		keys=np.floor((points-lo)/cell).astype(np.int64)
+		keys[:,~axes]=0
+		# a single integer per cell is much quicker to find the unique values of than the rows
+		cells=np.ravel_multi_index(keys.T,keys.max(axis=0)+1)
+		_,mapping,sizes=np.unique(cells,return_inverse=True,return_counts=True)
+		if abs(len(sizes)-count) <= count*0.05 :
+			break
+		cell*=(len(sizes)/count)**(1.0/axes.sum())
+	centres=np.zeros((len(sizes),3))
+	np.add.at(centres,mapping,points)
+	centres/=sizes[:,np.newaxis]
+	distance=((points-centres[mapping])**2).sum(axis=1)
+	# sort by cluster then distance so the first vertex of each cluster is the one nearest the centre
+	order=np.lexsort((distance,mapping))
+	first=np.ones(num_verts,dtype=bool)
+	first[1:]=mapping[order[1:]] != mapping[order[:-1]]
+	return order[first].astype(np.int64),mapping.astype(np.int64)
+
+
+class LevelOfDetail() :
+	"""the vertices kept by a level and the vertex map back to the full mesh"""
+
+	def __init__(self,vertices : np.ndarray,mapping : np.ndarray) -> None :
+		"""
+		Parameters :
+			vertices (ndarray) index in the full mesh of each vertex in the level
+			mapping (ndarray) for each full vertex the index of the level vertex it follows
+		"""
+		self.vertices=vertices
+		self.mapping=mapping
+
+	def __len__(self) -> int :
+		return len(self.vertices)
+
+	def reduce(self,points : np.ndarray) -> np.ndarray :
+		"""
+		Parameters :
+			points (ndarray) [...,num_verts,3] full positions
+		Returns :
+			ndarray [...,len(self),3] positions of the vertices in the level
+		"""
+		return points[...,self.vertices,:]
+
+	def expand(self,points : np.ndarray,rest : Optional[np.ndarray]=None) -> np.ndarray :
+		"""rebuild the full vertex count from a level, each vertex moves with the vertex it maps to
+		Parameters :
+			points (ndarray) [...,len(self),3] positions of the level
+			rest (ndarray) [num_verts,3] full rest mesh, if given each vertex keeps its offset from its
+				representative otherwise it takes the representative's position
+		Returns :
+			ndarray [...,num_verts,3] the full positions
+		"""
+		if rest is None :
+			return points[...,self.mapping,:]
+		rest=np.asarray(rest,dtype=points.dtype)
+		return rest+(points-rest[self.vertices])[...,self.mapping,:]
+
+
+class LODSet() :
+	"""the levels built for a cache, read from or written to the .pblod sidecar"""
+
+	def __init__(self,num_verts : int,levels : List[LevelOfDetail],source_size : int=0,source_mtime_ns : int=0) -> None :
+		"""
+		Parameters :
+			num_verts (int) the vertex count of the full cache
+			levels (list) the LevelOfDetail for level 1, 2 ...
+			source_size (int) size of the cache the levels were built from
+			source_mtime_ns (int) modification time of the cache the levels were built from
+		"""
+		self.num_verts=num_verts
+		self.levels=levels
+		self.source_size=source_size
+		self.source_mtime_ns=source_mtime_ns
+
+	def __len__(self) -> int :
+		return len(self.levels)
+
+	def level(self,level : int) -> LevelOfDetail :
+		"""
+		Parameters :
+			level (int) the level, 1 is the first reduced level
+		Returns :
+			LevelOfDetail the level
+		"""
+		if not 1 <= level <= len(self.levels) :
+			raise IndexError(f"level {level} is not in the range 1 to {len(self.levels)}")
+		return self.levels[level-1]
+
+	def matches(self,file_name : str) -> bool :
+		"""
+		Parameters :
+			file_name (str) the full cache
+		Returns :
+			bool True if the cache has the same size and modification time as when the levels were built
+		"""
+		stat=os.stat(file_name)
+		return stat.st_size == self.source_size and stat.st_mtime_ns == self.source_mtime_ns
+
+	def save(self,lod_name : str) -> None :
+		"""
+		Parameters :
+			lod_name (str) the file to write
+		"""
+		arrays={}
+		for i,level in enumerate(self.levels) :
+			arrays[f"vertices{i+1}"]=level.vertices
+			arrays[f"mapping{i+1}"]=level.mapping
+		with open(lod_name,"wb") as file :
+			np.savez(file,version=LOD_VERSION,num_verts=self.num_verts,num_levels=len(self.levels),
+							 source=np.array([self.source_size,self.source_mtime_ns],dtype=np.int64),**arrays)
+
+	@classmethod
+	def load(cls,lod_name : str) -> "LODSet" :
+		"""
+		Parameters :
+			lod_name (str) the file to read
+		Returns :
+			LODSet the levels
+		"""
+		with np.load(lod_name) as data :
+			if int(data["version"]) > LOD_VERSION :
+				raise ValueError(f"{lod_name} is a newer lod version than this reader supports")
+			levels=[LevelOfDetail(data[f"vertices{i}"],data[f"mapping{i}"]) for i in range(1,int(data["num_levels"])+1)]
+			source_size,source_mtime_ns=data["source"].tolist()
+			return cls(int(data["num_verts"]),levels,source_size,source_mtime_ns)
+
+
+def build_lods(file_name : str,ratios : Sequence[float]=DEFAULT_RATIOS,rest : Optional[np.ndarray]=None,
+							 dtype=np.float32,codec : Optional[Codec]=None) -> LODSet :
+	"""build the reduced levels for a cache and write them next to it, the cache is read once
+	Parameters :
+		file_name (str) the .xml or .pbk cache
+		ratios (sequence) the fraction of the vertices kept by each level
+		rest (ndarray) [num_verts,3] mesh to cluster, the first frame is used if not given. This is needed
+			for relative caches as their frames are offsets
+		dtype (numpy dtype) storage type of the level files
+		codec (Codec) compression for the level files
+	Returns :
+		LODSet the levels
+	"""
+	stat=os.stat(file_name)
+	with open_frames(file_name) as source :
+		header=source.header
+		frames=iter(source)
+		first=next(frames,None)
+		if rest is None :
+			if is_relative(header) :
+				raise ValueError(f"{file_name} is relative so the rest mesh is needed to build the levels")
+			if first is None :
+				raise ValueError(f"{file_name} has no frames")
+			rest=first[1]
+		rest=np.asarray(rest,dtype=np.float64).reshape(header.num_verts,3)
+		levels=[LevelOfDetail(*cluster_vertices(rest,int(round(header.num_verts*ratio)))) for ratio in ratios]
+		writers=[]
+		try :
+			for i,level in enumerate(levels) :
+				level_header=PointBakeHeader(**vars(header))
+				level_header.num_verts=len(level)
+				writers.append(BinaryPointBakeWriter(lod_file_name(file_name,i+1),level_header,dtype,codec))
+			if first is not None :
+				frames=itertools.chain([first],frames)
+			for frame,points in frames :
+				for writer,level in zip(writers,levels) :
+					writer.write_frame(frame,level.reduce(points))
+		finally :
+			for writer in writers :
+				writer.close()
+	lods=LODSet(header.num_verts,levels,stat.st_size,stat.st_mtime_ns)
+	lods.save(lod_file_name(file_name))
+	return lods
+
+
+def load_lods(file_name : str) -> LODSet :
+	"""read the levels built for a cache
+	Parameters :
+		file_name (str) the full cache
+	Returns :
+		LODSet the levels
+	"""
+	lods=LODSet.load(lod_file_name(file_name))
+	if not lods.matches(file_name) :
+		raise ValueError(f"the levels of detail for {file_name} are out of date, rebuild them")
+	return lods
+
+
+class LODPointBake(BinaryPointBake) :
+	"""read the frames of a reduced level, frames have len(lod) vertices, use lod.expand to get the full
+	vertex count back
+	"""
+
+	def __init__(self,file_name : str,level : int=1,rest : Optional[np.ndarray]=None,dtype=None) -> None :
+		"""
+		Parameters :
+			file_name (str) the full cache the levels were built for
+			level (int) the level to read, 1 is the first reduced level
+			rest (ndarray) [num_verts,3] full rest positions added to the frames of relative files
+			dtype (numpy dtype) the type of the frames returned, None is the storage type
+		"""
+		self.lod=load_lods(file_name).level(level)
+		super().__init__(lod_file_name(file_name,level),None if rest is None else self.lod.reduce(np.asarray(rest)),dtype)
@@ -0,0 +1,224 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Export a shot as frame range segments on several machines and join them back into a single cache. A
+segment is an ordinary cache whose header holds its own frame range (foo.0101-0201.pbk holds frames 101
+to 200) so it can be checked or played on its own. merge_segments checks the segments follow on from
+each other and are of the same mesh, then joins them without parsing any vertex data where it can
+	.pbk to .pbk   the stored bytes are copied, compressed chunks are not re-encoded
+	xml to xml     the <Frame> elements are copied
+anything else (mixed formats, different storage types or codecs) is streamed through a writer.
+Relative segments must all be exported from the same rest frame, which can't be checked here.
+"""
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .binary import BinaryPointBake, can_concatenate, concatenate_binary, open_frames, open_writer, read_binary_header
+from .playback import open_cache
+from .reader import PointBakeHeader, parse_frame_tag, read_header, scan_frame_offsets
+from .stats import FrameStats, load_stats, stats_file_name
+from .writer import format_header
+
+## the most bytes copied at once when joining xml files
+_COPY_SIZE = 1 << 24
+
+
+def split_frames(start_frame : int,end_frame : int,count : int) -> List[Tuple[int,int]] :
+	"""split a frame range into about equal segments, one for each worker
+	Parameters :
+		start_frame (int) the first frame of the shot
+		end_frame (int) the end frame of the shot (exclusive)
+		count (int) the number of segments wanted
+	Returns :
+		list the (start,end) of each segment, fewer than count if there are fewer frames
+	"""
+	count=max(1,min(count,end_frame-start_frame))
+	bounds=np.linspace(start_frame,end_frame,count+1).round().astype(int).tolist()
+	return [(start,end) for start,end in zip(bounds[:-1],bounds[1:]) if end > start]
+
+
+def segment_file_name(file_name : str,start_frame : int,end_frame : int) -> str :
+	"""
+	Parameters :
+		file_name (str) the name of the whole cache e.g. shot.pbk
+		start_frame (int) the first frame of the segment
+		end_frame (int) the end frame of the segment (exclusive)
+	Returns :
+		str the segment name e.g. shot.0101-0201.pbk
+	"""
+	root,ext=os.path.splitext(file_name)
+	return f"{root}.{start_frame:04d}-{end_frame:04d}{ext}"
+
+
+def _is_binary(file_name : str) -> bool :
+	return file_name.lower().endswith(".pbk")
+
+
+def _segment_header(file_name : str) -> PointBakeHeader :
+	if _is_binary(file_name) :
+		with open(file_name,"rb") as file :
+			return read_binary_header(file).header
+	return read_header(file_name)
+
+
+def check_segments(file_names : Sequence[str]) -> Tuple[List[str],PointBakeHeader] :
+	"""check segments can be joined, only the headers are read. A ValueError listing the problems is raised
+	if they are not contiguous or are of different meshes
+	Parameters :
+		file_names (sequence) the segments in any order
+	Returns :
+		(list,PointBakeHeader) the segments in frame order and the header of the joined cache
+	"""
+	if not file_names :
+		raise ValueError("no segments to merge")
+	segments=sorted(((_segment_header(file_name),file_name) for file_name in file_names),key=lambda item : item[0].start_frame)
+	first=segments[0][0]
+	problems=[]
+	previous=None
+	for header,file_name in segments :
+		if header.end_frame-header.start_frame != header.num_frames :
+			problems.append(f"{file_name} header has {header.num_frames} frames for the range {header.start_frame} to {header.end_frame}")
+		if header.num_verts != first.num_verts :
+			problems.append(f"{file_name} has {header.num_verts} verts the first segment has {first.num_verts}")
+		if header.mesh_name != first.mesh_name :
+			problems.append(f"{file_name} is of mesh {header.mesh_name} the first segment is of {first.mesh_name}")
+		if header.translate_mode != first.translate_mode :
+			problems.append(f"{file_name} is {header.translate_mode} the first segment is {first.translate_mode}")
+		if previous is not None and header.start_frame != previous[0].end_frame :
+			gap="overlaps" if header.start_frame < previous[0].end_frame else "leaves a gap after"
+			problems.append(f"{file_name} starts at frame {header.start_frame} which {gap} {previous[1]} ending at {previous[0].end_frame}")
+		previous=(header,file_name)
+	if problems :
+		raise ValueError("\n".join(problems))
+	header=PointBakeHeader(**vars(first))
+	header.end_frame=segments[-1][0].end_frame
+	header.num_frames=header.end_frame-header.start_frame
+	return [file_name for _,file_name in segments],header
+
+
+def _concatenate_xml(file_names : List[str],out_name : str,header : PointBakeHeader) -> None :
+	# copy the frame elements of each segment, the opening tags are read to check the frames are all there
+	with open(out_name,"wb") as out :
+		out.write(format_header(header).encode("utf-8"))
+		for file_name in file_names :
+			segment,offsets,lengths=scan_frame_offsets(file_name)
+			with open(file_name,"rb") as source :
+				for expected,offset in enumerate(offsets.tolist(),segment.start_frame) :
+					source.seek(offset)
+					frame=parse_frame_tag(source.read(128))[0]
+					if frame != expected :
+						raise ValueError(f"{file_name} has frame {frame} where frame {expected} was expected")
+				if len(offsets) != segment.num_frames :
+					raise ValueError(f"{file_name} has {len(offsets)} frames its header says {segment.num_frames}, was the export stopped?")
+				if len(offsets) :
+					start=int(offsets[0])
+					size=int(offsets[-1]+lengths[-1])-start
+					out.write(b"\t")
+					source.seek(start)
+					while size > 0 :
+						data=source.read(min(size,_COPY_SIZE))
+						out.write(data)
+						size-=len(data)
+					out.write(b"\n")
+		out.write(b"</NCCAPointBake>\n")
+
+
+def _stream(file_names : List[str],out_name : str,header : PointBakeHeader,dtype,stats : bool,profiler) -> None :
+	# read every frame and write it again, used when the segments can't be copied
+	with open_writer(out_name,header,dtype,stats=stats,profiler=profiler) as writer :
+		for file_name in file_names :
+			with open_frames(file_name,profiler=profiler) as source :
+				for frame,points in source :
+					writer.write_frame(frame,points)
+
+
+def _join_displacement(before : str,after : str) -> float :
+	# the largest distance a vertex moved from the last frame of one segment to the first of the next
+	with open_cache(before,np.float64) as first, open_cache(after,np.float64) as second :
+		moved=np.asarray(second.frame(second.header.start_frame))-np.asarray(first.frame(first.header.end_frame-1))
+	return float(np.sqrt((moved*moved).sum(axis=1).max())) if len(moved) else 0.0
+
+
+def _merge_stats(file_names : List[str],out_name : str) -> Optional[FrameStats] :
+	# join the statistics sidecars if every segment has an up to date one, the displacement of the first
+	# frame of each segment is worked out from the end of the segment before so joins aren't taken as cuts
+	parts=[load_stats(file_name,False) for file_name in file_names]
+	if any(part is None for part in parts) :
+		return None
+	displacement=np.concatenate([part.max_displacement for part in parts])
+	joined=[(file_name,start) for file_name,start,part in
+					zip(file_names,np.cumsum([0]+[len(part) for part in parts[:-1]]).tolist(),parts) if len(part)]
+	for (before,_),(after,start) in zip(joined[:-1],joined[1:]) :
+		displacement[start]=_join_displacement(before,after)
+	errors=[part.error for part in parts]
+	stat=os.stat(out_name)
+	stats=FrameStats(np.concatenate([part.frames for part in parts]),np.concatenate([part.lo for part in parts]),
+									 np.concatenate([part.hi for part in parts]),displacement,
+									 stat.st_size,stat.st_mtime_ns,
+									 None if all(error is None for error in errors) else
+									 np.concatenate([np.zeros(len(part)) if error is None else error for part,error in zip(parts,errors)]))
+	try :
+		stats.save(stats_file_name(out_name))
+	except OSError :
+		pass
+	return stats
+
+
+def merge_segments(file_names : Sequence[str],out_name : str,dtype=None,stats : bool=True,profiler=None) -> PointBakeHeader :
+	"""join segments exported separately into one cache, the format comes from the extension of out_name
+	Parameters :
+		file_names (sequence) the segments in any order
+		out_name (str) the cache to write, it must not be one of the segments
+		dtype (numpy dtype) the precision of the joined cache, None keeps that of the segments. Giving one the
+			segments aren't stored at means every frame is re-written
+		stats (bool) write the statistics sidecar, joined from those of the segments when they all have one
+		profiler (Profiler) times the read and write stages when the frames are streamed
+	Returns :
+		PointBakeHeader the header of the joined cache
+	"""
+	file_names,header=check_segments(file_names)
+	if any(os.path.abspath(file_name) == os.path.abspath(out_name) for file_name in file_names) :
+		raise ValueError(f"{out_name} is one of the segments")
+	copied=False
+	try :
+		if _is_binary(out_name) and all(_is_binary(file_name) for file_name in file_names) :
+			caches=[BinaryPointBake(file_name) for file_name in file_names]
+			try :
+				copied=can_concatenate(caches) and (dtype is None or np.dtype(dtype) == caches[0].dtype)
+				dtype=dtype or caches[0].dtype
+			finally :
+				for cache in caches :
+					cache.close()
+			if copied :
+				concatenate_binary(file_names,out_name,header)
+		elif not _is_binary(out_name) and dtype is None and not any(_is_binary(file_name) for file_name in file_names) :
+			_concatenate_xml(file_names,out_name,header)
+			copied=True
+		if not copied :
+			_stream(file_names,out_name,header,dtype,stats,profiler)
+	except BaseException :
+		# don't leave a partly written cache which looks complete
+		if os.path.exists(out_name) :
+			os.remove(out_name)
+		raise
+	if copied and stats :
+		_merge_stats(file_names,out_name)
+	return header
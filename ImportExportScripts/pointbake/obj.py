@@ -0,0 +1,103 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Read the vertex positions from an obj file and check they go with a PointBake cache before anything
+is imported. Only the v lines are read, all of them are converted in one go as with the xml frames.
+The check only reads the cache header and first frame so a wrong pairing is found in milliseconds.
+"""
+
+import re
+from typing import List
+
+import numpy as np
+
+from .binary import open_frames
+from .reader import is_relative
+
+_VERTEX_LINE_RE = re.compile(rb"^v[ \t]+([^\r\n]*)",re.M)
+## the default largest distance between the first frame and the obj
+DEFAULT_TOLERANCE = 1e-3
+
+
+def read_obj_vertices(file_name : str,dtype=np.float64) -> np.ndarray :
+	"""read the vertex positions from an obj file
+	Parameters :
+		file_name (str) the obj file
+		dtype (numpy dtype) the type of the array returned
+	Returns :
+		ndarray [num_verts,3] the positions in file order, which is the vertex order of the mesh when imported
+	"""
+	with open(file_name,"rb") as file :
+		lines=_VERTEX_LINE_RE.findall(file.read())
+	if not lines :
+		return np.empty((0,3),dtype=dtype)
+	values=b" ".join(lines).split()
+	if len(values) == len(lines)*3 :
+		return np.array(values,dtype=np.float64).reshape(-1,3).astype(dtype,copy=False)
+	# some files have a w or a colour after the position so only keep the first three values of each line
+	rows=[line.split()[:3] for line in lines]
+	if any(len(row) != 3 for row in rows) :
+		raise ValueError(f"{file_name} has a vertex without 3 values")
+	return np.array(rows,dtype=np.float64).astype(dtype,copy=False)
+
+
+def compare_rest(file_name : str,rest : np.ndarray,tolerance : float=DEFAULT_TOLERANCE) -> List[str] :
+	"""check a cache goes with a mesh, the vertex count must match and the first frame must be within the
+	tolerance of the rest positions (for relative files the first offsets must be within the tolerance of 0)
+	Parameters :
+		file_name (str) the .xml or .pbk cache
+		rest (ndarray) [num_verts,3] the positions of the mesh, e.g. from read_obj_vertices
+		tolerance (float) the largest distance allowed between the first frame and the mesh
+	Returns :
+		list the problems found, empty if the cache matches
+	"""
+	rest=np.asarray(rest,dtype=np.float64).reshape(-1,3)
+	with open_frames(file_name) as source :
+		header=source.header
+		if header.num_verts != len(rest) :
+			return [f"{file_name} has {header.num_verts} verts the mesh has {len(rest)}"]
+		first=next(iter(source),None)
+		if first is None :
+			return []
+		# copy while the file is open, binary frames are views of the memory map
+		frame,points=first[0],np.array(first[1],dtype=np.float64)
+	if is_relative(header) :
+		points=rest+points
+	distance=np.sqrt(((points-rest)**2).sum(axis=1))
+	moved=int((distance > tolerance).sum())
+	if moved == 0 :
+		return []
+	problems=[f"{file_name} frame {frame} differs from the mesh by up to {distance.max():g} at {moved} verts"]
+	# the same shape with the points in a different order points to a vertex order problem rather than
+	# the obj being exported at another frame
+	if np.allclose(np.sort(points,axis=0),np.sort(rest,axis=0),atol=tolerance) :
+		problems.append("the positions match in a different order, the vertex order of the mesh has changed")
+	return problems
+
+
+def check_obj(obj_name : str,file_name : str,tolerance : float=DEFAULT_TOLERANCE) -> None :
+	"""check an obj and a cache go together before importing them, a ValueError listing the problems is
+	raised if they don't
+	Parameters :
+		obj_name (str) the obj file
+		file_name (str) the .xml or .pbk cache
+		tolerance (float) the largest distance allowed between the first frame and the obj
+	"""
+	problems=compare_rest(file_name,read_obj_vertices(obj_name),tolerance)
+	if problems :
+		raise ValueError("\n".join(problems))
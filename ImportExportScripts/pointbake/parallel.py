@@ -0,0 +1,123 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Parse an xml PointBake file on several cores. Every <Frame> element can be decoded on its own so the
+file is split into chunks of whole frames at the byte offsets of the <Frame> tags. Each worker process
+parses its chunk straight into a shared memory [frames,verts,3] array so only the frame numbers are
+sent back to the parent, which hands back that array rather than a copy of it.
+"""
+
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .reader import PointBakeHeader, is_relative, parse_frame, parse_frame_tag, read_frames, scan_frame_offsets
+
+## files smaller than this are parsed in the calling process as starting workers costs more
+MIN_PARALLEL_SIZE = 1 << 24
+
+
+def _parse_chunk(file_name : str,shm_name : str,shape : Tuple[int,int,int],dtype : str,sparse : bool,first : int,
+								 offsets : np.ndarray,lengths : np.ndarray) -> List[int] :
+	"""worker to parse a run of frames into the shared array
+	Parameters :
+		file_name (str) the xml file
+		shm_name (str) name of the shared memory block holding the output array
+		shape (tuple) the shape of the output array
+		dtype (str) the output dtype
+		sparse (bool) frames may leave out vertices (relative files)
+		first (int) index in the output array of the first frame in this chunk
+		offsets (ndarray) byte offsets of the frames in the chunk
+		lengths (ndarray) byte lengths of the frames in the chunk
+	Returns :
+		list the frame number of each frame parsed and the frame it holds (None if it has its own data)
+	"""
+	# the pool workers share the parent's resource tracker so the parent unlinking the block is enough
+	shm=shared_memory.SharedMemory(name=shm_name)
+	try :
+		out=np.ndarray(shape,dtype=dtype,buffer=shm.buf)
+		base=int(offsets[0])
+		with open(file_name,"rb") as file :
+			file.seek(base)
+			data=file.read(int(offsets[-1]+lengths[-1])-base)
+		numbers=[]
+		for index,(offset,length) in enumerate(zip(offsets.tolist(),lengths.tolist())) :
+			start=offset-base
+			block=data[start:start+length]
+			frame,hold=parse_frame_tag(block)
+			# held frames may refer to another chunk so the parent copies them in
+			if hold is None :
+				out[first+index]=parse_frame(block,shape[1],dtype,sparse)[1]
+			numbers.append((frame,hold))
+		del out
+		return numbers
+	finally :
+		shm.close()
+
+
+def read_frames_parallel(file_name : str,workers : Optional[int]=None,dtype=np.float32,
+												 chunks_per_worker : int=4,rest : Optional[np.ndarray]=None) -> Tuple[PointBakeHeader,np.ndarray,np.ndarray] :
+	"""read a whole xml file using a pool of processes
+	Parameters :
+		file_name (str) the xml file to read
+		workers (int) number of processes to use, None uses all cores
+		dtype (numpy dtype) the type of the array returned
+		chunks_per_worker (int) how many chunks to give each worker, more chunks balances the load better
+		rest (ndarray) rest positions for relative files, if not given relative files return the offsets
+	Returns :
+		(PointBakeHeader,ndarray,ndarray) the header, the frame numbers and a [frames,num_verts,3] array, for
+		the parallel read this is the shared memory block the workers wrote to
+	"""
+	workers=workers or os.cpu_count() or 1
+	if workers == 1 or os.path.getsize(file_name) < MIN_PARALLEL_SIZE :
+		return read_frames(file_name,dtype,rest)
+	header,offsets,lengths=scan_frame_offsets(file_name)
+	dtype=np.dtype(dtype)
+	shape=(len(offsets),header.num_verts,3)
+	if len(offsets) == 0 :
+		return header,np.empty(0,dtype=np.int64),np.empty(shape,dtype)
+	shm=shared_memory.SharedMemory(create=True,size=max(1,int(np.prod(shape))*dtype.itemsize))
+	try :
+		num_chunks=min(len(offsets),workers*chunks_per_worker)
+		bounds=np.linspace(0,len(offsets),num_chunks+1).astype(np.int64)
+		with ProcessPoolExecutor(max_workers=workers) as pool :
+			futures=[pool.submit(_parse_chunk,file_name,shm.name,shape,dtype.str,is_relative(header),int(start),offsets[start:end],
+													 lengths[start:end]) for start,end in zip(bounds[:-1],bounds[1:])]
+			numbers=[frame for future in futures for frame in future.result()]
+	except BaseException :
+		shm.close()
+		raise
+	finally :
+		# only the workers needed the name, the block stays mapped here until it is closed
+		shm.unlink()
+	# the array is returned rather than a copy so the cache is only in memory once, the block is closed
+	# when the array and every view of it have been released
+	data=np.ndarray(shape,dtype=dtype,buffer=shm.buf)
+	weakref.finalize(data,shm.close)
+	positions={frame : i for i,(frame,_) in enumerate(numbers)}
+	for i,(frame,hold) in enumerate(numbers) :
+		if hold is not None :
+			data[i]=data[positions[hold]]
+	numbers=[frame for frame,_ in numbers]
+	if rest is not None and is_relative(header) :
+		data+=np.asarray(rest,dtype=dtype).reshape(header.num_verts,3)
+	return header,np.array(numbers,dtype=np.int64),data
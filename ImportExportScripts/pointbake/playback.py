@@ -0,0 +1,136 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Helpers for playing a cache back from disk, used by the Maya deformer and Houdini SOP so nothing has to
+be keyed. The frame lookup is pure python so it can be used and checked outside of the DCC.
+"""
+
+import math
+import os
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from .binary import BinaryPointBake
+from .index import IndexedPointBake
+from .lod import LODPointBake
+from .reader import PointBakeHeader
+
+## the ways a time outside of the cached range can be handled
+OUT_OF_RANGE_MODES = ("hold","loop","none")
+## the most resamplers a CacheRegistry keeps
+_MAX_RESAMPLERS = 64
+
+FrameSource = Union[BinaryPointBake,IndexedPointBake]
+
+
+def frame_for_time(time : float,header : PointBakeHeader,offset : float=0.0,mode : str="hold") -> Optional[int] :
+	"""find the stored frame to show at a scene time, the cache holds each frame until the next one
+	Parameters :
+		time (float) the scene time in frames
+		header (PointBakeHeader) the header of the cache
+		offset (float) shift applied to the cache, a value of 10 plays the first cache frame at start_frame+10
+		mode (str) what to do outside of the cache, hold the first / last frame, loop or none to return None
+	Returns :
+		int the frame number or None if there is no frame for the time
+	"""
+	if mode not in OUT_OF_RANGE_MODES :
+		raise ValueError(f"unknown out of range mode {mode} expected one of {OUT_OF_RANGE_MODES}")
+	if header.num_frames <= 0 :
+		return None
+	# a small tolerance as the time may come in as 9.999999 from the host
+	index=math.floor(time-offset-header.start_frame+1e-6)
+	if 0 <= index < header.num_frames :
+		return header.start_frame+index
+	if mode == "hold" :
+		return header.start_frame+min(max(index,0),header.num_frames-1)
+	if mode == "loop" :
+		return header.start_frame+index % header.num_frames
+	return None
+
+
+def open_cache(file_name : str,dtype=np.float32,lod : int=0) -> FrameSource :
+	"""open a cache for random access, binary files are memory mapped and xml files use the frame index
+	Parameters :
+		file_name (str) the .pbk or .xml file
+		dtype (numpy dtype) the type of the frames returned, binary frames stored as this type are views of the file
+		lod (int) read a reduced level built by build_lods, 0 is the full cache
+	Returns :
+		an object with a header attribute and a frame(number) method
+	"""
+	if lod > 0 :
+		return LODPointBake(file_name,lod,dtype=dtype)
+	if file_name.lower().endswith(".pbk") :
+		return BinaryPointBake(file_name,dtype=dtype)
+	return IndexedPointBake(file_name,dtype)
+
+
+class CacheRegistry() :
+	"""keeps caches open between evaluations, a cache is re-opened if the file on disk changes"""
+
+	def __init__(self) -> None :
+		self._caches : Dict[str,Tuple[Tuple[int,int],FrameSource]]={}
+		self._resamplers : Dict[Tuple[str,str,str,float],object]={}
+
+	def get(self,file_name : str) -> FrameSource :
+		"""
+		Parameters :
+			file_name (str) the cache file
+		Returns :
+			the open cache
+		"""
+		stat=os.stat(file_name)
+		key=(stat.st_size,stat.st_mtime_ns)
+		entry=self._caches.get(file_name)
+		if entry is None or entry[0] != key :
+			if entry is not None :
+				entry[1].close()
+			entry=(key,open_cache(file_name))
+			self._caches[file_name]=entry
+		return entry[1]
+
+	def resampler(self,file_name : str,interpolation : str="step",mode : str="hold",offset : float=0.0) :
+		"""a Resampler kept between evaluations so the frames one evaluation read are there for the next
+		Parameters :
+			file_name (str) the cache file
+			interpolation (str) one of INTERPOLATIONS
+			mode (str) one of OUT_OF_RANGE_MODES
+			offset (float) shift applied to the cache
+		Returns :
+			Resampler of the open cache, a new one is made when the cache is re-opened
+		"""
+		# imported here as retime uses this module for open_cache
+		from .retime import Resampler
+		cache=self.get(file_name)
+		key=(file_name,interpolation,mode,offset)
+		resampler=self._resamplers.get(key)
+		if resampler is None or resampler.source is not cache :
+			# drop those of caches which have been re-opened, and the oldest if an animated offset keeps making new ones
+			self._resamplers={other : kept for other,kept in self._resamplers.items() if kept.source is self._caches[other[0]][1]}
+			while len(self._resamplers) >= _MAX_RESAMPLERS :
+				del self._resamplers[next(iter(self._resamplers))]
+			resampler=Resampler(cache,interpolation,mode,offset)
+			self._resamplers[key]=resampler
+		return resampler
+
+	def clear(self) -> None :
+		"""close all of the open caches"""
+		for _,cache in self._caches.values() :
+			cache.close()
+		self._caches.clear()
+		self._resamplers.clear()
@@ -0,0 +1,112 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+The precisions a cache can be stored at. A frame is rounded to the chosen type with a single numpy cast,
+.pbk files store that type directly and xml files write the rounded values with just enough digits to
+read back to the same value, so a float32 xml file is about half the size of a full precision one.
+float16 keeps about 3 significant digits, fine for background caches within a few hundred units of the
+origin but not for hero meshes far from it.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+## the precisions supported, the name used on the command line and the storage type
+PRECISIONS = {"float16" : np.dtype("<f2"),"float32" : np.dtype("<f4"),"float64" : np.dtype("<f8")}
+## the significant digits needed for every value of the type to read back exactly
+_ROUND_TRIP_DIGITS = {2 : 5,4 : 9,8 : 17}
+
+
+def precision_dtype(precision) -> np.dtype :
+	"""
+	Parameters :
+		precision the name from PRECISIONS or a numpy dtype
+	Returns :
+		np.dtype the little endian storage type, a ValueError is raised if it isn't supported
+	"""
+	dtype=PRECISIONS.get(precision) if isinstance(precision,str) else None
+	if dtype is None :
+		try :
+			dtype=np.dtype(precision).newbyteorder("<")
+		except TypeError :
+			dtype=None
+	if dtype is None or dtype not in PRECISIONS.values() :
+		raise ValueError(f"unsupported PointBake precision {precision} expected one of {tuple(PRECISIONS)}")
+	return dtype
+
+
+def text_format(precision) -> Optional[str] :
+	"""
+	Parameters :
+		precision the name from PRECISIONS or a numpy dtype
+	Returns :
+		str printf style format writing values of the type with the fewest digits which read back exactly,
+		None for float64 as the writer's default already does this
+	"""
+	dtype=precision_dtype(precision)
+	if dtype.itemsize == 8 :
+		return None
+	return f"%.{_ROUND_TRIP_DIGITS[dtype.itemsize]}g"
+
+
+def round_points(points : np.ndarray,precision) -> np.ndarray :
+	"""round a frame to a precision, values too large for the type raise a ValueError rather than
+	silently becoming inf
+	Parameters :
+		points (ndarray) [num_verts,3] the positions
+		precision the name from PRECISIONS or a numpy dtype
+	Returns :
+		ndarray the contiguous rounded values, points itself if it is already of the type
+	"""
+	dtype=precision_dtype(precision)
+	points=np.asarray(points)
+	if points.dtype == dtype :
+		return np.ascontiguousarray(points)
+	with np.errstate(over="ignore") :
+		rounded=np.ascontiguousarray(points,dtype=dtype)
+	if dtype.itemsize < points.dtype.itemsize and not np.isfinite(rounded).all() and np.isfinite(points).all() :
+		raise ValueError(f"values up to {np.abs(points).max():g} are too large for {dtype.name}, the largest is {np.finfo(dtype).max:g}")
+	return rounded
+
+
+def rounding_error(points : np.ndarray,rounded : np.ndarray) -> float :
+	"""
+	Parameters :
+		points (ndarray) the values before rounding
+		rounded (ndarray) the values after rounding
+	Returns :
+		float the largest distance a vertex moved, the same measure as compare_caches
+	"""
+	if rounded is points or len(points) == 0 :
+		return 0.0
+	moved=(np.asarray(points,dtype=np.float64)-rounded).reshape(-1,3)
+	return float(np.sqrt((moved*moved).sum(axis=1)).max())
+
+
+def error_bound(magnitude : float,precision) -> float :
+	"""the furthest a vertex with values within magnitude of the origin can move when rounded to a precision
+	Parameters :
+		magnitude (float) the largest absolute value stored
+		precision the name from PRECISIONS or a numpy dtype
+	Returns :
+		float half the spacing of the type at magnitude on each of the three axes, as a distance
+	"""
+	dtype=precision_dtype(precision)
+	magnitude=min(abs(magnitude),float(np.finfo(dtype).max))
+	return float(np.spacing(dtype.type(magnitude)))*0.5*np.sqrt(3.0)
@@ -0,0 +1,360 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Streaming reader for the xml based NCCA PointBake format. This has no dependency on Maya or
+Houdini so can be used from any python with numpy. The file is always machine generated so rather
+than using a sax parser (which calls back for every tag and character run) we scan the raw bytes a
+<Frame> block at a time and convert all the vertex data for that frame in one go.
+"""
+
+import mmap
+import re
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .instrument import NULL_PROFILER, Profiler
+
+## size of each read from the file when streaming frames
+READ_SIZE = 1 << 22
+
+## only the header tags are matched, a file with no frames would otherwise match the whole root element
+_HEADER_RE = re.compile(rb"<(MeshName|NumVerts|StartFrame|EndFrame|NumFrames|TranslateMode)>\s*(.*?)\s*</\1>", re.S)
+_FRAME_RE = re.compile(rb'<Frame\s+number="([^"]+)"(?:\s+hold="([^"]+)")?\s*>')
+_VERTEX_RE = re.compile(rb'<Vertex\s+number="(\d+)"[^>]*>([^<]*)</Vertex>')
+_FRAME_START = b"<Frame"
+_FRAME_END = b"</Frame>"
+
+
+class PointBakeHeader() :
+	"""the header data stored at the top of a PointBake file"""
+
+	def __init__(self,mesh_name : str="",num_verts : int=0,start_frame : int=0,end_frame : int=0,
+							 num_frames : int=0,translate_mode : str="absolute") -> None :
+		"""
+		Parameters :
+			mesh_name (str) the name of the mesh the data was baked from
+			num_verts (int) the number of vertices stored for each frame
+			start_frame (int) the first frame in the file
+			end_frame (int) the end frame written by the exporter (exclusive)
+			num_frames (int) the number of frames stored
+			translate_mode (str) either absolute or relative
+		"""
+		self.mesh_name=mesh_name
+		self.num_verts=num_verts
+		self.start_frame=start_frame
+		self.end_frame=end_frame
+		self.num_frames=num_frames
+		self.translate_mode=translate_mode
+
+	def __repr__(self) -> str :
+		return (f"PointBakeHeader(mesh_name={self.mesh_name!r}, num_verts={self.num_verts}, "
+						f"start_frame={self.start_frame}, end_frame={self.end_frame}, "
+						f"num_frames={self.num_frames}, translate_mode={self.translate_mode!r})")
+
+	def __eq__(self,other : object) -> bool :
+		if not isinstance(other,PointBakeHeader) :
+			return NotImplemented
+		return vars(self)==vars(other)
+
+
+def _to_int(value : bytes) -> int :
+	# the exporter writes whatever the frame range was, which may be a float such as 1.0
+	return int(float(value))
+
+
+def parse_header(data : bytes) -> PointBakeHeader :
+	"""parse the header elements from the start of a file
+	Parameters :
+		data (bytes) the file data up to (but not including) the first <Frame> tag
+	Returns :
+		PointBakeHeader the parsed header
+	"""
+	header=PointBakeHeader()
+	for tag,value in _HEADER_RE.findall(data) :
+		if tag == b"MeshName" :
+			header.mesh_name=value.decode("utf-8")
+		elif tag == b"NumVerts" :
+			header.num_verts=_to_int(value)
+		elif tag == b"StartFrame" :
+			header.start_frame=_to_int(value)
+		elif tag == b"EndFrame" :
+			header.end_frame=_to_int(value)
+		elif tag == b"NumFrames" :
+			header.num_frames=_to_int(value)
+		elif tag == b"TranslateMode" :
+			header.translate_mode=value.decode("utf-8")
+	if header.num_verts <= 0 :
+		raise ValueError("PointBake header has no NumVerts")
+	return header
+
+
+def parse_frame_tag(block : bytes) -> Tuple[int,Optional[int]] :
+	"""read the opening tag of a frame, frames which are the same as an earlier one are written as
+	<Frame number="12" hold="10"> with no vertices
+	Parameters :
+		block (bytes) the start of the frame element
+	Returns :
+		(int,int) the frame number and the frame it holds, None if the frame has its own data
+	"""
+	match=_FRAME_RE.search(block)
+	if match is None :
+		raise ValueError("Frame block has no <Frame number> tag")
+	return _to_int(match.group(1)),None if match.group(2) is None else _to_int(match.group(2))
+
+
+def parse_frame(block : bytes,num_verts : int,dtype=np.float32,sparse : bool=False) -> Tuple[int,np.ndarray] :
+	"""convert a single <Frame> ... </Frame> block into an array
+	Parameters :
+		block (bytes) the raw bytes of the frame element
+		num_verts (int) the number of vertices expected in the frame
+		dtype (numpy dtype) the type of the array returned
+		sparse (bool) vertices may be missing from the frame, relative files only write the vertices that
+			moved, missing vertices are returned as 0
+	Returns :
+		(int,ndarray) the frame number and a [num_verts,3] array of positions (or offsets for relative files)
+	"""
+	match=_FRAME_RE.search(block)
+	if match is None :
+		raise ValueError("Frame block has no <Frame number> tag")
+	frame=_to_int(match.group(1))
+	if match.group(2) is not None :
+		raise ValueError(f"Frame {frame} holds frame {_to_int(match.group(2))} and has no data of its own")
+	vertices=_VERTEX_RE.findall(block,match.end())
+	count=len(vertices)
+	if count > num_verts or (count != num_verts and not sparse) :
+		raise ValueError(f"Frame {frame} has {count} vertices expected {num_verts}")
+	numbers,payload=zip(*vertices) if vertices else ((),())
+	values=np.array(b" ".join(payload).split(),dtype=np.float64)
+	if values.size != count*3 :
+		raise ValueError(f"Frame {frame} does not have 3 values for every vertex")
+	values=values.reshape(count,3)
+	index=np.array(numbers).astype(np.int64)
+	# the exporter always writes the vertices in order so only re-order when we need to
+	if count != num_verts or not (index[0] == 0 and np.array_equal(index,np.arange(num_verts))) :
+		if count and (index.min() < 0 or index.max() >= num_verts or np.unique(index).size != count) :
+			raise ValueError(f"Frame {frame} has invalid vertex numbers")
+		ordered=np.zeros((num_verts,3),dtype=np.float64)
+		ordered[index]=values
+		values=ordered
+	return frame,values.astype(dtype,copy=False)
+
+
+def is_relative(header : PointBakeHeader) -> bool :
+	"""
+	Parameters :
+		header (PointBakeHeader) the header of a file
+	Returns :
+		bool True if the frames store offsets from the rest mesh rather than positions
+	"""
+	return header.translate_mode == "relative"
+
+
+def apply_offsets(header : PointBakeHeader,points : np.ndarray,rest : Optional[np.ndarray]) -> np.ndarray :
+	"""turn the data of a frame into absolute positions
+	Parameters :
+		header (PointBakeHeader) the header of the file the frame came from
+		points (ndarray) the frame data, offsets for relative files
+		rest (ndarray) [num_verts,3] rest positions, if None relative frames are returned as offsets
+	Returns :
+		ndarray the absolute positions
+	"""
+	if rest is None or not is_relative(header) :
+		return points
+	return rest+points
+
+
+class PointBakeReader() :
+	"""stream the frames from an xml PointBake file, only one frame of data is held in memory at
+	a time so very large caches can be processed. Typical use is
+		with PointBakeReader("foo.xml") as reader :
+			for frame,points in reader :
+				...
+	"""
+
+	def __init__(self,file_name : str,dtype=np.float32,read_size : int=READ_SIZE,
+							 rest : Optional[np.ndarray]=None,profiler : Optional[Profiler]=None) -> None :
+		"""
+		Parameters :
+			file_name (str) the xml file to read
+			dtype (numpy dtype) the type of the arrays returned for each frame
+			read_size (int) how many bytes to read from the file at a time
+			rest (ndarray) [num_verts,3] rest positions the offsets of relative files are added to, if not
+				given relative files return the offsets
+			profiler (Profiler) time the read and parse stages and count the frames and bytes
+		"""
+		self.file_name=file_name
+		self.profiler=profiler or NULL_PROFILER
+		self.dtype=dtype
+		self.read_size=read_size
+		self._file : Optional[BinaryIO]=open(file_name,"rb")
+		self._buffer=b""
+		self.header=self._read_header()
+		self.rest=None if rest is None else np.asarray(rest,dtype=dtype).reshape(self.header.num_verts,3)
+
+	def _fill(self) -> bool :
+		# read the next chunk into the buffer, return False at the end of the file
+		with self.profiler.stage("read") :
+			data=self._file.read(self.read_size)
+		if not data :
+			return False
+		self.profiler.count("bytes read",len(data))
+		self._buffer+=data
+		return True
+
+	def _read_header(self) -> PointBakeHeader :
+		while True :
+			pos=self._buffer.find(_FRAME_START)
+			if pos != -1 :
+				break
+			if not self._fill() :
+				pos=len(self._buffer)
+				break
+		header=parse_header(self._buffer[:pos])
+		self._buffer=self._buffer[pos:]
+		return header
+
+	def __iter__(self) -> Iterator[Tuple[int,np.ndarray]] :
+		start=0
+		stored=None
+		while True :
+			end=self._buffer.find(_FRAME_END,start)
+			if end == -1 :
+				# keep only the partial frame and read some more
+				self._buffer=self._buffer[start:]
+				start=0
+				if not self._fill() :
+					break
+				continue
+			end+=len(_FRAME_END)
+			block=self._buffer[start:end]
+			frame,hold=parse_frame_tag(block)
+			if hold is None :
+				with self.profiler.stage("parse",frame) :
+					stored,points=parse_frame(block,self.header.num_verts,self.dtype,is_relative(self.header))
+					points=apply_offsets(self.header,points,self.rest)
+			elif hold != stored :
+				raise ValueError(f"Frame {frame} holds frame {hold} which is not the last stored frame")
+			# held frames give back the same array so callers can skip them with an is test
+			self.profiler.count("frames read")
+			yield frame,points
+			start=end
+		if self._buffer.find(_FRAME_START) != -1 :
+			raise ValueError(f"{self.file_name} ends with an incomplete frame")
+
+	def close(self) -> None :
+		if self._file is not None :
+			self._file.close()
+			self._file=None
+
+	def __enter__(self) -> "PointBakeReader" :
+		return self
+
+	def __exit__(self,*args) -> None :
+		self.close()
+
+
+def key_frames(frames : Iterable[Tuple[int,np.ndarray]]) -> Iterator[Tuple[int,np.ndarray]] :
+	"""filter the frames from a reader down to the ones an importer needs to key. Held frames are the
+	same array as the frame before, only the last frame of a held run is kept so that keys interpolated
+	between still give the held positions
+	Parameters :
+		frames (iterable) (frame,points) from a reader
+	"""
+	previous=None
+	held=None
+	for frame,points in frames :
+		if previous is not None and points is previous :
+			held=(frame,points)
+			continue
+		if held is not None :
+			yield held
+			held=None
+		previous=points
+		yield frame,points
+	if held is not None :
+		yield held
+
+
+def read_header(file_name : str) -> PointBakeHeader :
+	"""read just the header from a PointBake file
+	Parameters :
+		file_name (str) the file to read
+	Returns :
+		PointBakeHeader the header data
+	"""
+	with PointBakeReader(file_name,read_size=1 << 16) as reader :
+		return reader.header
+
+
+def iter_frames(file_name : str,dtype=np.float32,rest : Optional[np.ndarray]=None) -> Iterator[Tuple[int,np.ndarray]] :
+	"""generator yielding (frame_number, ndarray[num_verts,3]) for each frame in the file
+	Parameters :
+		file_name (str) the file to read
+		dtype (numpy dtype) the type of the arrays returned
+		rest (ndarray) rest positions for relative files
+	"""
+	with PointBakeReader(file_name,dtype,rest=rest) as reader :
+		yield from reader
+
+
+def read_frames(file_name : str,dtype=np.float32,rest : Optional[np.ndarray]=None) -> Tuple[PointBakeHeader,np.ndarray,np.ndarray] :
+	"""read the whole file into memory
+	Parameters :
+		file_name (str) the file to read
+		dtype (numpy dtype) the type of the array returned
+		rest (ndarray) rest positions for relative files
+	Returns :
+		(PointBakeHeader,ndarray,ndarray) the header, the frame numbers and a [frames,num_verts,3] array
+	"""
+	with PointBakeReader(file_name,dtype,rest=rest) as reader :
+		numbers=[]
+		frames=[]
+		for frame,points in reader :
+			numbers.append(frame)
+			frames.append(points)
+		data=np.stack(frames) if frames else np.empty((0,reader.header.num_verts,3),dtype)
+		return reader.header,np.array(numbers,dtype=np.int64),data
+
+
+def scan_frame_offsets(file_name : str,partial : bool=False) -> Tuple[PointBakeHeader,np.ndarray,np.ndarray] :
+	"""find the byte range of every <Frame> element without parsing any vertex data
+	Parameters :
+		file_name (str) the xml file to scan
+		partial (bool) stop at an incomplete last frame, as left by an export which crashed, rather than
+			raising a ValueError
+	Returns :
+		(PointBakeHeader,ndarray,ndarray) the header and int64 arrays of the offset and length of each frame
+	"""
+	offsets=[]
+	lengths=[]
+	with open(file_name,"rb") as file :
+		with mmap.mmap(file.fileno(),0,access=mmap.ACCESS_READ) as data :
+			start=data.find(_FRAME_START)
+			header=parse_header(data[:start if start != -1 else len(data)])
+			while start != -1 :
+				end=data.find(_FRAME_END,start)
+				if end == -1 :
+					if partial :
+						break
+					raise ValueError(f"{file_name} ends with an incomplete frame")
+				end+=len(_FRAME_END)
+				offsets.append(start)
+				lengths.append(end-start)
+				start=data.find(_FRAME_START,end)
+	return header,np.array(offsets,dtype=np.int64),np.array(lengths,dtype=np.int64)
@@ -0,0 +1,120 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Checkpoints which let an export stopped part way (cancelled, or Maya crashing) carry on from the last
+frame written rather than starting again. Opening a writer with resume=True picks up an existing file
+and next_frame is the frame to carry on from, the export only has to step the timeline from there.
+	xml   the EndFrame and NumFrames header fields are written at a fixed width and patched every
+	      checkpoint_frames frames, a resumed file is scanned for the last complete <Frame>
+	.pbk  the chunk and hold tables are only written on close, so every checkpoint_frames frames (every
+	      chunk when compressed) the writer state is saved to a sidecar (foo.pbk.pbresume) which is
+	      removed once the file is closed. The header frame count stays 0 until then
+Closed files can be resumed as well, which appends frames to them.
+"""
+
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+from .reader import PointBakeHeader
+from .stats import FrameStats
+
+RESUME_EXTENSION = ".pbresume"
+RESUME_VERSION = 1
+## the frames written between checkpoints
+DEFAULT_CHECKPOINT_FRAMES = 16
+
+
+def resume_file_name(file_name : str) -> str :
+	"""
+	Parameters :
+		file_name (str) the .pbk cache
+	Returns :
+		str the name of the checkpoint sidecar for the cache
+	"""
+	return file_name+RESUME_EXTENSION
+
+
+def check_resume(existing : PointBakeHeader,header : PointBakeHeader,file_name : str) -> None :
+	"""check a file being resumed is of the mesh being exported, a ValueError listing the differences is
+	raised if not
+	Parameters :
+		existing (PointBakeHeader) the header of the file on disk
+		header (PointBakeHeader) the header given to the writer
+		file_name (str) the file, used in the message
+	"""
+	problems=[f"{name} is {getattr(existing,field)} not {getattr(header,field)}"
+						for name,field in (("mesh","mesh_name"),("vertex count","num_verts"),("start frame","start_frame"),
+															 ("translate mode","translate_mode"))
+						if getattr(existing,field) != getattr(header,field)]
+	if problems :
+		raise ValueError(f"can't resume {file_name}, its "+", ".join(problems))
+
+
+def save_checkpoint(file_name : str,state : Dict[str,np.ndarray],stats : Optional[FrameStats]=None) -> None :
+	"""write the checkpoint sidecar, it is written to a temporary file first so a crash part way through
+	leaves the last checkpoint
+	Parameters :
+		file_name (str) the cache
+		state (dict) the arrays describing the writer state
+		stats (FrameStats) the statistics gathered so far
+	"""
+	extra={}
+	if stats is not None :
+		extra={"stats_frames" : stats.frames,"stats_lo" : stats.lo,"stats_hi" : stats.hi,
+					 "stats_displacement" : stats.max_displacement}
+		if stats.error is not None :
+			extra["stats_error"]=stats.error
+	checkpoint_name=resume_file_name(file_name)
+	with open(checkpoint_name+".tmp","wb") as file :
+		np.savez(file,version=RESUME_VERSION,**state,**extra)
+	os.replace(checkpoint_name+".tmp",checkpoint_name)
+
+
+def load_checkpoint(file_name : str) -> Optional[Dict[str,object]] :
+	"""
+	Parameters :
+		file_name (str) the cache
+	Returns :
+		dict the writer state saved by save_checkpoint with the statistics as a FrameStats under "stats"
+		(None if they weren't saved), None if there is no checkpoint
+	"""
+	checkpoint_name=resume_file_name(file_name)
+	if not os.path.exists(checkpoint_name) :
+		return None
+	with np.load(checkpoint_name) as data :
+		if int(data["version"]) > RESUME_VERSION :
+			raise ValueError(f"{checkpoint_name} is a newer checkpoint version than this writer supports")
+		state={name : data[name] for name in data.files if not name.startswith("stats_")}
+		state["stats"]=None
+		if "stats_frames" in data.files :
+			state["stats"]=FrameStats(data["stats_frames"],data["stats_lo"],data["stats_hi"],data["stats_displacement"],
+																error=data["stats_error"] if "stats_error" in data.files else None)
+	return state
+
+
+def remove_checkpoint(file_name : str) -> None :
+	"""
+	Parameters :
+		file_name (str) the cache, its checkpoint sidecar is removed if there is one
+	"""
+	try :
+		os.remove(resume_file_name(file_name))
+	except FileNotFoundError :
+		pass
@@ -0,0 +1,261 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Sampling a cache at any time rather than only at the stored frames, for retiming, frame rate conversion
+and motion blur without baking again in the DCC. Each time is turned into a weighted sum of stored frames
+	step     the stored frame at or before the time, as frame_for_time
+	linear   the two frames either side
+	hermite  a Catmull-Rom spline through the four frames around the time, smoother through fast motion
+A block of times becomes a [times,frames] weight matrix and one tensordot with the frames it needs, so
+only those frames are read (views for memory mapped .pbk files) and a whole retimed sequence is never
+held in memory, Resampler.iter_samples works through the times a block at a time.
+"""
+
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .binary import open_writer
+from .codec import Codec
+from .instrument import NULL_PROFILER, Profiler
+from .playback import OUT_OF_RANGE_MODES, open_cache
+from .reader import PointBakeHeader
+
+## the ways of interpolating between the stored frames
+INTERPOLATIONS = ("step","linear","hermite")
+## the motion blur shutter positions relative to the frame
+SHUTTER_POSITIONS = ("centre","start","end")
+## the times resampled at once by iter_samples
+DEFAULT_BATCH = 16
+## times this close to a frame are taken as that frame, the host may give 9.999999 for 10
+_TIME_TOLERANCE = 1e-6
+
+
+def sample_weights(times,header : PointBakeHeader,interpolation : str="linear",
+									 mode : str="hold") -> Tuple[np.ndarray,np.ndarray,np.ndarray] :
+	"""the stored frames and weights making up the cache at each time
+	Parameters :
+		times (float or sequence) the times in cache frames
+		header (PointBakeHeader) the header of the cache
+		interpolation (str) one of INTERPOLATIONS
+		mode (str) times outside of the cache hold the first / last frame, loop or are none (not valid)
+	Returns :
+		(ndarray,ndarray,ndarray) [times,taps] frame numbers, [times,taps] weights summing to 1 and a bool
+		[times] flag, False for times with no frame in the none mode. A ValueError is raised for an unknown
+		interpolation or mode
+	"""
+	if interpolation not in INTERPOLATIONS :
+		raise ValueError(f"unknown interpolation {interpolation} expected one of {INTERPOLATIONS}")
+	if mode not in OUT_OF_RANGE_MODES :
+		raise ValueError(f"unknown out of range mode {mode} expected one of {OUT_OF_RANGE_MODES}")
+	times=np.atleast_1d(np.asarray(times,dtype=np.float64))-header.start_frame
+	count=max(header.num_frames,1)
+	position=np.floor(times+_TIME_TOLERANCE)
+	t=np.clip(times-position,0.0,1.0)
+	t[t < _TIME_TOLERANCE]=0.0
+	index=position.astype(np.int64)
+	valid=(index >= 0) & (index < header.num_frames) if mode == "none" else np.full(len(times),header.num_frames > 0)
+	if interpolation == "step" :
+		taps=np.array([0])
+		weights=np.ones((len(times),1))
+	elif interpolation == "linear" :
+		taps=np.array([0,1])
+		weights=np.stack([1.0-t,t],axis=1)
+	else :
+		# Catmull-Rom, the hermite basis with tangents from the frames either side
+		t2=t*t
+		t3=t2*t
+		h00=2.0*t3-3.0*t2+1.0
+		h10=t3-2.0*t2+t
+		h01=-2.0*t3+3.0*t2
+		h11=t3-t2
+		taps=np.array([-1,0,1,2])
+		weights=np.stack([-0.5*h10,h00-0.5*h11,h01+0.5*h10,0.5*h11],axis=1)
+	frames=index[:,None]+taps[None,:]
+	if mode == "loop" :
+		frames%=count
+	else :
+		frames=np.clip(frames,0,count-1)
+	return frames+header.start_frame,weights,valid
+
+
+def frame_rate_times(header : PointBakeHeader,source_fps : float,target_fps : float) -> np.ndarray :
+	"""the cache times of the frames of a cache converted to another frame rate, the converted cache
+	starts at the same frame and lasts as long
+	Parameters :
+		header (PointBakeHeader) the header of the cache
+		source_fps (float) the frame rate the cache was baked at e.g. 24
+		target_fps (float) the frame rate wanted e.g. 30
+	Returns :
+		ndarray the time in cache frames of each converted frame
+	"""
+	if source_fps <= 0.0 or target_fps <= 0.0 :
+		raise ValueError(f"frame rates must be positive not {source_fps} and {target_fps}")
+	count=max(1,int(round(header.num_frames*target_fps/source_fps)))
+	return header.start_frame+np.arange(count)*(source_fps/target_fps)
+
+
+def motion_blur_times(frame : float,samples : int=3,shutter : float=0.5,position : str="centre") -> np.ndarray :
+	"""
+	Parameters :
+		frame (float) the frame being rendered
+		samples (int) the number of motion samples
+		shutter (float) how long the shutter is open in frames, 0.5 is a 180 degree shutter
+		position (str) one of SHUTTER_POSITIONS, where the shutter is open relative to the frame
+	Returns :
+		ndarray the sample times spread evenly over the time the shutter is open
+	"""
+	if position not in SHUTTER_POSITIONS :
+		raise ValueError(f"unknown shutter position {position} expected one of {SHUTTER_POSITIONS}")
+	if samples < 1 :
+		raise ValueError("motion blur needs at least 1 sample")
+	opens={"centre" : frame-shutter*0.5,"start" : frame,"end" : frame-shutter}[position]
+	if samples == 1 :
+		return np.array([opens+shutter*0.5])
+	return np.linspace(opens,opens+shutter,samples)
+
+
+class Resampler() :
+	"""samples a cache at any time, the frames used by the last block of times are kept so stepping
+	through time reads each stored frame once"""
+
+	def __init__(self,source,interpolation : str="linear",mode : str="hold",offset : float=0.0) -> None :
+		"""
+		Parameters :
+			source the cache, anything with a header and a frame(number) method e.g. from open_cache, a
+				LODPointBake or a FrameCache
+			interpolation (str) one of INTERPOLATIONS
+			mode (str) one of OUT_OF_RANGE_MODES, what to do with times outside of the cache
+			offset (float) shift applied to the cache, a value of 10 plays the first cache frame at start_frame+10
+		"""
+		if interpolation not in INTERPOLATIONS :
+			raise ValueError(f"unknown interpolation {interpolation} expected one of {INTERPOLATIONS}")
+		if mode not in OUT_OF_RANGE_MODES :
+			raise ValueError(f"unknown out of range mode {mode} expected one of {OUT_OF_RANGE_MODES}")
+		self.source=source
+		self.header=source.header
+		self.interpolation=interpolation
+		self.mode=mode
+		self.offset=offset
+		self._frames : Dict[int,np.ndarray]={}
+
+	def _fetch(self,numbers : np.ndarray) -> np.ndarray :
+		# the frames needed as a [frames,num_verts,3] stack, only these are kept for the next call
+		frames={number : self._frames[number] if number in self._frames else np.asarray(self.source.frame(number))
+						for number in numbers.tolist()}
+		self._frames=frames
+		return np.stack(list(frames.values()))
+
+	def sample(self,times) -> np.ndarray :
+		"""
+		Parameters :
+			times (sequence) the scene times
+		Returns :
+			ndarray [times,num_verts,3] the cache at each time, a ValueError is raised if a time is outside of the
+			cache in the none mode
+		"""
+		times=np.atleast_1d(np.asarray(times,dtype=np.float64))
+		frames,weights,valid=sample_weights(times-self.offset,self.header,self.interpolation,self.mode)
+		if not valid.all() :
+			raise ValueError(f"time {times[~valid][0]} is outside of the cache frames {self.header.start_frame} to {self.header.end_frame}")
+		numbers,columns=np.unique(frames,return_inverse=True)
+		stack=self._fetch(numbers)
+		dtype=np.result_type(stack.dtype,np.float32)
+		matrix=np.zeros((len(times),len(numbers)),dtype=dtype)
+		np.add.at(matrix,(np.repeat(np.arange(len(times)),frames.shape[1]),columns.ravel()),weights.ravel())
+		return np.tensordot(matrix,stack.astype(dtype,copy=False),axes=1)
+
+	def at(self,time : float) -> Optional[np.ndarray] :
+		"""
+		Parameters :
+			time (float) the scene time
+		Returns :
+			ndarray [num_verts,3] the cache at the time, None if there is no frame for it in the none mode. For
+			times on a stored frame this is the frame as the source returns it
+		"""
+		frames,weights,valid=sample_weights(time-self.offset,self.header,self.interpolation,self.mode)
+		if not valid[0] :
+			return None
+		used=weights[0] != 0.0
+		if np.unique(frames[0][used]).size == 1 :
+			# kept like the frames of a sample so the times after it don't read it again
+			number=int(frames[0][used][0])
+			if number not in self._frames :
+				self._frames={number : self.source.frame(number)}
+			return self._frames[number]
+		return self.sample([time])[0]
+
+	def iter_samples(self,times : Sequence[float],batch : int=DEFAULT_BATCH) -> Iterator[Tuple[float,np.ndarray]] :
+		"""
+		Parameters :
+			times (sequence) the scene times
+			batch (int) the times sampled at once
+		Returns :
+			iterator of (time,ndarray) the cache at each time, only a block of samples is held at once
+		"""
+		times=np.asarray(times,dtype=np.float64)
+		for start in range(0,len(times),batch) :
+			block=times[start:start+batch]
+			yield from zip(block.tolist(),self.sample(block))
+
+	def motion_blur(self,frame : float,samples : int=3,shutter : float=0.5,position : str="centre") -> np.ndarray :
+		"""
+		Parameters :
+			frame (float) the frame being rendered
+			samples (int) the number of motion samples
+			shutter (float) how long the shutter is open in frames
+			position (str) one of SHUTTER_POSITIONS
+		Returns :
+			ndarray [samples,num_verts,3] the cache at each sample time from motion_blur_times
+		"""
+		return self.sample(motion_blur_times(frame,samples,shutter,position))
+
+
+def retime_file(file_name : str,out_name : str,times : Sequence[float],interpolation : str="linear",
+								start_frame : Optional[int]=None,dtype=None,codec : Optional[Codec]=None,
+								float_format : Optional[str]=None,hold_tolerance : Optional[float]=None,stats : bool=True,
+								profiler : Optional[Profiler]=None) -> PointBakeHeader :
+	"""write a new cache sampled from another at the given times, e.g. from frame_rate_times. The frames are
+	streamed so only a block is in memory
+	Parameters :
+		file_name (str) the cache to sample
+		out_name (str) the cache to write, the format comes from the extension
+		times (sequence) the time in source frames of each frame written
+		interpolation (str) one of INTERPOLATIONS
+		start_frame (int) the first frame written, None is the start frame of the source
+		dtype (numpy dtype) the precision written, as open_writer
+		codec (Codec) binary compression
+		float_format (str) xml value format
+		hold_tolerance (float) store frames within this of the frame before as a reference, None stores every frame
+		stats (bool) write the statistics sidecar
+		profiler (Profiler) time the writing stages
+	Returns :
+		PointBakeHeader the header of the new cache
+	"""
+	profiler=profiler or NULL_PROFILER
+	with open_cache(file_name,np.float64) as source :
+		header=PointBakeHeader(**vars(source.header))
+		header.start_frame=header.start_frame if start_frame is None else start_frame
+		header.num_frames=len(times)
+		header.end_frame=header.start_frame+header.num_frames
+		resampler=Resampler(source,interpolation)
+		with open_writer(out_name,header,dtype,codec,float_format,stats=stats,hold_tolerance=hold_tolerance,
+										 profiler=profiler) as writer :
+			for frame,(_,points) in enumerate(resampler.iter_samples(times),header.start_frame) :
+				writer.write_frame(frame,points)
+	return header
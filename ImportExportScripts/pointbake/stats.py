@@ -0,0 +1,255 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Per frame statistics of a cache, the bounding box of each frame and the largest distance any vertex
+moved from the frame before. The writers gather these as the frames go past and save them to a small
+sidecar (foo.pbk.pbstats) so tools can cull, pick motion blur settings or skip frames which don't
+change without reading any vertex data. For relative files the boxes are of the stored offsets.
+"""
+
+import os
+from typing import List, Optional
+
+import numpy as np
+
+STATS_EXTENSION = ".pbstats"
+STATS_VERSION = 1
+
+
+def stats_file_name(file_name : str) -> str :
+	"""
+	Parameters :
+		file_name (str) the cache
+	Returns :
+		str the name of the statistics sidecar for the cache
+	"""
+	return file_name+STATS_EXTENSION
+
+
+class FrameStats() :
+	"""the bounding box and movement of every frame in a cache"""
+
+	def __init__(self,frames : np.ndarray,lo : np.ndarray,hi : np.ndarray,max_displacement : np.ndarray,
+							 source_size : int=0,source_mtime_ns : int=0,error : Optional[np.ndarray]=None) -> None :
+		"""
+		Parameters :
+			frames (ndarray) the frame numbers
+			lo (ndarray) [frames,3] minimum corner of each frame
+			hi (ndarray) [frames,3] maximum corner of each frame
+			max_displacement (ndarray) largest distance a vertex moved from the frame before, the first frame
+				is inf as there is nothing to compare with
+			source_size (int) size of the cache the statistics are for
+			source_mtime_ns (int) modification time of the cache the statistics are for
+			error (ndarray) furthest a vertex moved between the values given to the writer and those stored for
+				each frame, None if the writer didn't round the values or the statistics were built from the file
+		"""
+		self.frames=frames
+		self.lo=lo
+		self.hi=hi
+		self.max_displacement=max_displacement
+		self.source_size=source_size
+		self.source_mtime_ns=source_mtime_ns
+		self.error=error
+
+	def __len__(self) -> int :
+		return len(self.frames)
+
+	def static(self,tolerance : float=0.0) -> np.ndarray :
+		"""
+		Parameters :
+			tolerance (float) a frame where no vertex moved further than this is static
+		Returns :
+			ndarray bool flag for each frame, True if it is the same as the frame before
+		"""
+		return self.max_displacement <= tolerance
+
+	def bounds(self) -> np.ndarray :
+		"""
+		Returns :
+			ndarray [2,3] bounding box of the whole cache
+		"""
+		if len(self.frames) == 0 :
+			return np.zeros((2,3))
+		return np.stack([self.lo.min(axis=0),self.hi.max(axis=0)])
+
+	def max_error(self) -> Optional[float] :
+		"""
+		Returns :
+			float the largest rounding error of any frame when it was written, None if it wasn't recorded
+		"""
+		if self.error is None :
+			return None
+		return float(self.error.max(initial=0.0))
+
+	def matches(self,file_name : str) -> bool :
+		"""
+		Parameters :
+			file_name (str) the cache
+		Returns :
+			bool True if the cache has the same size and modification time as when the statistics were made
+		"""
+		stat=os.stat(file_name)
+		return stat.st_size == self.source_size and stat.st_mtime_ns == self.source_mtime_ns
+
+	def save(self,stats_name : str) -> None :
+		"""
+		Parameters :
+			stats_name (str) the file to write
+		"""
+		# the error is left out rather than bumping the version so older readers still load the file
+		extra={} if self.error is None else {"error" : self.error}
+		with open(stats_name,"wb") as file :
+			np.savez(file,version=STATS_VERSION,frames=self.frames,lo=self.lo,hi=self.hi,
+							 max_displacement=self.max_displacement,
+							 source=np.array([self.source_size,self.source_mtime_ns],dtype=np.int64),**extra)
+
+	@classmethod
+	def load(cls,stats_name : str) -> "FrameStats" :
+		"""
+		Parameters :
+			stats_name (str) the file to read
+		Returns :
+			FrameStats the statistics
+		"""
+		with np.load(stats_name) as data :
+			if int(data["version"]) > STATS_VERSION :
+				raise ValueError(f"{stats_name} is a newer statistics version than this reader supports")
+			source_size,source_mtime_ns=data["source"].tolist()
+			error=data["error"] if "error" in data.files else None
+			return cls(data["frames"],data["lo"],data["hi"],data["max_displacement"],source_size,source_mtime_ns,error)
+
+
+class StatsBuilder() :
+	"""gather the statistics a frame at a time, used by the writers"""
+
+	def __init__(self) -> None :
+		self._frames : List[int]=[]
+		self._lo : List[np.ndarray]=[]
+		self._hi : List[np.ndarray]=[]
+		self._displacement : List[float]=[]
+		self._error : List[float]=[]
+		self._previous : Optional[np.ndarray]=None
+
+	def add(self,frame : int,points : np.ndarray,error : Optional[float]=None) -> None :
+		"""
+		Parameters :
+			frame (int) the frame number
+			points (ndarray) [num_verts,3] the frame as written
+			error (float) the largest change made to the values when they were rounded for writing
+		"""
+		points=np.asarray(points)
+		self._frames.append(frame)
+		if error is not None :
+			# frames before the first with an error given had nothing rounded
+			self._error+=[0.0]*(len(self._frames)-1-len(self._error))+[error]
+		if len(points) == 0 :
+			self._lo.append(np.zeros(3))
+			self._hi.append(np.zeros(3))
+		else :
+			self._lo.append(points.min(axis=0))
+			self._hi.append(points.max(axis=0))
+		if self._previous is None :
+			self._displacement.append(np.inf)
+		else :
+			moved=points-self._previous
+			self._displacement.append(float(np.sqrt((moved*moved).sum(axis=1).max())) if len(points) else 0.0)
+		# kept as float64 so the distances of float16 frames don't overflow
+		self._previous=np.array(points,dtype=np.float64)
+
+	def resume(self,stats : FrameStats,previous : Optional[np.ndarray]) -> None :
+		"""carry on from statistics gathered before, used when a writer resumes a file
+		Parameters :
+			stats (FrameStats) the statistics of the frames already written
+			previous (ndarray) [num_verts,3] the last frame written, the next displacement is from this
+		"""
+		self._frames=stats.frames.tolist()
+		self._lo=list(stats.lo)
+		self._hi=list(stats.hi)
+		self._displacement=stats.max_displacement.tolist()
+		self._error=[] if stats.error is None else stats.error.tolist()
+		self._previous=None if previous is None else np.array(previous,dtype=np.float64)
+
+	def result(self,file_name : Optional[str]=None) -> FrameStats :
+		"""
+		Parameters :
+			file_name (str) the closed cache, its size and modification time are recorded if given
+		Returns :
+			FrameStats the statistics of the frames added
+		"""
+		error=None
+		if self._error :
+			error=np.zeros(len(self._frames))
+			error[:len(self._error)]=self._error
+		stats=FrameStats(np.array(self._frames,dtype=np.int64),np.array(self._lo,dtype=np.float64).reshape(-1,3),
+										 np.array(self._hi,dtype=np.float64).reshape(-1,3),np.array(self._displacement,dtype=np.float64),
+										 error=error)
+		if file_name is not None :
+			stat=os.stat(file_name)
+			stats.source_size=stat.st_size
+			stats.source_mtime_ns=stat.st_mtime_ns
+		return stats
+
+	def save(self,file_name : str) -> FrameStats :
+		"""write the sidecar for a cache which has just been closed, a read only location is silently ignored
+		Parameters :
+			file_name (str) the cache
+		Returns :
+			FrameStats the statistics written
+		"""
+		stats=self.result(file_name)
+		try :
+			stats.save(stats_file_name(file_name))
+		except OSError :
+			pass
+		return stats
+
+
+def build_stats(file_name : str,write : bool=True) -> FrameStats :
+	"""read every frame of a cache to make its statistics
+	Parameters :
+		file_name (str) the .xml or .pbk cache
+		write (bool) save the sidecar
+	Returns :
+		FrameStats the statistics
+	"""
+	# imported here as binary uses this module for the writers
+	from .binary import open_frames
+	builder=StatsBuilder()
+	with open_frames(file_name) as source :
+		for frame,points in source :
+			builder.add(frame,points)
+	return builder.save(file_name) if write else builder.result(file_name)
+
+
+def load_stats(file_name : str,build : bool=True) -> Optional[FrameStats] :
+	"""get the statistics of a cache from the sidecar
+	Parameters :
+		file_name (str) the cache
+		build (bool) read the frames to make the statistics if the sidecar is missing or out of date
+	Returns :
+		FrameStats the statistics, None if there are none and build is False
+	"""
+	stats_name=stats_file_name(file_name)
+	if os.path.exists(stats_name) :
+		try :
+			stats=FrameStats.load(stats_name)
+			if stats.matches(file_name) :
+				return stats
+		except (OSError,ValueError,KeyError) :
+			pass
+	return build_stats(file_name) if build else None
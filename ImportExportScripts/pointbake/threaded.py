@@ -0,0 +1,117 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Writer which hands the frames to a background thread so the caller can go on to evaluate the next
+frame while the last one is formatted, compressed and written. The queue between the two is bounded
+so a slow disk blocks the caller rather than holding every frame in memory. File writes and zlib /
+lzma release the GIL so these overlap with the scene evaluation, xml formatting does not.
+"""
+
+import queue
+import threading
+from typing import Optional
+
+import numpy as np
+
+from .instrument import NULL_PROFILER
+
+## the number of frames which can be waiting to be written before write_frame blocks
+DEFAULT_QUEUE_FRAMES = 4
+
+## put on the queue by close to stop the thread
+_STOP = object()
+
+
+class ThreadedWriter() :
+	"""wraps a PointBakeXMLWriter or BinaryPointBakeWriter so the writing happens on another thread"""
+
+	def __init__(self,writer,max_frames : int=DEFAULT_QUEUE_FRAMES) -> None :
+		"""
+		Parameters :
+			writer the writer to pass the frames to, it is closed by the writer thread
+			max_frames (int) number of frames which can be queued before write_frame blocks
+		"""
+		if max_frames < 1 :
+			raise ValueError("max_frames must be at least 1")
+		self.writer=writer
+		self.header=writer.header
+		self._next_frame=writer.next_frame
+		self._queue : queue.Queue=queue.Queue(max_frames)
+		self._error : Optional[BaseException]=None
+		self._failed=False
+		self._thread : Optional[threading.Thread]=threading.Thread(target=self._run,name="PointBakeWriter",daemon=True)
+		self._thread.start()
+
+	@property
+	def next_frame(self) -> int :
+		"""the frame after the last one queued, for a resumed writer the frame to carry on from"""
+		return self._next_frame
+
+	def _run(self) -> None :
+		while True :
+			item=self._queue.get()
+			if item is _STOP :
+				break
+			# after an error keep taking frames so the caller never blocks on a full queue
+			if not self._failed :
+				try :
+					self.writer.write_frame(*item)
+				except BaseException as error :
+					self._error=error
+					self._failed=True
+		try :
+			self.writer.close()
+		except BaseException as error :
+			if self._error is None :
+				self._error=error
+
+	def _raise(self) -> None :
+		if self._error is not None :
+			error,self._error=self._error,None
+			raise error
+
+	def write_frame(self,frame : int,points : np.ndarray) -> None :
+		"""queue a frame to be written, blocks if the queue is full
+		Parameters :
+			frame (int) the frame number
+			points (ndarray) [num_verts,3] array, this is copied so the caller can reuse it
+		"""
+		if self._thread is None :
+			raise ValueError("write to a closed writer")
+		self._raise()
+		# the time blocked here is the time the caller waits on the disk
+		with getattr(self.writer,"profiler",NULL_PROFILER).stage("queue",frame) :
+			self._queue.put((frame,np.array(points,copy=True)))
+		self._next_frame=frame+1
+
+	def close(self) -> None :
+		"""write any queued frames then close the file, this also writes the trailer so an export which is
+		stopped part way still leaves a well formed file. Errors from the writer thread are raised here
+		"""
+		if self._thread is None :
+			return
+		self._queue.put(_STOP)
+		self._thread.join()
+		self._thread=None
+		self._raise()
+
+	def __enter__(self) -> "ThreadedWriter" :
+		return self
+
+	def __exit__(self,*args) -> None :
+		self.close()
@@ -0,0 +1,278 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Writer for the xml based NCCA PointBake format, the output matches the layout written by the Maya
+exporter so it can be loaded by ngl::NCCAPointBake. The EndFrame and NumFrames values are padded to a
+fixed width so the writer can keep them up to date as the frames are written.
+"""
+
+import mmap
+import os
+import re
+from typing import Dict, Optional, TextIO, Tuple
+
+import numpy as np
+
+from .instrument import NULL_PROFILER, Profiler
+from .precision import round_points, rounding_error, text_format
+from .reader import PointBakeHeader, is_relative, parse_frame, parse_frame_tag, scan_frame_offsets
+from .resume import DEFAULT_CHECKPOINT_FRAMES, check_resume
+from .stats import StatsBuilder, load_stats
+
+
+def write_data(file : TextIO ,n_tabs : int ,data : str) -> None :
+	""" write out to xml file with correct tabs
+	Parameters :
+		file (TextIO) the file pointer to write data too
+		n_tabs (int) number of tabs to write before the data
+		data (str) the actual data to write out to the file
+	"""
+	file.write("\t"*n_tabs)
+	file.write(data)
+	file.write("\n")
+
+
+## the width of the EndFrame and NumFrames values, enough for any 32 bit frame so they can be patched in place
+_COUNT_WIDTH = 11
+## the header elements the writer patches
+_COUNT_RE = re.compile(rb"<(EndFrame|NumFrames)>([^<]*)</\1>")
+## the vertex line written by the exporter, %s is replaced by the float format
+_VERTEX_LINE = '\t\t<Vertex number="%%d" attrib="translate"> %s %s %s </Vertex>\n'
+
+
+def format_frame(frame : int,points : np.ndarray,float_format : Optional[str]=None,
+								 vertices : Optional[np.ndarray]=None) -> str :
+	"""format the whole <Frame> element for a frame of data in one go
+	Parameters :
+		frame (int) the frame number
+		points (ndarray) [num_verts,3] array of positions
+		float_format (str) a printf style format for the values e.g. "%.6g", None writes the shortest
+			string which reads back to the same value
+		vertices (ndarray) the vertex number of each row of points, None numbers them from 0
+	Returns :
+		str the xml for the frame
+	"""
+	points=np.asarray(points,dtype=np.float64)
+	num_verts=len(points)
+	# interleave the vertex number with the values so the whole frame is a single % operation
+	rows=np.empty((num_verts,4),dtype=np.float64)
+	rows[:,0]=np.arange(num_verts) if vertices is None else vertices
+	rows[:,1:]=points
+	fmt=float_format or "%r"
+	line=_VERTEX_LINE % (fmt,fmt,fmt)
+	return f'\t<Frame number="{frame}">\n' + (line*num_verts) % tuple(rows.ravel().tolist()) + "\t</Frame>\n"
+
+
+def format_header(header : PointBakeHeader) -> str :
+	"""format the xml declaration and header elements written before the first frame
+	Parameters :
+		header (PointBakeHeader) the header data
+	Returns :
+		str the xml up to the first <Frame>, EndFrame and NumFrames are padded to a fixed width
+	"""
+	return ('<?xml version="1.0" encoding="UTF-8" ?>\n<NCCAPointBake>\n'
+					f"\t<MeshName> {header.mesh_name} </MeshName>\n"
+					f"\t<NumVerts> {header.num_verts} </NumVerts>\n"
+					f"\t<StartFrame> {header.start_frame} </StartFrame>\n"
+					f"\t<EndFrame> {str(header.end_frame):<{_COUNT_WIDTH}} </EndFrame>\n"
+					f"\t<NumFrames> {str(header.num_frames):<{_COUNT_WIDTH}} </NumFrames>\n"
+					f"\t<TranslateMode> {header.translate_mode} </TranslateMode>\n")
+
+
+def _count_fields(file_name : str) -> Dict[bytes,Tuple[int,int]] :
+	# the offset and width of the EndFrame and NumFrames values in the header of a file
+	with open(file_name,"rb") as file :
+		data=file.read(1 << 16)
+	data=data[:data.find(b"<Frame")] if b"<Frame" in data else data
+	fields={match.group(1) : (match.start(2),len(match.group(2))) for match in _COUNT_RE.finditer(data)}
+	if len(fields) != 2 :
+		raise ValueError(f"{file_name} has no EndFrame or NumFrames in its header")
+	return fields
+
+
+class PointBakeXMLWriter() :
+	"""write a PointBake xml file a frame at a time"""
+
+	def __init__(self,file_name : str,header : PointBakeHeader,float_format : Optional[str]=None,
+							 tolerance : float=0.0,stats : bool=False,hold_tolerance : Optional[float]=None,precision=None,
+							 profiler : Optional[Profiler]=None,resume : bool=False,
+							 checkpoint_frames : int=DEFAULT_CHECKPOINT_FRAMES) -> None :
+		"""open the file and write the header
+		Parameters :
+			file_name (str) the file to write
+			header (PointBakeHeader) the header data to write
+			float_format (str) printf style format for the vertex values e.g. "%.6g", None is full precision
+			tolerance (float) for relative files vertices whose offsets are all within this are not written
+			stats (bool) write the per frame statistics sidecar when the file is closed
+			hold_tolerance (float) frames within this of the last frame written are stored as a reference to it,
+				0 only holds identical frames and None writes every frame. Held frames are only read by pointbake,
+				ngl::NCCAPointBake sees them as frames with no vertices so leave this as None for files it will load
+			precision (numpy dtype) round the values to float16, float32 or float64 and, unless float_format is
+				given, write them with the digits needed to read back exactly. None writes the values as given
+			profiler (Profiler) time the format and write stages and count the frames and bytes
+			resume (bool) carry on from the last complete frame of an existing file (see next_frame), which must
+				be of the same mesh and start frame. A new file is written if there isn't one
+			checkpoint_frames (int) update the header frame counts every this many frames, 0 only does so on close
+		"""
+		self.file_name=file_name
+		self.profiler=profiler or NULL_PROFILER
+		self.header=header
+		self.precision=precision
+		self.float_format=float_format if float_format is not None or precision is None else text_format(precision)
+		## the largest difference between the frames given and the values written by the rounding to precision
+		self.max_error=0.0
+		self.tolerance=tolerance
+		self._stats=StatsBuilder() if stats else None
+		self.hold_tolerance=hold_tolerance
+		self._stored : Optional[Tuple[int,np.ndarray]]=None
+		self.checkpoint_frames=checkpoint_frames
+		## the number of frames in the file
+		self.num_frames=0
+		self._end_frame=header.start_frame
+		self._file : Optional[TextIO]=None
+		if not (resume and self._resume()) :
+			# the counts are of the frames written so far, so an export which is stopped still has a correct header
+			self._file=open(file_name,"w",encoding="utf-8")
+			self._file.write(format_header(PointBakeHeader(header.mesh_name,header.num_verts,header.start_frame,
+																										 header.start_frame,0,header.translate_mode)))
+			self._file.flush()
+			self._count_fields=_count_fields(file_name)
+
+	@property
+	def next_frame(self) -> int :
+		"""the frame after the last one written, where a resumed export carries on from"""
+		return self._end_frame
+
+	def _resume(self) -> bool :
+		# pick up an existing file, it is cut after the last complete frame and the header counts, held frame
+		# and statistics carry on from it. False if there is nothing to resume
+		if not os.path.exists(self.file_name) :
+			return False
+		existing,offsets,lengths=scan_frame_offsets(self.file_name,partial=True)
+		check_resume(existing,self.header,self.file_name)
+		if len(offsets) == 0 :
+			return False
+		self._count_fields=_count_fields(self.file_name)
+		if any(width < _COUNT_WIDTH+2 for _,width in self._count_fields.values()) :
+			raise ValueError(f"can't resume {self.file_name}, its header counts are not fixed width")
+		# statistics saved when the file was closed save reading every frame
+		stats=load_stats(self.file_name,False) if self._stats is not None else None
+		if stats is not None and len(stats) != len(offsets) :
+			stats=None
+		rebuild=self._stats is not None and stats is None
+		sparse=is_relative(self.header)
+		with open(self.file_name,"rb") as file :
+			with mmap.mmap(file.fileno(),0,access=mmap.ACCESS_READ) as data :
+				# the last frame with data of its own and its values, parsed when they are needed
+				stored=None
+				points=None
+				for expected,(offset,length) in enumerate(zip(offsets.tolist(),lengths.tolist()),self.header.start_frame) :
+					frame,hold=parse_frame_tag(data[offset:offset+128])
+					if frame != expected :
+						raise ValueError(f"can't resume {self.file_name}, it has frame {frame} where frame {expected} was expected")
+					if hold is None :
+						stored=(frame,offset,length)
+						points=None
+					if rebuild :
+						if points is None :
+							points=parse_frame(data[offset:offset+length],self.header.num_verts,np.float64,sparse)[1]
+						self._stats.add(frame,points)
+				if points is None :
+					points=parse_frame(data[stored[1]:stored[1]+stored[2]],self.header.num_verts,np.float64,sparse)[1]
+		if stats is not None :
+			self._stats.resume(stats,points)
+		if self.hold_tolerance is not None :
+			self._stored=(stored[0],points)
+		self.num_frames=len(offsets)
+		self._end_frame=self.header.start_frame+self.num_frames
+		# drop the trailer or the incomplete frame left by a crash
+		os.truncate(self.file_name,int(offsets[-1]+lengths[-1]))
+		self._file=open(self.file_name,"r+",encoding="utf-8")
+		self._file.seek(0,os.SEEK_END)
+		self._file.write("\n")
+		self._patch_counts()
+		return True
+
+	def _patch_counts(self) -> None :
+		# write the frame counts into the fixed width header fields
+		self._file.flush()
+		raw=self._file.buffer
+		position=raw.tell()
+		for tag,value in ((b"EndFrame",self._end_frame),(b"NumFrames",self.num_frames)) :
+			offset,width=self._count_fields[tag]
+			raw.seek(offset)
+			raw.write(f" {value} ".ljust(width).encode("ascii"))
+		raw.flush()
+		raw.seek(position)
+
+	def write_frame(self,frame : int,points : np.ndarray) -> None :
+		"""write the vertex data for a single frame
+		Parameters :
+			frame (int) the frame number
+			points (ndarray) [num_verts,3] array of positions, or offsets from the rest mesh for relative files
+		"""
+		error=None
+		if self.precision is not None :
+			source=points
+			points=round_points(source,self.precision)
+			error=rounding_error(source,points)
+			self.max_error=max(self.max_error,error)
+		if self._stats is not None :
+			self._stats.add(frame,points,error)
+		if self.hold_tolerance is not None :
+			points=np.asarray(points)
+			# compare with the frame stored rather than the one before so small changes can't build up
+			if self._stored is not None and np.abs(points-self._stored[1]).max(initial=0.0) <= self.hold_tolerance :
+				self._write(frame,f'\t<Frame number="{frame}" hold="{self._stored[0]}">\n\t</Frame>\n')
+				return
+			self._stored=(frame,points.copy())
+		with self.profiler.stage("format",frame) :
+			if is_relative(self.header) :
+				# only the vertices which have moved from the rest mesh are written
+				points=np.asarray(points)
+				vertices=np.flatnonzero(np.abs(points).max(axis=1) > self.tolerance)
+				text=format_frame(frame,points[vertices],self.float_format,vertices)
+			else :
+				text=format_frame(frame,points,self.float_format)
+		self._write(frame,text)
+
+	def _write(self,frame : int,text : str) -> None :
+		with self.profiler.stage("write",frame) :
+			self._file.write(text)
+			self.num_frames+=1
+			self._end_frame=frame+1
+			if self.checkpoint_frames and self.num_frames%self.checkpoint_frames == 0 :
+				self._patch_counts()
+		self.profiler.count("frames written")
+		self.profiler.count("bytes written",len(text))
+
+	def close(self) -> None :
+		"""write the trailer, patch the header counts and close the file"""
+		if self._file is not None :
+			self._file.write("</NCCAPointBake>\n")
+			self._patch_counts()
+			self._file.close()
+			self._file=None
+			if self._stats is not None :
+				self._stats.save(self.file_name)
+
+	def __enter__(self) -> "PointBakeXMLWriter" :
+		return self
+
+	def __exit__(self,*args) -> None :
+		self.close()
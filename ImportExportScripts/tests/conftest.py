@@ -0,0 +1,70 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""@package docstring
+Shared fixtures for the tests of the pointbake core module, run with python -m pytest tests from the
+ImportExportScripts directory.
+"""
+
+import os
+import sys
+from typing import Optional
+
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pointbake
+
+
+def make_frames(num_verts : int=20,num_frames : int=6,seed : int=0) -> np.ndarray :
+	"""[frames,num_verts,3] float64 frames with values which need every bit of a double"""
+	rng=np.random.default_rng(seed)
+	rest=rng.uniform(-10.0,10.0,(num_verts,3))
+	return np.stack([rest+np.sin(frame*0.3+rest[:,:1]) for frame in range(num_frames)])
+
+
+def write_xml(file_name : str,frames : np.ndarray,start_frame : int=0,order : Optional[np.ndarray]=None) -> None :
+	"""write frames in the layout of the original Maya exporter, order gives the vertex order in each frame"""
+	order=np.arange(frames.shape[1]) if order is None else order
+	with open(file_name,"w") as file :
+		file.write('<?xml version="1.0" encoding="UTF-8" ?>\n<NCCAPointBake>\n')
+		file.write(f"\t<MeshName> pTest </MeshName>\n\t<NumVerts> {frames.shape[1]} </NumVerts>\n")
+		file.write(f"\t<StartFrame> {start_frame} </StartFrame>\n\t<EndFrame> {start_frame+len(frames)} </EndFrame>\n")
+		file.write(f"\t<NumFrames> {len(frames)} </NumFrames>\n\t<TranslateMode> absolute </TranslateMode>\n")
+		for frame,points in enumerate(frames,start_frame) :
+			file.write(f'\t<Frame number="{frame}">\n')
+			for vertex in order.tolist() :
+				x,y,z=points[vertex].tolist()
+				file.write(f'\t\t<Vertex number="{vertex}" attrib="translate"> {x} {y} {z} </Vertex>\n')
+			file.write("\t</Frame>\n")
+		file.write("</NCCAPointBake>\n")
+
+
+def write_cache(file_name : str,frames : np.ndarray,start_frame : int=0,**options) -> pointbake.PointBakeHeader :
+	"""write frames to a cache, the format comes from the extension and options go to open_writer"""
+	header=pointbake.PointBakeHeader("pTest",frames.shape[1],start_frame,start_frame+len(frames),len(frames))
+	with pointbake.open_writer(file_name,header,**options) as writer :
+		for frame,points in enumerate(frames,start_frame) :
+			writer.write_frame(frame,points)
+	return header
+
+
+@pytest.fixture
+def frames() -> np.ndarray :
+	return make_frames()
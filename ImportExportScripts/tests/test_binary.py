@@ -0,0 +1,110 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import write_cache
+from pointbake.cli import main
+
+
+@pytest.mark.parametrize("dtype",[np.float32,np.float64])
+def test_binary_round_trip(tmp_path,frames,dtype) :
+	file_name=str(tmp_path/"cache.pbk")
+	header=write_cache(file_name,frames,start_frame=3,dtype=dtype)
+	with pointbake.BinaryPointBake(file_name) as cache :
+		assert cache.header == header and cache.dtype == np.dtype(dtype) and len(cache) == len(frames)
+		assert np.array_equal(cache.frame(5),frames[2].astype(dtype))
+		assert np.array_equal(np.stack([points for _,points in cache]),frames.astype(dtype))
+		with pytest.raises(IndexError) :
+			cache.frame(3+len(frames))
+
+
+def test_xml_binary_conversion(tmp_path,frames) :
+	xml_name=str(tmp_path/"cache.xml")
+	write_cache(xml_name,frames)
+	pointbake.xml_to_binary(xml_name,str(tmp_path/"cache.pbk"),np.float64)
+	pointbake.binary_to_xml(str(tmp_path/"cache.pbk"),str(tmp_path/"back.xml"))
+	header,numbers,data=pointbake.read_frames(str(tmp_path/"back.xml"),np.float64)
+	assert header == pointbake.read_header(xml_name)
+	assert numbers.tolist() == list(range(len(frames)))
+	assert np.array_equal(data,frames)
+
+
+def test_writer_checks_frames(tmp_path,frames) :
+	header=pointbake.PointBakeHeader("pTest",frames.shape[1],0,len(frames),len(frames))
+	with pytest.raises(ValueError) :
+		pointbake.BinaryPointBakeWriter(str(tmp_path/"int.pbk"),header,np.int32)
+	with pointbake.BinaryPointBakeWriter(str(tmp_path/"cache.pbk"),header) as writer :
+		with pytest.raises(ValueError) :
+			writer.write_frame(1,frames[1])
+		with pytest.raises(ValueError) :
+			writer.write_frame(0,frames[0,1:])
+
+
+def test_frames_usable_after_close(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.pbk")
+	write_cache(file_name,frames,dtype=np.float64)
+	with pointbake.BinaryPointBake(file_name) as cache :
+		points=cache.frame(2)
+		iterated=[points for _,points in cache]
+	assert np.array_equal(points,frames[2])
+	assert np.array_equal(np.stack(iterated),frames)
+
+
+def test_compressed_frames_usable_after_close(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.pbk")
+	write_cache(file_name,frames,dtype=np.float64,codec=pointbake.Codec("previous",False,None,"zlib",None,4))
+	with pointbake.BinaryPointBake(file_name) as cache :
+		points=cache.frame(5)
+	assert np.array_equal(points,frames[5])
+
+
+def test_xml_to_binary_is_lossless(tmp_path,frames) :
+	xml_name=str(tmp_path/"cache.xml")
+	write_cache(xml_name,frames)
+	pointbake.xml_to_binary(xml_name,str(tmp_path/"cache.pbk"))
+	pointbake.binary_to_xml(str(tmp_path/"cache.pbk"),str(tmp_path/"back.xml"))
+	with pointbake.BinaryPointBake(str(tmp_path/"cache.pbk")) as cache :
+		assert cache.dtype == np.float64
+		assert np.array_equal(np.stack([points for _,points in cache]),frames)
+	assert np.array_equal(pointbake.read_frames(str(tmp_path/"back.xml"),np.float64)[2],frames)
+
+
+def test_convert_is_lossless_by_default(tmp_path,frames) :
+	xml_name=str(tmp_path/"cache.xml")
+	write_cache(xml_name,frames)
+	assert main(["convert",xml_name,"-o",str(tmp_path/"cache.pbk")]) == 0
+	assert main(["convert",xml_name,"-o",str(tmp_path/"small.pbk"),"--dtype","float32"]) == 0
+	with pointbake.BinaryPointBake(str(tmp_path/"cache.pbk")) as cache :
+		assert np.array_equal(np.stack([points for _,points in cache]),frames)
+	with pointbake.BinaryPointBake(str(tmp_path/"small.pbk")) as cache :
+		assert cache.dtype == np.float32
+
+
+def test_quantization_error_matches_diff(tmp_path,frames) :
+	source=str(tmp_path/"source.pbk")
+	quantized=str(tmp_path/"quantized.pbk")
+	write_cache(source,frames)
+	write_cache(quantized,frames,codec=pointbake.Codec("previous",True,None,"zlib",None,4),stats=True)
+	with pointbake.BinaryPointBake(quantized) as cache :
+		bound=cache.max_error
+	measured=pointbake.compare_caches(source,quantized).max()
+	assert 0.0 < measured <= bound
+	assert main(["validate",quantized,"--max-error",str(bound)]) == 0
+	assert main(["diff",source,quantized,"--tolerance",str(bound)]) == 0
@@ -0,0 +1,50 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+
+import pytest
+
+from conftest import write_cache
+from pointbake.cli import main
+
+
+def _truncate(file_name : str,fraction : float) -> None :
+	with open(file_name,"r+b") as file :
+		file.truncate(int(os.path.getsize(file_name)*fraction))
+
+
+@pytest.mark.parametrize("extension",["xml","pbk"])
+def test_validate_truncated_file_fails(tmp_path,frames,capsys,extension) :
+	file_name=str(tmp_path/f"cache.{extension}")
+	write_cache(file_name,frames)
+	assert main(["validate",file_name]) == 0
+	_truncate(file_name,0.6)
+	capsys.readouterr()
+	assert main(["validate",file_name]) == 1
+	assert capsys.readouterr().out.startswith(f"FAIL {file_name}")
+
+
+def test_validate_empty_file_fails_with_jobs(tmp_path,frames,capsys) :
+	good=str(tmp_path/"good.pbk")
+	empty=str(tmp_path/"empty.xml")
+	write_cache(good,frames)
+	open(empty,"w").close()
+	assert main(["-j","2","validate",good,empty]) == 1
+	out=capsys.readouterr().out
+	assert f"OK {good}" in out
+	assert f"FAIL {empty}" in out
@@ -0,0 +1,95 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import make_frames, write_cache
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),"benchmarks"))
+import synthetic
+
+
+@pytest.fixture
+def caches(tmp_path,frames) :
+	# vertex 7 is 0.5 out on frame 3 and 0.25 out on frame 4, vertex 2 is 0.1 out on frame 4
+	moved=frames.copy()
+	moved[3,7,0]+=0.5
+	moved[4,7,1]-=0.25
+	moved[4,2,2]+=0.1
+	file_a=str(tmp_path/"a.xml")
+	file_b=str(tmp_path/"b.pbk")
+	write_cache(file_a,frames,float_format="%.17g")
+	write_cache(file_b,moved,dtype=np.float64)
+	return file_a,file_b
+
+
+def test_known_error(caches) :
+	diff=pointbake.compare_caches(*caches)
+	assert len(diff) == 6 and diff.same_range()
+	assert np.allclose(diff.max_error,[0.0,0.0,0.0,0.5,0.25,0.0])
+	assert diff.max() == pytest.approx(0.5)
+	assert diff.worst_frame() == 3 and diff.first_difference() == 3
+	assert [vertex for vertex,_ in diff.worst_vertices(2)] == [7,2]
+	assert diff.worst_vertices(2)[1][1] == pytest.approx(0.1)
+	assert np.count_nonzero(diff.vertex_error) == 2
+	assert np.allclose(diff.rms_error[3],np.sqrt(0.25/20))
+	assert not diff.matches()
+	# with a tolerance above the error the caches are the same
+	diff=pointbake.compare_caches(*caches,tolerance=0.6)
+	assert diff.matches() and diff.first_difference() is None
+
+
+def test_stop_error(caches) :
+	diff=pointbake.compare_caches(*caches,stop_error=0.3,chunk_frames=2)
+	assert diff.stopped and not diff.matches()
+	assert list(diff.frames) == [0,1,2,3] and diff.worst_frame() == 3
+
+
+def test_different_caches(tmp_path,frames) :
+	file_a=str(tmp_path/"a.xml")
+	write_cache(file_a,frames)
+	file_b=str(tmp_path/"b.xml")
+	write_cache(file_b,make_frames(num_verts=21))
+	with pytest.raises(ValueError,match="verts") :
+		pointbake.compare_caches(file_a,file_b)
+	# only the frames both caches have are compared
+	file_c=str(tmp_path/"c.xml")
+	write_cache(file_c,frames[:4])
+	diff=pointbake.compare_caches(file_a,file_c)
+	assert len(diff) == 4 and not diff.same_range() and not diff.matches()
+
+
+def test_synthetic_cache(tmp_path) :
+	rest=synthetic.load_rest("shark",copies=4)
+	count=len(pointbake.read_obj_vertices(synthetic.MODELS["shark"]))
+	assert rest.shape == (count*4,3)
+	assert synthetic.size_copies("shark",count*3) == (3,count*3)
+	file_a=str(tmp_path/"a.pbk")
+	file_b=str(tmp_path/"b.pbk")
+	header=synthetic.write_cache(file_a,num_frames=5,copies=2,seed=3,dtype=np.float64,start_frame=1)
+	assert (header.num_verts,header.start_frame,header.end_frame) == (count*2,1,6)
+	# the same seed gives the same cache, and the first frame has moved from rest
+	synthetic.write_cache(file_b,num_frames=5,copies=2,seed=3,dtype=np.float64,start_frame=1)
+	assert pointbake.compare_caches(file_a,file_b).matches()
+	first=next(synthetic.synthetic_frames(synthetic.load_rest("shark",2),1,2,seed=3))
+	assert np.array_equal(pointbake.BinaryPointBake(file_a).frame(1),first)
+	assert not np.allclose(first,synthetic.load_rest("shark",2))
@@ -0,0 +1,92 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+import pointbake
+
+
+class _Source() :
+	"""cache of 20 single vertex frames which counts the reads of each frame"""
+
+	def __init__(self) -> None :
+		self.header=pointbake.PointBakeHeader("pTest",1,0,20,20)
+		self.reads=[]
+		self.closed=False
+
+	def frame(self,frame : int) -> np.ndarray :
+		self.reads.append(frame)
+		return np.full((1,3),float(frame))
+
+	def close(self) -> None :
+		self.closed=True
+
+	def __len__(self) -> int :
+		return 20
+
+
+def _wait_for(condition,timeout : float=5.0) -> bool :
+	end=time.monotonic()+timeout
+	while not condition() :
+		if time.monotonic() > end :
+			return False
+		time.sleep(0.005)
+	return True
+
+
+def test_least_recently_used_frame_is_evicted() :
+	source=_Source()
+	# room for three frames
+	with pointbake.FrameCache(source,max_bytes=3*24,prefetch=0) as cache :
+		for frame in (0,1,2,0,3) :
+			assert cache.frame(frame)[0,0] == frame
+		assert source.reads == [0,1,2,3]
+		counters=cache.counters()
+		assert (counters["hits"],counters["misses"],counters["evictions"],counters["frames"]) == (1,4,1,3)
+		# 1 was used least recently, 0 was used again so it is still held
+		cache.frame(0)
+		cache.frame(1)
+		assert source.reads == [0,1,2,3,1]
+
+
+def test_read_ahead_fills_the_cache() :
+	source=_Source()
+	with pointbake.FrameCache(source,prefetch=3) as cache :
+		cache.frame(5)
+		assert _wait_for(lambda : cache.counters()["prefetch_reads"] == 3)
+		for frame in (6,7,8) :
+			assert cache.frame(frame)[0,0] == frame
+		assert source.reads[:4] == [5,6,7,8] and source.reads.count(6) == 1
+		assert cache.counters()["prefetch_hits"] >= 3
+		# playing backwards reads ahead the other way
+		cache.frame(4)
+		assert _wait_for(lambda : 1 in source.reads)
+
+
+def test_close_joins_the_prefetch_thread() :
+	source=_Source()
+	cache=pointbake.FrameCache(source,prefetch=2)
+	thread=cache._thread
+	assert thread.is_alive()
+	cache.frame(0)
+	cache.close()
+	assert not thread.is_alive() and source.closed
+	assert cache.counters()["frames"] == 0
+	assert thread not in threading.enumerate()
@@ -0,0 +1,99 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+import pointbake
+import pointbake.parallel
+from conftest import make_frames, write_cache
+
+
+@pytest.fixture
+def held() :
+	# frames 2 and 3 repeat frame 1 and frame 6 is within the tolerance of frame 5
+	frames=make_frames(num_frames=8)
+	frames[2:4]=frames[1]
+	frames[6]=frames[5]+1e-7
+	expected=frames.copy()
+	expected[6]=frames[5]
+	return frames,expected
+
+
+def test_xml_hold_tags(tmp_path,held) :
+	frames,expected=held
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames,hold_tolerance=1e-6)
+	with open(file_name) as file :
+		text=file.read()
+	assert text.count(" hold=") == 3 and '<Frame number="6" hold="5">' in text
+	with pointbake.PointBakeReader(file_name,np.float64) as reader :
+		read=list(reader)
+	assert np.array_equal(np.stack([points for _,points in read]),expected)
+	# held frames are the same array as the frame they hold
+	assert read[2][1] is read[1][1] and read[3][1] is read[1][1] and read[4][1] is not read[1][1]
+
+
+def test_pbk_hold_slots(tmp_path,held) :
+	frames,expected=held
+	for codec in (None,pointbake.Codec(chunk_frames=4)) :
+		file_name=str(tmp_path/"cache.pbk")
+		write_cache(file_name,frames,dtype=np.float64,codec=codec,hold_tolerance=1e-6)
+		with pointbake.BinaryPointBake(file_name) as cache :
+			assert cache.header.num_frames == 8 and cache.slots.tolist() == [0,1,1,1,2,3,3,4]
+			assert np.array_equal(np.stack([np.array(points) for _,points in cache]),expected)
+			assert np.array_equal(np.array(cache.frame(3)),frames[1])
+	# a tolerance of 0 only holds identical frames
+	write_cache(file_name,frames,dtype=np.float64,hold_tolerance=0.0)
+	with pointbake.BinaryPointBake(file_name) as cache :
+		assert cache.slots.tolist() == [0,1,1,1,2,3,4,5] and len(cache.frames) == 6
+
+
+def test_key_frames_keep_the_end_of_a_hold(tmp_path,held) :
+	frames,_=held
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames,hold_tolerance=1e-6)
+	with pointbake.PointBakeReader(file_name,np.float64) as reader :
+		keys=list(pointbake.key_frames(reader))
+	# the last frame of each held run is keyed so the keys between hold the position
+	assert [frame for frame,_ in keys] == [0,1,3,4,5,6,7]
+	assert np.array_equal(keys[2][1],frames[1])
+
+
+def test_hold_of_an_earlier_frame_fails(tmp_path,held) :
+	frames,_=held
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames,hold_tolerance=1e-6)
+	with open(file_name) as file :
+		text=file.read()
+	with open(file_name,"w") as file :
+		file.write(text.replace('<Frame number="6" hold="5">','<Frame number="6" hold="1">'))
+	with pytest.raises(ValueError,match="not the last stored frame") :
+		pointbake.read_frames(file_name)
+
+
+def test_holds_through_index_and_parallel(tmp_path,held,monkeypatch) :
+	frames,expected=held
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames,hold_tolerance=1e-6)
+	with pointbake.IndexedPointBake(file_name,np.float64) as cache :
+		assert np.array_equal(cache.frame(3),frames[1])
+		numbers,data=cache.frame_range(2,8)
+	assert numbers.tolist() == list(range(2,8)) and np.array_equal(data,expected[2:])
+	monkeypatch.setattr(pointbake.parallel,"MIN_PARALLEL_SIZE",0)
+	header,numbers,data=pointbake.read_frames_parallel(file_name,workers=2,dtype=np.float64,chunks_per_worker=2)
+	assert numbers.tolist() == list(range(8)) and np.array_equal(data,expected)
@@ -0,0 +1,53 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+
+import numpy as np
+
+import pointbake
+from conftest import write_cache
+
+
+def test_indexed_frames(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames,start_frame=5)
+	with pointbake.IndexedPointBake(file_name,np.float64) as cache :
+		assert len(cache) == len(frames)
+		assert np.array_equal(cache.frame(8),frames[3])
+		numbers,data=cache.frame_range(6,9)
+	assert numbers.tolist() == [6,7,8] and np.array_equal(data,frames[1:4])
+	assert os.path.exists(pointbake.index_file_name(file_name))
+	assert np.array_equal(pointbake.read_frame(file_name,5,np.float64),frames[0])
+
+
+def test_stale_index_is_rebuilt(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames)
+	index=pointbake.build_index(file_name)
+	# the same frames in another order is a file of the same size, only the modification time tells them apart
+	write_cache(file_name,frames[::-1])
+	stat=os.stat(file_name)
+	os.utime(file_name,ns=(stat.st_atime_ns,index.source_mtime_ns+10**9))
+	assert os.path.getsize(file_name) == index.source_size
+	assert not pointbake.FrameIndex.load(pointbake.index_file_name(file_name)).matches(file_name)
+	assert np.array_equal(pointbake.read_frame(file_name,0,np.float64),frames[-1])
+	assert pointbake.FrameIndex.load(pointbake.index_file_name(file_name)).matches(file_name)
+	# a file which has grown is rebuilt as well
+	write_cache(file_name,np.concatenate([frames,frames]))
+	assert len(pointbake.load_index(file_name)) == 2*len(frames)
+	assert np.array_equal(pointbake.read_frame(file_name,len(frames)+1,np.float64),frames[1])
@@ -0,0 +1,79 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import make_frames, write_cache
+
+
+def test_cluster_vertices() :
+	points=make_frames(num_verts=400,num_frames=1)[0]
+	vertices,mapping=pointbake.cluster_vertices(points,100)
+	assert 80 <= len(vertices) <= 120
+	assert len(np.unique(vertices)) == len(vertices) and len(mapping) == len(points)
+	# every representative follows itself
+	assert np.array_equal(mapping[vertices],np.arange(len(vertices)))
+	assert np.array_equal(pointbake.cluster_vertices(points,len(points))[0],np.arange(len(points)))
+
+
+def test_build_and_read_levels(tmp_path) :
+	frames=make_frames(num_verts=400,num_frames=5)
+	file_name=str(tmp_path/"cache.pbk")
+	write_cache(file_name,frames,dtype=np.float64)
+	lods=pointbake.build_lods(file_name,(0.25,0.0625),dtype=np.float64)
+	assert len(lods) == 2 and len(lods.level(1)) > len(lods.level(2))
+	assert os.path.exists(pointbake.lod_file_name(file_name,2))
+	level=pointbake.load_lods(file_name).level(1)
+	with pointbake.LODPointBake(file_name,1) as cache :
+		assert cache.header.num_verts == len(level)
+		data=np.stack([np.array(points) for _,points in cache])
+	assert np.array_equal(data,level.reduce(frames))
+	# without the rest mesh each vertex takes the position of the vertex it maps to
+	assert np.array_equal(level.expand(data),frames[:,level.vertices[level.mapping]])
+	with pytest.raises(IndexError) :
+		lods.level(3)
+
+
+def test_expand_keeps_offsets_from_rest() :
+	rest=make_frames(num_verts=200,num_frames=1)[0]
+	level=pointbake.LevelOfDetail(*pointbake.cluster_vertices(rest,50))
+	moved=rest+np.array([1.0,-2.0,0.5])
+	# a rigid move of the reduced level moves the full mesh the same way
+	assert np.allclose(level.expand(level.reduce(moved),rest),moved)
+
+
+def test_levels_out_of_date(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames)
+	pointbake.build_lods(file_name)
+	write_cache(file_name,np.concatenate([frames,frames]))
+	with pytest.raises(ValueError) :
+		pointbake.load_lods(file_name)
+
+
+def test_relative_levels_need_rest(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.pbk")
+	header=pointbake.PointBakeHeader("pTest",frames.shape[1],0,len(frames),len(frames),"relative")
+	with pointbake.BinaryPointBakeWriter(file_name,header) as writer :
+		for frame,points in enumerate(frames) :
+			writer.write_frame(frame,points)
+	with pytest.raises(ValueError) :
+		pointbake.build_lods(file_name)
@@ -0,0 +1,45 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import make_frames, write_cache
+
+
+@pytest.mark.parametrize("extension",["xml","pbk"])
+def test_merged_stats_match_whole_cache(tmp_path,extension) :
+	frames=make_frames(num_frames=12)
+	# a static run across the second join must be reported as static, not as a cut
+	frames[7:]=frames[7]
+	whole=str(tmp_path/f"whole.{extension}")
+	write_cache(whole,frames,stats=True)
+	segments=[]
+	for start,end in pointbake.split_frames(0,len(frames),3) :
+		segments.append(pointbake.segment_file_name(whole,start,end))
+		write_cache(segments[-1],frames[start:end],start,stats=True)
+	merged=str(tmp_path/f"merged.{extension}")
+	pointbake.merge_segments(segments,merged)
+	expected=pointbake.load_stats(whole,False)
+	stats=pointbake.load_stats(merged,False)
+	assert stats is not None and stats.matches(merged)
+	assert np.array_equal(stats.frames,expected.frames)
+	assert np.allclose(stats.max_displacement,expected.max_displacement)
+	assert stats.static().tolist() == expected.static().tolist()
+	with pointbake.open_frames(merged,np.float64) as source :
+		assert np.array_equal(np.stack([points for _,points in source]),frames)
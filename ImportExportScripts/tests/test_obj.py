@@ -0,0 +1,68 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import write_cache
+
+
+def _write_obj(file_name : str,points : np.ndarray) -> None :
+	with open(file_name,"w") as file :
+		file.write("# test mesh\n")
+		for x,y,z in points.tolist() :
+			file.write(f"v {x!r} {y!r} {z!r}\n")
+		file.write("f 1 2 3\n")
+
+
+def test_read_obj_vertices(tmp_path,frames) :
+	obj_name=str(tmp_path/"mesh.obj")
+	_write_obj(obj_name,frames[0])
+	assert np.array_equal(pointbake.read_obj_vertices(obj_name),frames[0])
+	# a w value or a colour after the position is ignored
+	with open(obj_name,"w") as file :
+		file.write("v 1 2 3 1\nvn 0 0 1\nv 4 5 6 0.5 0.5 0.5\n")
+	assert pointbake.read_obj_vertices(obj_name).tolist() == [[1.0,2.0,3.0],[4.0,5.0,6.0]]
+
+
+def test_obj_matches_cache(tmp_path,frames) :
+	obj_name=str(tmp_path/"mesh.obj")
+	file_name=str(tmp_path/"cache.xml")
+	_write_obj(obj_name,frames[0])
+	write_cache(file_name,frames)
+	pointbake.check_obj(obj_name,file_name)
+	assert pointbake.compare_rest(file_name,frames[0]+5e-4) == []
+
+
+def test_vertex_count_mismatch(tmp_path,frames) :
+	obj_name=str(tmp_path/"mesh.obj")
+	file_name=str(tmp_path/"cache.pbk")
+	_write_obj(obj_name,frames[0,:-1])
+	write_cache(file_name,frames)
+	with pytest.raises(ValueError,match=f"has {frames.shape[1]} verts the mesh has {frames.shape[1]-1}") :
+		pointbake.check_obj(obj_name,file_name)
+
+
+def test_reordered_vertices_are_reported(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames)
+	problems=pointbake.compare_rest(file_name,frames[0,::-1])
+	assert len(problems) == 2 and "vertex order" in problems[1]
+	problems=pointbake.compare_rest(file_name,frames[3])
+	assert len(problems) == 1 and "frame 0 differs" in problems[0]
+
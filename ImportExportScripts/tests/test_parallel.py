@@ -0,0 +1,71 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import gc
+import mmap
+import os
+
+import numpy as np
+
+import pointbake
+import pointbake.parallel
+from conftest import make_frames, write_cache
+
+
+def test_parallel_read_returns_shared_array(tmp_path,monkeypatch) :
+	monkeypatch.setattr(pointbake.parallel,"MIN_PARALLEL_SIZE",0)
+	frames=make_frames(num_verts=50,num_frames=9)
+	# a held frame is filled in from the frame it holds
+	frames[5]=frames[4]
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames,hold_tolerance=0.0)
+	with open(file_name) as file :
+		assert 'hold="4"' in file.read()
+	_,numbers,data=pointbake.read_frames_parallel(file_name,workers=2)
+	_,expected_numbers,expected=pointbake.read_frames(file_name)
+	assert np.array_equal(numbers,expected_numbers)
+	assert np.array_equal(data,expected)
+	assert np.array_equal(data[5],data[4])
+	# the array is the shared block the workers wrote to, not a copy of it
+	assert isinstance(data.base,mmap.mmap) and data.flags.writeable
+	view=data[3]
+	del data
+	gc.collect()
+	assert np.array_equal(view,expected[3])
+	if os.path.isdir("/dev/shm") :
+		assert not [name for name in os.listdir("/dev/shm") if name.startswith("psm_")]
+
+
+def test_parallel_read_of_sparse_relative_frames(tmp_path,monkeypatch) :
+	monkeypatch.setattr(pointbake.parallel,"MIN_PARALLEL_SIZE",0)
+	# only the first 10 vertices move so the frames are written sparse, the rest are left at rest
+	rest=make_frames(num_verts=50,num_frames=1)[0]
+	offsets=make_frames(num_verts=50,num_frames=9,seed=1)-make_frames(num_verts=50,num_frames=1,seed=1)[0]
+	offsets[:,10:]=0.0
+	file_name=str(tmp_path/"cache.xml")
+	header=pointbake.PointBakeHeader("pTest",len(rest),0,len(offsets),len(offsets),"relative")
+	with pointbake.PointBakeXMLWriter(file_name,header,tolerance=1e-6) as writer :
+		for frame,points in enumerate(offsets) :
+			writer.write_frame(frame,points)
+	with open(file_name) as file :
+		assert file.read().count("<Vertex") == 10*(len(offsets)-1)
+	_,numbers,data=pointbake.read_frames_parallel(file_name,workers=2,dtype=np.float64,rest=rest)
+	assert numbers.tolist() == list(range(len(offsets)))
+	assert np.array_equal(data,pointbake.read_frames(file_name,np.float64,rest)[2])
+	assert np.allclose(data,rest+offsets)
+	_,_,data=pointbake.read_frames_parallel(file_name,workers=2,dtype=np.float64)
+	assert np.array_equal(data,pointbake.read_frames(file_name,np.float64)[2])
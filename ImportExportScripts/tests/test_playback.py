@@ -0,0 +1,57 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+
+import numpy as np
+
+import pointbake
+from conftest import write_cache
+
+
+def test_registry_keeps_resampler(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames)
+	registry=pointbake.CacheRegistry()
+	resampler=registry.resampler(file_name,"linear")
+	assert registry.resampler(file_name,"linear") is resampler
+	assert registry.resampler(file_name,"hermite") is not resampler
+	assert registry.resampler(file_name,"linear") is resampler
+	# stepping through sub frame times reads each stored frame once
+	times=np.arange(0.0,5.0,0.25)
+	expected=pointbake.Resampler(resampler.source,"linear").sample(times)
+	reads=[]
+	source=resampler.source
+	frame=source.frame
+	source.frame=lambda number : reads.append(number) or frame(number)
+	for time,points in zip(times,expected) :
+		assert np.allclose(registry.resampler(file_name,"linear").at(time),points)
+	assert reads == list(range(6))
+	registry.clear()
+
+
+def test_registry_remakes_resampler_when_file_changes(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.pbk")
+	write_cache(file_name,frames)
+	registry=pointbake.CacheRegistry()
+	resampler=registry.resampler(file_name)
+	write_cache(file_name,frames[::-1])
+	os.utime(file_name,ns=(0,1))
+	changed=registry.resampler(file_name)
+	assert changed is not resampler
+	assert np.allclose(changed.at(0.0),frames[-1],rtol=1e-6)
+	registry.clear()
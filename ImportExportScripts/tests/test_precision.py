@@ -0,0 +1,69 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import write_cache
+
+
+def test_precision_dtype() :
+	assert pointbake.precision_dtype("float16") == np.dtype("<f2")
+	assert pointbake.precision_dtype(np.float32) == np.dtype("<f4")
+	for bad in ("float128",np.int32,"complex64","bogus") :
+		with pytest.raises(ValueError) :
+			pointbake.precision_dtype(bad)
+
+
+@pytest.mark.parametrize("precision",["float16","float32","float64"])
+def test_binary_precision(tmp_path,frames,precision) :
+	dtype=pointbake.precision_dtype(precision)
+	file_name=str(tmp_path/"cache.pbk")
+	header=pointbake.PointBakeHeader("pTest",frames.shape[1],0,len(frames),len(frames))
+	with pointbake.open_writer(file_name,header,precision) as writer :
+		for frame,points in enumerate(frames) :
+			writer.write_frame(frame,points)
+	rounded=frames.astype(dtype)
+	assert writer.max_error == max(pointbake.rounding_error(points,rounded[i]) for i,points in enumerate(frames))
+	assert writer.max_error <= pointbake.error_bound(np.abs(frames).max(),precision)
+	with pointbake.BinaryPointBake(file_name) as cache :
+		assert cache.dtype == dtype
+		data=np.stack([np.array(points) for _,points in cache])
+	# half floats are handed back as float32
+	assert data.dtype == (np.float32 if precision == "float16" else dtype)
+	assert np.array_equal(data,rounded)
+
+
+def test_xml_precision(tmp_path,frames) :
+	sizes={}
+	for precision in ("float16","float32","float64") :
+		file_name=str(tmp_path/f"{precision}.xml")
+		write_cache(file_name,frames,dtype=precision)
+		sizes[precision]=os.path.getsize(file_name)
+		# the digits written read back to exactly the rounded value once rounded to the precision again
+		data=pointbake.read_frames(file_name,np.float64)[2]
+		assert np.array_equal(data.astype(precision),frames.astype(precision))
+	assert sizes["float16"] < sizes["float32"] < sizes["float64"]
+
+
+def test_values_too_large_for_the_precision() :
+	with pytest.raises(ValueError) :
+		pointbake.round_points(np.full((2,3),1e6),"float16")
+	assert np.array_equal(pointbake.round_points(np.full((2,3),1e6),"float32"),np.full((2,3),1e6,np.float32))
@@ -0,0 +1,94 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import write_cache, write_xml
+from pointbake.cli import main
+
+
+def test_read_frames(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	write_xml(file_name,frames,start_frame=10)
+	header,numbers,data=pointbake.read_frames(file_name,np.float64)
+	assert (header.mesh_name,header.num_verts,header.start_frame,header.end_frame,header.num_frames) == \
+		("pTest",frames.shape[1],10,16,6)
+	assert header.translate_mode == "absolute"
+	assert numbers.tolist() == list(range(10,16))
+	assert np.array_equal(data,frames)
+
+
+def test_stream_across_reads(tmp_path,frames) :
+	# reads much smaller than a frame still give whole frames
+	file_name=str(tmp_path/"cache.xml")
+	write_xml(file_name,frames)
+	with pointbake.PointBakeReader(file_name,np.float64,read_size=100) as reader :
+		streamed=[points for _,points in reader]
+	assert np.array_equal(np.stack(streamed),frames)
+	assert pointbake.read_header(file_name).num_verts == frames.shape[1]
+
+
+def test_vertices_out_of_order(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	write_xml(file_name,frames,order=np.random.default_rng(1).permutation(frames.shape[1]))
+	assert np.array_equal(pointbake.read_frames(file_name,np.float64)[2],frames)
+
+
+def test_incomplete_frame_fails(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	write_xml(file_name,frames)
+	with open(file_name,"r+b") as file :
+		data=file.read()
+		file.seek(0)
+		file.truncate()
+		file.write(data[:data.rfind(b"</Frame>")])
+	with pytest.raises(ValueError) :
+		list(pointbake.iter_frames(file_name))
+
+
+def test_xml_round_trip(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	header=write_cache(file_name,frames,start_frame=10)
+	read,numbers,data=pointbake.read_frames(file_name,np.float64)
+	assert vars(read) == vars(header)
+	assert numbers.tolist() == list(range(10,16))
+	assert np.array_equal(data,frames)
+
+
+def test_zero_frame_xml(tmp_path,frames,capsys) :
+	# the writer closed before any frame, e.g. an export cancelled straight away
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames[:0])
+	header=pointbake.read_header(file_name)
+	assert (header.mesh_name,header.num_verts,header.num_frames) == ("pTest",frames.shape[1],0)
+	_,numbers,data=pointbake.read_frames(file_name)
+	assert len(numbers) == 0 and data.shape == (0,frames.shape[1],3)
+	assert main(["info",file_name]) == 0
+	assert "pTest" in capsys.readouterr().out
+
+
+def test_zero_frame_xml_resumes(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	header=write_cache(file_name,frames[:0])
+	header.end_frame=header.start_frame+len(frames)
+	with pointbake.open_writer(file_name,header,resume=True) as writer :
+		assert writer.next_frame == header.start_frame
+		for frame,points in enumerate(frames,writer.next_frame) :
+			writer.write_frame(frame,points)
+	assert np.array_equal(pointbake.read_frames(file_name,np.float64)[2],frames)
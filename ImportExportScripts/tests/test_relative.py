@@ -0,0 +1,71 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import make_frames
+
+
+@pytest.fixture
+def relative(tmp_path) :
+	# a relative cache where only the first 5 vertices move, the rest wobble by less than the tolerance
+	rest=make_frames(num_frames=1)[0]
+	offsets=make_frames(num_frames=6,seed=1)-make_frames(num_frames=1,seed=1)[0]
+	offsets[:,5:]=1e-5
+	file_name=str(tmp_path/"cache.xml")
+	header=pointbake.PointBakeHeader("pTest",len(rest),0,len(offsets),len(offsets),"relative")
+	with pointbake.PointBakeXMLWriter(file_name,header,tolerance=1e-4) as writer :
+		for frame,points in enumerate(offsets) :
+			writer.write_frame(frame,points)
+	expected=offsets.copy()
+	expected[:,5:]=0.0
+	return file_name,rest,expected
+
+
+def test_relative_frames_are_sparse(relative) :
+	file_name,_,expected=relative
+	with open(file_name) as file :
+		# the first frame has no offsets at all
+		assert file.read().count("<Vertex") == 5*(len(expected)-1)
+	header,_,data=pointbake.read_frames(file_name,np.float64)
+	assert pointbake.is_relative(header)
+	assert np.array_equal(data,expected)
+
+
+def test_relative_read_with_rest(relative) :
+	file_name,rest,expected=relative
+	assert np.array_equal(pointbake.read_frames(file_name,np.float64,rest)[2],rest+expected)
+	assert np.array_equal(np.stack([points for _,points in pointbake.iter_frames(file_name,np.float64,rest)]),rest+expected)
+	with pointbake.IndexedPointBake(file_name,np.float64,rest) as cache :
+		assert np.array_equal(cache.frame(3),rest+expected[3])
+		assert np.array_equal(cache.frame_range(1,4)[1],rest+expected[1:4])
+	assert np.array_equal(pointbake.read_frame(file_name,2,np.float64),expected[2])
+
+
+def test_relative_binary_with_rest(tmp_path,relative) :
+	file_name,rest,expected=relative
+	binary_name=str(tmp_path/"cache.pbk")
+	pointbake.xml_to_binary(file_name,binary_name,np.float64)
+	with pointbake.BinaryPointBake(binary_name,rest) as cache :
+		assert pointbake.is_relative(cache.header)
+		assert np.array_equal(cache.frame(4),rest+expected[4])
+	with pointbake.BinaryPointBake(binary_name) as cache :
+		assert np.array_equal(np.array(cache.frame(4)),expected[4])
+	pointbake.binary_to_xml(binary_name,str(tmp_path/"back.xml"))
+	assert np.array_equal(pointbake.read_frames(str(tmp_path/"back.xml"),np.float64,rest)[2],rest+expected)
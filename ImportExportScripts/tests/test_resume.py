@@ -0,0 +1,87 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import make_frames, write_cache
+
+
+def _crash(file_name : str,frames : np.ndarray,**options) -> None :
+	# write frames and stop without closing, as an export does when maya crashes part way
+	header=pointbake.PointBakeHeader("pTest",frames.shape[1],0,len(frames),len(frames))
+	writer=pointbake.open_writer(file_name,header,np.float64,checkpoint_frames=4,**options)
+	for frame,points in enumerate(frames) :
+		writer.write_frame(frame,points)
+	writer._file.flush()
+	writer._file.close()
+	writer._file=None
+
+
+def _resume(file_name : str,frames : np.ndarray,**options) -> int :
+	# carry on from where the file was left and write the rest of frames, the frame resumed from is returned
+	header=pointbake.PointBakeHeader("pTest",frames.shape[1],0,len(frames),len(frames))
+	with pointbake.open_writer(file_name,header,np.float64,resume=True,checkpoint_frames=4,**options) as writer :
+		start=writer.next_frame
+		for frame in range(start,len(frames)) :
+			writer.write_frame(frame,frames[frame])
+	return start
+
+
+def _read(file_name : str) -> np.ndarray :
+	with pointbake.open_frames(file_name,np.float64) as source :
+		assert source.header.num_frames == source.header.end_frame-source.header.start_frame
+		return np.stack([points for _,points in source])
+
+
+@pytest.mark.parametrize("options",[{},{"codec" : pointbake.Codec(chunk_frames=4)},{"hold_tolerance" : 0.0,"stats" : True}],
+												 ids=["raw","codec","hold"])
+def test_pbk_resumes_from_checkpoint(tmp_path,options) :
+	frames=make_frames(num_frames=14)
+	frames[9:11]=frames[8]
+	file_name=str(tmp_path/"cache.pbk")
+	_crash(file_name,frames[:10],**options)
+	# frames after the last checkpoint are written again
+	assert _resume(file_name,frames,**options) == 8
+	assert np.array_equal(_read(file_name),frames)
+	assert not os.path.exists(pointbake.resume_file_name(file_name))
+	if options.get("stats") :
+		stats=pointbake.load_stats(file_name,False)
+		assert stats is not None and stats.matches(file_name) and len(stats) == len(frames)
+
+
+def test_xml_resumes_after_last_complete_frame(tmp_path) :
+	frames=make_frames(num_frames=10)
+	file_name=str(tmp_path/"cache.xml")
+	_crash(file_name,frames[:7])
+	with open(file_name,"a") as file :
+		# a frame cut off part way through
+		file.write('\t<Frame number="7">\n\t\t<Vertex number="0" attr="translate"> 1.0 2')
+	assert _resume(file_name,frames) == 7
+	assert np.array_equal(_read(file_name),frames)
+
+
+@pytest.mark.parametrize("extension",["xml","pbk"])
+def test_closed_file_appends(tmp_path,extension) :
+	frames=make_frames(num_frames=9)
+	file_name=str(tmp_path/f"cache.{extension}")
+	write_cache(file_name,frames[:5],dtype=np.float64)
+	assert _resume(file_name,frames) == 5
+	assert np.array_equal(_read(file_name),frames)
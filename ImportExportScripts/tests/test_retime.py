@@ -0,0 +1,99 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import make_frames
+
+
+class _Frames() :
+	"""frames held in memory with the header and frame(number) of a cache"""
+
+	def __init__(self,frames : np.ndarray,start_frame : int=0) -> None :
+		self.frames=frames
+		self.header=pointbake.PointBakeHeader("pTest",frames.shape[1],start_frame,start_frame+len(frames),len(frames))
+
+	def frame(self,frame : int) -> np.ndarray :
+		return self.frames[frame-self.header.start_frame]
+
+
+@pytest.mark.parametrize("interpolation",pointbake.INTERPOLATIONS)
+@pytest.mark.parametrize("mode",pointbake.OUT_OF_RANGE_MODES)
+def test_weights_sum_to_one(interpolation,mode) :
+	header=pointbake.PointBakeHeader("pTest",1,10,20,10)
+	times=np.random.default_rng(0).uniform(5.0,25.0,200)
+	frames,weights,valid=pointbake.sample_weights(times,header,interpolation,mode)
+	assert np.allclose(weights.sum(axis=1),1.0)
+	assert ((frames >= 10) & (frames < 20)).all()
+	assert valid.all() != (mode == "none")
+
+
+@pytest.mark.parametrize("interpolation",pointbake.INTERPOLATIONS)
+def test_stored_frame_is_exact(interpolation) :
+	frames=make_frames(num_frames=8)
+	resampler=pointbake.Resampler(_Frames(frames,10),interpolation)
+	for time in (10.0,13.0,17.0) :
+		assert np.array_equal(resampler.at(time),frames[int(time)-10])
+	# a host time a hair before the frame is taken as the frame
+	assert np.array_equal(resampler.at(13.0-1e-9),frames[3])
+	assert np.array_equal(resampler.sample([12.0,15.0]),frames[[2,5]])
+
+
+def test_midpoints() :
+	frames=make_frames(num_frames=8)
+	source=_Frames(frames)
+	assert np.array_equal(pointbake.Resampler(source,"step").at(2.5),frames[2])
+	assert np.allclose(pointbake.Resampler(source,"linear").at(2.5),(frames[2]+frames[3])*0.5)
+	# Catmull-Rom half way between 2 and 3 weights the frames either side by -1/16 and 9/16
+	expected=(-frames[1]+9.0*frames[2]+9.0*frames[3]-frames[4])/16.0
+	assert np.allclose(pointbake.Resampler(source,"hermite").at(2.5),expected)
+	assert np.allclose(pointbake.Resampler(source,"linear").at(3.25),frames[3]*0.75+frames[4]*0.25)
+
+
+def test_out_of_range_modes() :
+	frames=make_frames(num_frames=5)
+	source=_Frames(frames)
+	hold=pointbake.Resampler(source,"linear","hold")
+	assert np.array_equal(hold.at(-3.0),frames[0]) and np.array_equal(hold.at(9.5),frames[4])
+	loop=pointbake.Resampler(source,"linear","loop")
+	assert np.array_equal(loop.at(6.0),frames[1]) and np.array_equal(loop.at(-1.0),frames[4])
+	none=pointbake.Resampler(source,"linear","none")
+	assert none.at(5.0) is None and none.at(-0.5) is None
+	with pytest.raises(ValueError) :
+		none.sample([1.0,7.0])
+	# the offset moves the cache along the timeline
+	assert np.array_equal(pointbake.Resampler(source,"linear","hold",10.0).at(12.0),frames[2])
+
+
+def test_frame_rate_times() :
+	header=pointbake.PointBakeHeader("pTest",1,1,49,48)
+	times=pointbake.frame_rate_times(header,24.0,30.0)
+	assert len(times) == 60 and times[0] == 1.0 and np.allclose(np.diff(times),0.8)
+	assert np.allclose(pointbake.frame_rate_times(header,24.0,12.0),np.arange(1,49,2))
+	with pytest.raises(ValueError) :
+		pointbake.frame_rate_times(header,0.0,30.0)
+
+
+def test_motion_blur_times() :
+	assert np.allclose(pointbake.motion_blur_times(10.0,3,0.5,"centre"),[9.75,10.0,10.25])
+	assert np.allclose(pointbake.motion_blur_times(10.0,3,0.5,"start"),[10.0,10.25,10.5])
+	assert np.allclose(pointbake.motion_blur_times(10.0,3,0.5,"end"),[9.5,9.75,10.0])
+	assert np.allclose(pointbake.motion_blur_times(10.0,1,0.5,"start"),[10.25])
+	with pytest.raises(ValueError) :
+		pointbake.motion_blur_times(10.0,0)
@@ -0,0 +1,57 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import write_cache
+
+
+@pytest.mark.parametrize("extension",["xml","pbk"])
+def test_written_stats(tmp_path,frames,extension) :
+	frames[3]=frames[2]
+	file_name=str(tmp_path/f"cache.{extension}")
+	write_cache(file_name,frames,start_frame=4,stats=True,**({"dtype" : np.float64} if extension == "pbk" else {}))
+	assert os.path.exists(pointbake.stats_file_name(file_name))
+	stats=pointbake.load_stats(file_name,False)
+	assert stats is not None and len(stats) == len(frames)
+	assert stats.frames.tolist() == list(range(4,4+len(frames)))
+	assert np.array_equal(stats.lo,frames.min(axis=1)) and np.array_equal(stats.hi,frames.max(axis=1))
+	assert np.array_equal(stats.bounds(),np.stack([frames.min(axis=(0,1)),frames.max(axis=(0,1))]))
+	moved=np.sqrt(((frames[1:]-frames[:-1])**2).sum(axis=2)).max(axis=1)
+	assert np.isinf(stats.max_displacement[0])
+	assert np.allclose(stats.max_displacement[1:],moved)
+	assert stats.static().tolist() == [False,False,False,True,False,False]
+	# reading every frame gives the same statistics as gathering them while writing
+	built=pointbake.build_stats(file_name,False)
+	assert np.allclose(built.max_displacement[1:],stats.max_displacement[1:])
+	assert np.array_equal(built.lo,stats.lo)
+
+
+def test_stats_out_of_date(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.xml")
+	write_cache(file_name,frames,stats=True)
+	write_cache(file_name,frames*2.0)
+	# the sidecar was written for the first file and isn't trusted
+	assert pointbake.load_stats(file_name,False) is None
+	stats=pointbake.load_stats(file_name)
+	assert stats.matches(file_name)
+	assert np.array_equal(stats.hi,(frames*2.0).max(axis=1))
+	assert pointbake.load_stats(file_name,False) is not None
@@ -0,0 +1,92 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import pointbake
+
+
+class _SlowWriter() :
+	"""writer which waits for release before writing each frame and fails on fail_frame"""
+
+	def __init__(self,fail_frame : int=-1) -> None :
+		self.header=pointbake.PointBakeHeader("pTest",2,0,8,8)
+		self.next_frame=0
+		self.fail_frame=fail_frame
+		self.release=threading.Event()
+		self.frames=[]
+		self.closed=False
+
+	def write_frame(self,frame : int,points : np.ndarray) -> None :
+		self.release.wait()
+		if frame == self.fail_frame :
+			raise OSError(f"disk full at frame {frame}")
+		self.frames.append(frame)
+
+	def close(self) -> None :
+		self.closed=True
+
+
+def test_threaded_round_trip(tmp_path,frames) :
+	file_name=str(tmp_path/"cache.pbk")
+	header=pointbake.PointBakeHeader("pTest",frames.shape[1],0,len(frames),len(frames))
+	points=np.empty_like(frames[0])
+	with pointbake.ThreadedWriter(pointbake.open_writer(file_name,header,np.float64),2) as writer :
+		for frame in range(len(frames)) :
+			# the frame is copied when queued so the caller can reuse its buffer
+			points[:]=frames[frame]
+			writer.write_frame(frame,points)
+	with pointbake.BinaryPointBake(file_name) as cache :
+		assert np.array_equal(np.stack([np.array(points) for _,points in cache]),frames)
+
+
+def test_full_queue_blocks_the_caller() :
+	slow=_SlowWriter()
+	writer=pointbake.ThreadedWriter(slow,2)
+	# one frame taken by the writer thread and two queued
+	for frame in range(3) :
+		writer.write_frame(frame,np.zeros((2,3)))
+	blocked=threading.Thread(target=writer.write_frame,args=(3,np.zeros((2,3))))
+	blocked.start()
+	blocked.join(0.2)
+	assert blocked.is_alive()
+	slow.release.set()
+	blocked.join(5.0)
+	assert not blocked.is_alive()
+	writer.close()
+	assert slow.frames == [0,1,2,3] and slow.closed
+
+
+def test_writer_error_is_raised_to_the_caller() :
+	slow=_SlowWriter(fail_frame=1)
+	slow.release.set()
+	writer=pointbake.ThreadedWriter(slow,1)
+	with pytest.raises(OSError,match="frame 1") :
+		for frame in range(8) :
+			writer.write_frame(frame,np.zeros((2,3)))
+		writer.close()
+	writer.close()
+	# frames after the error are dropped but the file is still closed
+	assert slow.frames == [0] and slow.closed
+
+
+def test_queue_must_hold_a_frame() :
+	with pytest.raises(ValueError) :
+		pointbake.ThreadedWriter(_SlowWriter(),0)
@@ -0,0 +1,41 @@
+"""
+  Copyright (C) 2011 Jon Macey
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+import pointbake
+from conftest import write_cache
+
+
+@pytest.mark.parametrize("file_name,writer_type",[("cache.pbk",pointbake.BinaryPointBakeWriter),
+																									("CACHE.PBK",pointbake.BinaryPointBakeWriter),
+																									("cache.xml",pointbake.PointBakeXMLWriter)])
+def test_open_writer_format(tmp_path,frames,file_name,writer_type) :
+	header=pointbake.PointBakeHeader("pTest",frames.shape[1],0,len(frames),len(frames))
+	with pointbake.open_writer(str(tmp_path/file_name),header) as writer :
+		assert type(writer) is writer_type
+
+
+def test_open_writer_options(tmp_path,frames) :
+	write_cache(str(tmp_path/"cache.pbk"),frames,dtype=np.float64)
+	with pointbake.BinaryPointBake(str(tmp_path/"cache.pbk")) as cache :
+		assert cache.dtype == np.float64
+		assert np.array_equal(np.array(cache.frame(3)),frames[3])
+	write_cache(str(tmp_path/"cache.xml"),frames,float_format="%.3f")
+	data=pointbake.read_frames(str(tmp_path/"cache.xml"),np.float64)[2]
+	assert np.array_equal(data,np.round(frames,3))